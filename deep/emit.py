@@ -1,5 +1,6 @@
 from typing import Dict, Callable, Union, Any, List
 
+import numpy as np
 import torch
 
 from simulation.base.dropped_item import Food
@@ -90,12 +91,7 @@ def build_emittable_object_from(x: Player) -> Dict[str, torch.Tensor]:
 
         "self": torch.Tensor([x.location.x, x.location.y].extend(CALLS[x.received_call]), dtype=torch.float32),
 
-        "map": torch.Tensor([
-            Terrain.channel_occupiable(x.location, Player.ACTION_DISTANCE),
-            Terrain.channel_seeable(x.location, Player.ACTION_DISTANCE),
-            Terrain.channel_level(x.location, Player.ACTION_DISTANCE),
-            Terrain.channel_players(x.location, Player.ACTION_DISTANCE, x.game.player_map),
-            Terrain.channel_runners(x.location, Player.ACTION_DISTANCE, x.game.map),
-            Terrain.channel_healers(x.location, Player.ACTION_DISTANCE, x.game.map),
-        ], dtype=torch.float32),
+        "map": torch.from_numpy(
+            Terrain.channels(x.location, Player.ACTION_DISTANCE, x.game.occupancy).astype(np.float32)
+        ),
     }
@@ -1,5 +1,6 @@
 from log import debug
-from simulation import EventHandler, Room
+from simulation.event_handler import EventHandler
+from simulation.room import Room
 from .emit import build_emittable_object_from
 
 
@@ -1,10 +1,18 @@
-from typing import Optional, Dict
+from collections import deque
+from typing import Optional, Dict, Deque, NamedTuple, Tuple, Any
 from colorama import init, Fore, Back
 
 init()
 
+# Both flags are read at call time, so they can be flipped at runtime. Call sites on the tick path check them before
+# building their message (if log.DEBUG: debug(...)), so that disabled logging costs a single attribute lookup.
 DEBUG: bool = False
 GAME_PRINT: bool = False
+
+# Debug records are kept in a ring buffer of the last DEBUG_RECORDS_SIZE records. They are only printed as well if
+# DEBUG_PRINT is set.
+DEBUG_PRINT: bool = False
+DEBUG_RECORDS_SIZE: int = 10000
 J = Fore.RESET
 K = Back.RESET
 X = Back.BLACK
@@ -88,16 +96,49 @@ ALLOWED_GAME_PRINT_NAMESPACES: Dict[str, Optional[int]] = {
 }
 
 
-def debug(namespace: str, *args, **kwargs) -> None:
+class DebugRecord(NamedTuple):
+    namespace: str
+    tick: Optional[int]  # The game tick (see Inspectable.tick) of the unit the record is about, if any.
+    uuid: Optional[int]  # The uuid of the unit the record is about, if any.
+    location: Optional[Tuple[int, int]]  # Where the unit the record is about was, if any.
+    message: str  # What happened, the same text every time it happens.
+    fields: Dict[str, Any]  # The values the message is about, as they were when it happened. Formatted by __str__.
+
+    def __str__(self) -> str:
+        color = ALLOWED_DEBUG_NAMESPACES.get(self.namespace) or ""
+        parts = [f"DEBUG:: {color}{self.namespace:<26}{J}::"]
+        if self.uuid is not None:
+            parts.append(f"#{self.uuid} ({self.tick:0>3})@{self.location}")
+        parts.append(self.message)
+        parts.extend(f"{name}={value}" for name, value in self.fields.items())
+        return " ".join(parts)
+
+
+DEBUG_RECORDS: Deque[DebugRecord] = deque(maxlen=DEBUG_RECORDS_SIZE)
+
+
+def debug(namespace: str, message: str, unit: Any = None, **fields: Any) -> None:
+    # unit is the Locatable the record is about. Its uuid, game tick and location are recorded along with fields, which
+    # should be plain values (ints, strings, tuples, uuids of other units) rather than units or text made from them,
+    # so that a record stays as it was when the game moves on, and nothing is formatted unless it is printed.
     if not DEBUG:
         return None
 
     if namespace not in ALLOWED_DEBUG_NAMESPACES:
         return None
 
-    color = ALLOWED_DEBUG_NAMESPACES[namespace] or ""
-
-    return print(f"DEBUG:: {color}{namespace:<26}{J}::", *args, **kwargs)
+    record = DebugRecord(
+        namespace,
+        None if unit is None else unit.game.tick,
+        None if unit is None else unit.uuid,
+        None if unit is None else (unit.location.x, unit.location.y),
+        message,
+        fields,
+    )
+    DEBUG_RECORDS.append(record)
+
+    if DEBUG_PRINT:
+        print(record)
 
 
 def game_print(namespace: str, *args, **kwargs) -> None:
@@ -10,13 +10,38 @@ def main() -> None:
         raise EnvironmentError(f"You must use Python 3 or higher. Development is currently ongoing on Python {PY_VER}.")
 
     parser = ArgumentParser()
-    parser.add_argument("--mode", default="play", choices=["train", "evaluate", "play"])
+    parser.add_argument("--mode", default="play", choices=["train", "evaluate", "play", "benchmark"])
     parser.add_argument("--checkpoint", default=None, help="path to checkpoint to restore")
     parser.add_argument("--device_ids", default="0", type=lambda x: list(map(int, x.split(','))),
                         help="Names of the devices comma separated.")
+    parser.add_argument("--wave", default=1, type=int, help="1-indexed wave number to simulate")
+    parser.add_argument("--runner_movements", default="", help="runner movements, in standard syntax (like ws-e)")
+    parser.add_argument("--runs", default=100, type=int, help="number of waves to simulate")
+    parser.add_argument("--seed", default=None, type=int, help="random seed of the simulation")
+    parser.add_argument("--workers", default=None, type=int, help="processes to evaluate with (defaults to all cores)")
+    parser.add_argument("--batch", default=0, type=int, help="games to benchmark at once in a batch with idle players")
 
     opt = parser.parse_args()
 
+    if opt.mode == "benchmark" and opt.batch > 0:
+        from simulation.batch import Batch
+        batch = Batch(opt.wave - 1, opt.runner_movements, games=opt.batch)
+        print(f"Wave {opt.wave}: {batch.benchmark():.0f} batched ticks per second over {opt.batch} games.")
+
+    if opt.mode == "benchmark" and opt.batch == 0:
+        from simulation import Simulator
+        from simulation.ai import Healer
+        simulator = Simulator(opt.wave - 1, opt.runner_movements, {"h": Healer}, opt.seed)
+        print(f"Wave {opt.wave}: {simulator.benchmark(opt.runs):.0f} ticks per second over {opt.runs} runs.")
+
+    if opt.mode == "evaluate":
+        from simulation.ai import Healer
+        from simulation.monte_carlo import MonteCarlo
+        monte_carlo = MonteCarlo(
+            opt.wave - 1, opt.runner_movements, {"h": Healer}, opt.runs, opt.seed or 0, opt.workers
+        )
+        print(f"Wave {opt.wave}:\n{monte_carlo()}")
+
     if opt.mode == "play":
         import play
         try:
@@ -0,0 +1,689 @@
+from itertools import accumulate, chain, compress, count
+from operator import is_not, ne
+from struct import Struct, error as StructError
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .emit import ATTRIBUTES
+
+# A compact binary encoding of game_state messages, for clients that ask for it (see the set_encoding action). The
+# decoder is static/binary.js, and both have to agree on everything below. The client decodes every message into the
+# same {"frame": n, "game": state} that the JSON keyframe of that state would parse to.
+#
+# Every state is packed into a frame, a fixed layout of bytes (see FrameEncoder.pack). A tile, a coordinate or a flag
+# always lands on the same bytes from one frame to the next, unless a list grows or shrinks before it. Messages are:
+# - Keyframes: a uint8 KEYFRAME, the uint32 frame number, then the whole frame.
+# - Deltas: a uint8 DELTA, the uint32 frame number (the base is the frame right before it), the length of the frame as
+#   a varint, and then the runs of bytes that changed since the base frame. Every run is the varint count of bytes
+#   that did not change before it, the varint length of the run shifted left by one, and its bytes. A run that grows
+#   or shrinks the frame (a record that got longer, or a list that gained one) sets the low bit of its length, and has
+#   the zigzag varint of how many bytes of the base frame it replaces, minus its own length, right before its bytes.
+#   Bytes that did not change are copied from the base frame, from where the last run ended plus the sum of those.
+#   Unsigned varints carry 7 bits per byte, low bits first, and set the high bit of every byte but the last. Zigzag
+#   varints are 2 * x for x >= 0, and -2 * x - 1 otherwise.
+# A tick where two runners take a step changes a handful of bytes in the map and in their records, which is all that
+# is sent for it.
+#
+# Locatables are packed into records, by a packer compiled per set of keys they have (see compile_packer):
+# - A uint32 mask of the ATTRIBUTES the record has, the uint32 uuid, and the uint8 x and y of the location.
+# - Then the fixed size part of every attribute in the mask, in the order of ATTRIBUTES (see TYPES).
+# - Then the class name, and the variable size part of every attribute in the mask, in that same order.
+# Records with values their packer can not pack (a None, or a number out of range) fall back to the mask GENERIC,
+# followed by the record as a tagged value.
+#
+# Everything that is not a record or a map is a tagged value, which starts with a one byte tag. Numbers are little
+# endian.
+# - NONE, FALSE, TRUE: nothing follows.
+# - INT8, INT16, INT32, FLOAT64: the number.
+# - STR: a uint16 byte length, then UTF-8.
+# - LIST: a uint16 count, then the values.
+# - BYTES: a uint8 count, then one byte per value. Used for lists of small non negative ints, like locations.
+# - MAP: uint8 rows and columns, then one Latin-1 byte per tile. Used for lists of equal length rows.
+# - DICT: a uint16 count, then per entry, a uint8 field id from FIELDS (or STRING_KEY followed by the key as STR
+#   without its tag) and the value.
+
+KEYFRAME, DELTA = range(2)
+NONE, FALSE, TRUE, INT8, INT16, INT32, FLOAT64, STR, LIST, BYTES, MAP, DICT = range(12)
+STRING_KEY = 255
+
+# Field ids are indices into FIELDS.
+FIELDS: List[str] = ["uuid", "location", "_", *ATTRIBUTES]
+FIELD_IDS: Dict[str, int] = {field: i for i, field in enumerate(FIELDS)}
+assert len(FIELDS) < STRING_KEY, "Too many fields for uint8 field ids."
+
+# How record attributes are packed. Fixed size parts are packed along with the uuid and location, and variable size
+# parts follow the class name.
+# - BOOL: a uint8, 0 or 1.
+# - INT: an int16.
+# - XY: uint8 x and y, for coordinates sent as [x, y].
+# - TEXT: a uint8 byte length, and UTF-8 in the variable part.
+# - TEXTS: a uint8 count and a uint8 byte length, and the strings joined by NUL bytes as UTF-8 in the variable part.
+# - INTS: a uint8 count, and an int16 per value in the variable part.
+# - ANY: nothing in the fixed part, and a tagged value in the variable part.
+BOOL, INT, XY, TEXT, TEXTS, INTS, ANY = "BOOL", "INT", "XY", "TEXT", "TEXTS", "INTS", "ANY"
+TYPES: Dict[str, str] = {
+    "inventory": TEXTS,
+    "calls_with": TEXT,
+    "destination": XY,
+    "followee": TEXT,
+    "follow_type": INTS,
+    "follow_allow_under": BOOL,
+    "is_running": BOOL,
+    "followee_last_found": XY,
+    "CALL_COUNT": INT,
+    "INVENTORY_SPACE": INT,
+    "correct_call": INT,
+    "required_call": INT,
+    "received_call": INT,
+    "sent_call": INT,
+    "name": TEXT,
+    "spec_restore_i": INT,
+    "spec": INT,
+    "gear_bonus": INTS,
+    "is_stalling": BOOL,
+    "stall_queue": ANY,
+    "access_letter": TEXT,
+    "which": INT,
+    "is_correct": BOOL,
+    "charges": INT,
+}
+# Attributes added to ATTRIBUTES without a type here are sent as tagged values.
+ATTRIBUTE_TYPES: List[str] = [TYPES.get(attr, ANY) for attr in ATTRIBUTES]
+FORMATS: Dict[str, str] = {BOOL: "B", INT: "h", XY: "BB", TEXT: "B", TEXTS: "BB", INTS: "B", ANY: ""}
+GENERIC = 0xffffffff
+assert len(ATTRIBUTES) < 32, "Too many attributes for uint32 masks."
+
+U8 = Struct("<B")
+U16 = Struct("<H")
+U32 = Struct("<I")
+MESSAGE = Struct("<BI")
+RECORD = Struct("<IIBBB")  # The mask, uuid, location and class name length of a record.
+TAGGED = {
+    INT8: Struct("<Bb"),
+    INT16: Struct("<Bh"),
+    INT32: Struct("<Bi"),
+    FLOAT64: Struct("<Bd"),
+}
+CONSTANTS = {None: bytes((NONE,)), False: bytes((FALSE,)), True: bytes((TRUE,))}
+
+# Pieces that stay the very same bytes from frame to frame (see FrameEncoder).
+COUNTS: List[bytes] = [U8.pack(n) for n in range(0x100)]
+COUNTS_U16: List[bytes] = [U16.pack(n) for n in range(0x100)]
+UVARINTS: List[bytes] = [bytes((n,)) for n in range(0x80)]
+KEY_PIECES: Dict[str, bytes] = {}
+
+# Every dict key seen so far, already encoded. Keys not in FIELDS are few (player roles), so this stays small.
+KEYS: Dict[str, bytes] = {field: bytes((field_id,)) for field, field_id in FIELD_IDS.items()}
+
+
+def encode(x: Any) -> bytes:
+    # A single tagged value.
+    parts = []
+    encode_into(x, parts)
+    return b"".join(parts)
+
+
+def encode_into(x: Any, parts: List[bytes]) -> None:
+    ENCODERS[type(x)](x, parts)
+
+
+def encode_constant(x: Any, parts: List[bytes]) -> None:
+    parts.append(CONSTANTS[x])
+
+
+def encode_int(x: int, parts: List[bytes]) -> None:
+    if -0x80 <= x < 0x80:
+        parts.append(TAGGED[INT8].pack(INT8, x))
+    elif -0x8000 <= x < 0x8000:
+        parts.append(TAGGED[INT16].pack(INT16, x))
+    elif -0x80000000 <= x < 0x80000000:
+        parts.append(TAGGED[INT32].pack(INT32, x))
+    else:
+        parts.append(TAGGED[FLOAT64].pack(FLOAT64, x))
+
+
+def encode_float(x: float, parts: List[bytes]) -> None:
+    parts.append(TAGGED[FLOAT64].pack(FLOAT64, x))
+
+
+def encode_str(x: str, parts: List[bytes]) -> None:
+    data = x.encode("utf-8")
+    parts.append(bytes((STR,)) + U16.pack(len(data)) + data)
+
+
+def encode_dict(x: dict, parts: List[bytes]) -> None:
+    parts.append(bytes((DICT,)) + U16.pack(len(x)))
+    for key, value in x.items():
+        encoded_key = KEYS.get(key)
+        if encoded_key is None:
+            data = key.encode("utf-8")
+            encoded_key = KEYS[key] = bytes((STRING_KEY,)) + U16.pack(len(data)) + data
+        parts.append(encoded_key)
+        ENCODERS[type(value)](value, parts)
+
+
+def encode_list(x: Union[list, tuple], parts: List[bytes]) -> None:
+    if 0 < len(x) < 0x100 and all(type(v) is int and 0 <= v < 0x100 for v in x):
+        parts.append(bytes((BYTES, len(x))) + bytes(x))
+    elif is_map(x):
+        parts.append(bytes((MAP, len(x), len(x[0]))) + "".join(x).encode("latin-1"))
+    else:
+        parts.append(bytes((LIST,)) + U16.pack(len(x)))
+        for value in x:
+            ENCODERS[type(value)](value, parts)
+
+
+ENCODERS: Dict[type, Callable[[Any, List[bytes]], None]] = {
+    type(None): encode_constant,
+    bool: encode_constant,
+    int: encode_int,
+    float: encode_float,
+    str: encode_str,
+    dict: encode_dict,
+    list: encode_list,
+    tuple: encode_list,
+}
+
+
+def is_map(x: Union[list, tuple]) -> bool:
+    if not 1 < len(x) < 0x100 or type(x[0]) is not str or not 0 < len(x[0]) < 0x100:
+        return False
+    columns = len(x[0])
+    return all(type(row) is str and len(row) == columns and (row.isascii() or is_latin1(row)) for row in x)
+
+
+def is_latin1(row: str) -> bool:
+    return all(ord(c) <= 0xff for c in row)
+
+
+def encode_uvarint(x: int) -> bytes:
+    if x < 0x80:
+        return UVARINTS[x]
+    if x < 0x4000:
+        return bytes((x & 0x7f | 0x80, x >> 7))
+    rv = bytearray()
+    while x >= 0x80:
+        rv.append(x & 0x7f | 0x80)
+        x >>= 7
+    rv.append(x)
+    return bytes(rv)
+
+
+def encode_zigzag(x: int) -> bytes:
+    return encode_uvarint(x << 1 if x >= 0 else ~x << 1 | 1)
+
+
+def pack_generic(x: Dict) -> bytes:
+    return U32.pack(GENERIC) + encode(x)
+
+
+def compile_packer(keys: Tuple[str, ...]) -> Callable[[Dict], bytes]:
+    # Generates the packer of the records with these keys, in this order. Records of the serializers in play/emit.py
+    # start with uuid, location and class name, and then have some of ATTRIBUTES in order. Others are sent generic.
+    if keys[:3] != ("uuid", "location", "_") or any(key not in TYPES and key not in ATTRIBUTES for key in keys[3:]):
+        return pack_generic
+    indices = [ATTRIBUTES.index(key) for key in keys[3:]]
+    if indices != sorted(indices):
+        return pack_generic
+
+    fixed = ["x['uuid']", "*x['location']", "len(_class)"]
+    variable = ["_class"]
+    lines = ["def packer(x):", "    _class = x['_'].encode('utf-8')"]
+    for i in indices:
+        attr, kind = ATTRIBUTES[i], ATTRIBUTE_TYPES[i]
+        if kind in (BOOL, INT):
+            fixed.append(f"x[{attr!r}]")
+        elif kind == XY:
+            fixed.append(f"*x[{attr!r}]")
+        elif kind == TEXT:
+            lines.append(f"    _{i} = x[{attr!r}].encode('utf-8')")
+            fixed.append(f"len(_{i})")
+            variable.append(f"_{i}")
+        elif kind == TEXTS:
+            lines.append(f"    _{i} = x[{attr!r}]")
+            lines.append(f"    _{i}_joined = '\\x00'.join(_{i}).encode('utf-8')")
+            fixed.extend((f"len(_{i})", f"len(_{i}_joined)"))
+            variable.append(f"_{i}_joined")
+        elif kind == INTS:
+            lines.append(f"    _{i} = x[{attr!r}]")
+            fixed.append(f"len(_{i})")
+            variable.append(f"pack_ints(_{i})")
+        else:
+            lines.append(f"    _{i} = x[{attr!r}]")
+            variable.append(f"NONE_PIECE if _{i} is None else encode(_{i})")
+
+    mask = sum(1 << i for i in indices)
+    namespace = {
+        "FIXED": Struct(RECORD.format + "".join(FORMATS[ATTRIBUTE_TYPES[i]] for i in indices)),
+        "encode": encode,
+        "pack_ints": pack_ints,
+        "NONE_PIECE": CONSTANTS[None],
+    }
+    lines.append(f"    return b''.join((FIXED.pack({mask}, {', '.join(fixed)}), {', '.join(variable)}))")
+    exec("\n".join(lines), namespace)
+    return namespace["packer"]
+
+
+def pack_ints(x: Union[List[int], Tuple[int, ...]]) -> bytes:
+    packer = INTS_STRUCTS.get(len(x))
+    if packer is None:
+        packer = INTS_STRUCTS[len(x)] = Struct(f"<{len(x)}h")
+    return packer.pack(*x)
+
+
+INTS_STRUCTS: Dict[int, Struct] = {}
+
+
+PACKERS: Dict[Tuple[str, ...], Callable[[Dict], bytes]] = {}
+
+
+class FrameEncoder:
+    # Turns the game state a room emits every tick into binary game_state messages, numbered by frame like
+    # DeltaEncoder does for JSON (and with the same keyframe rules). It packs the state itself, so that a room with
+    # only binary clients never diffs states as dicts.
+    #
+    # A frame is packed as a list of sections (see FrameEncoder.pack), and every section as a list of pieces: map rows,
+    # records, keys and counts. A section that did not change since the last frame is the very same list as in it,
+    # and a piece that did not change is the very same bytes, so only what changed is ever compared byte by byte.
+    KEYFRAME_INTERVAL: int = 100
+
+    def __init__(self, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.keyframe_interval: int = keyframe_interval
+        # Replaced as a whole, so that a resync on another thread always reads a frame along with its own number.
+        self.last: Optional[Tuple[int, List[List[bytes]]]] = None
+        self.cached_keyframe: Optional[Tuple[int, bytes]] = None
+        self.lengths: List[int] = []  # The byte length of every section of the last frame.
+        self.offsets: List[Optional[List[int]]] = []  # Where the pieces of every section of the last frame start.
+        self.sections: Dict[str, Tuple[Any, List[bytes]]] = {}  # Maps from sections to their last value and pieces.
+        # Maps from uuids to their last record, and its piece. Records are moved to old_records on every keyframe, and
+        # only come back if they are packed again before the next one, which forgets dead Locatables.
+        self.records: Dict[Any, Tuple[Dict, bytes]] = {}
+        self.old_records: Dict[Any, Tuple[Dict, bytes]] = {}
+
+    def __call__(self, state: Dict) -> bytes:
+        sections = self.pack(state)
+        if self.last is None or (self.last[0] + 1) % self.keyframe_interval == 0:
+            self.last = (0 if self.last is None else self.last[0] + 1, sections)
+            self.lengths = [sum(map(len, section)) for section in sections]
+            self.offsets = [None] * len(sections)
+            self.old_records, self.records = self.records, {}
+            return self.keyframe()
+
+        frame, last_sections = self.last
+        self.last = (frame + 1, sections)
+        runs = self.diff(sections, last_sections)
+        return b"".join((MESSAGE.pack(DELTA, frame + 1), encode_uvarint(sum(self.lengths)), runs))
+
+    def keyframe(self) -> Optional[bytes]:
+        # None until the first state is encoded. Encoded once per frame, no matter how many clients resync on it.
+        last = self.last
+        if last is None:
+            return None
+        cached = self.cached_keyframe
+        if cached is None or cached[0] != last[0]:
+            cached = self.cached_keyframe = (last[0], b"".join(chain((MESSAGE.pack(KEYFRAME, last[0]),), *last[1])))
+        return cached[1]
+
+    def diff(self, sections: List[List[bytes]], last_sections: List[List[bytes]]) -> bytes:
+        # The runs of a delta from the last frame to this one (see the module comments). Pieces that kept their length
+        # send the bytes from the first to the last byte that changed. Pieces that changed their length, and pieces a
+        # section gained, are sent whole, and move the bytes after them. The offsets of the pieces in a section are
+        # only worked out again when any of them changed its length.
+        parts = []
+        append = parts.append
+        from_bytes = int.from_bytes
+        offset, end = 0, 0
+        for n, (section, last_section) in enumerate(zip(sections, last_sections)):
+            if section is last_section:
+                offset += self.lengths[n]
+                continue
+
+            offsets = self.offsets[n]
+            if offsets is None or len(section) != len(last_section):
+                offsets = self.offsets[n] = list(accumulate(map(len, section), initial=0))
+            for i in compress(count(), map(is_not, section, last_section)):
+                piece = section[i]
+                last_piece = last_section[i]
+                if len(piece) == len(last_piece):
+                    bits = from_bytes(piece, "little") ^ from_bytes(last_piece, "little")
+                    if not bits:
+                        continue
+                    first = ((bits & -bits).bit_length() - 1) >> 3
+                    stop = (bits.bit_length() + 7) >> 3
+                    start = offset + offsets[i]
+                    append(encode_uvarint(start + first - end) + encode_uvarint(stop - first << 1) + piece[first:stop])
+                    end = start + stop
+                else:
+                    if offsets[i + 1] - offsets[i] != len(piece):  # The pieces after this one moved.
+                        offsets = self.offsets[n] = list(accumulate(map(len, section), initial=0))
+                    append(encode_uvarint(offset + offsets[i] - end))
+                    append(encode_uvarint(len(piece) << 1 | 1))
+                    append(encode_zigzag(len(last_piece) - len(piece)))
+                    append(piece)
+                    end = offset + offsets[i + 1]
+
+            if len(section) != len(last_section):
+                start = offset + offsets[min(len(section), len(last_section))]
+                gained = b"".join(section[len(last_section):])
+                lost = sum(map(len, last_section[len(section):]))
+                append(encode_uvarint(start - end))
+                append(encode_uvarint(len(gained) << 1 | 1))
+                append(encode_zigzag(lost - len(gained)))
+                append(gained)
+                end = start + len(gained)
+            self.lengths[n] = offsets[-1]
+            offset += offsets[-1]
+        return b"".join(parts)
+
+    def pack(self, state: Dict) -> List[List[bytes]]:
+        # The sections of a frame are self_map, original_map, players, game_objects, dropped_food, dispensers,
+        # dropped_eggs, dropped_hnls, penance, then correct_calls, start_tick, calls, number and end_flag as tagged
+        # values, and last tick, relative_tick and text as tagged values. Maps are uint8 rows and columns, then one
+        # Latin-1 byte per tile. Records come in dicts (a uint8 count, then per entry a uint8 byte length, the UTF-8
+        # key, and a record) and in lists (a uint16 count, then the records), and penance is a dict of lists.
+        wave = state["wave"]
+        header = []
+        for value in (state["tick"], wave["relative_tick"], state["text"]):
+            ENCODERS[type(value)](value, header)
+
+        # The objects of a wave seldom change, so they are compared all at once before any of them is on its own.
+        objects = (
+            wave["game_objects"], wave["dropped_food"], wave["dispensers"], wave["dropped_eggs"], wave["dropped_hnls"]
+        )
+        last = self.sections.get("objects")
+        if last is None or last[0] != objects:
+            last = self.sections["objects"] = (objects, [
+                self.pack_section("game_objects", objects[0], self.pack_dict),
+                self.pack_section("dropped_food", objects[1], self.pack_list),
+                self.pack_section("dispensers", objects[2], self.pack_dict),
+                self.pack_section("dropped_eggs", objects[3], self.pack_list),
+                self.pack_section("dropped_hnls", objects[4], self.pack_list),
+            ])
+
+        return [
+            self.pack_map("self_map", state["self_map"]),
+            self.pack_map("original_map", state["original_map"]),
+            self.pack_section("players", state["players"], self.pack_dict),
+            *last[1],
+            self.pack_dict(wave["penance"], [], self.pack_list),
+            self.pack_section(
+                "wave",
+                (wave["correct_calls"], wave["start_tick"], wave["calls"], wave["number"], wave["end_flag"]),
+                lambda x, pieces: [ENCODERS[type(value)](value, pieces) for value in x],
+            ),
+            [b"".join(header)],
+        ]
+
+    def pack_section(self, name: str, x: Any, pack: Callable[[Any, List[bytes]], Any]) -> List[bytes]:
+        last = self.sections.get(name)
+        if last is None or last[0] != x:
+            last = self.sections[name] = (x, [])
+            pack(x, last[1])
+        return last[1]
+
+    def pack_map(self, name: str, x: List[str]) -> List[bytes]:
+        # Rows that did not change keep their pieces.
+        if not 0 < len(x) < 0x100 or not 0 < len(x[0]) < 0x100:
+            raise ValueError("Maps need 1 to 255 rows and columns.")
+        columns = len(x[0])
+        last = self.sections.get(name)
+        if last is not None and last[0] == x:
+            return last[1]
+        if last is not None and len(last[0]) == len(x) and len(last[0][0]) == columns:
+            changed = compress(count(), map(ne, x, last[0]))
+            pieces = list(last[1])
+        else:
+            changed = range(len(x))
+            pieces = [bytes((len(x), columns))] + [b""] * len(x)
+        for i in changed:
+            pieces[i + 1] = x[i].encode("latin-1")
+            if len(pieces[i + 1]) != columns:
+                raise ValueError("Maps need rows of equal length.")
+        self.sections[name] = (x, pieces)
+        return pieces
+
+    def pack_dict(self, x: Dict, pieces: List[bytes],
+                  pack: Optional[Callable[[Any, List[bytes]], Any]] = None) -> List[bytes]:
+        # Records are looked up here rather than in pack_record, which only packs the ones that changed. Most do not.
+        append, records = pieces.append, self.records
+        append(COUNTS[len(x)])
+        for key, value in x.items():
+            piece = KEY_PIECES.get(key)
+            if piece is None:
+                data = key.encode("utf-8")
+                piece = KEY_PIECES[key] = U8.pack(len(data)) + data
+            append(piece)
+            if pack is not None:
+                pack(value, pieces)
+                continue
+            last = records.get(value["uuid"])
+            append(last[1] if last is not None and last[0] == value else self.pack_record(value))
+        return pieces
+
+    def pack_list(self, x: List, pieces: List[bytes]) -> List[bytes]:
+        append, records = pieces.append, self.records
+        append(COUNTS_U16[len(x)] if len(x) < len(COUNTS_U16) else U16.pack(len(x)))
+        for value in x:
+            last = records.get(value["uuid"])
+            append(last[1] if last is not None and last[0] == value else self.pack_record(value))
+        return pieces
+
+    def pack_record(self, x: Dict) -> bytes:
+        last = self.old_records.pop(x["uuid"], None)
+        if last is not None and last[0] == x:
+            self.records[x["uuid"]] = last
+            return last[1]
+        keys = tuple(x)
+        packer = PACKERS.get(keys)
+        if packer is None:
+            packer = PACKERS[keys] = compile_packer(keys)
+        try:
+            data = packer(x)
+        except (StructError, TypeError, AttributeError):  # Values the packer does not expect, like a None.
+            data = pack_generic(x)
+        self.records[x["uuid"]] = (x, data)
+        return data
+
+
+def decode(data: bytes) -> Any:
+    # The inverse of encode, as JSON would round trip it (tuples come back as lists).
+    value, _ = decode_from(memoryview(data), 0)
+    return value
+
+
+def decode_from(data: memoryview, i: int) -> Any:
+    tag = data[i]
+    i += 1
+    if tag == NONE:
+        return None, i
+    if tag == FALSE:
+        return False, i
+    if tag == TRUE:
+        return True, i
+    if tag in TAGGED:
+        return TAGGED[tag].unpack_from(data, i - 1)[1], i + TAGGED[tag].size - 1
+    if tag == STR:
+        length = U16.unpack_from(data, i)[0]
+        return bytes(data[i + 2:i + 2 + length]).decode("utf-8"), i + 2 + length
+    if tag == LIST:
+        count = U16.unpack_from(data, i)[0]
+        i += 2
+        rv = []
+        for _ in range(count):
+            value, i = decode_from(data, i)
+            rv.append(value)
+        return rv, i
+    if tag == BYTES:
+        count = data[i]
+        return list(data[i + 1:i + 1 + count]), i + 1 + count
+    if tag == MAP:
+        return decode_map(data, i)
+    if tag == DICT:
+        count = U16.unpack_from(data, i)[0]
+        i += 2
+        rv = {}
+        for _ in range(count):
+            field_id = data[i]
+            i += 1
+            if field_id == STRING_KEY:
+                length = U16.unpack_from(data, i)[0]
+                key = bytes(data[i + 2:i + 2 + length]).decode("utf-8")
+                i += 2 + length
+            else:
+                key = FIELDS[field_id]
+            rv[key], i = decode_from(data, i)
+        return rv, i
+    raise ValueError(f"Unknown binary tag {tag}.")
+
+
+def decode_map(data: memoryview, i: int) -> Tuple[List[str], int]:
+    rows, columns = data[i], data[i + 1]
+    i += 2
+    text = bytes(data[i:i + rows * columns]).decode("latin-1")
+    return [text[row * columns:(row + 1) * columns] for row in range(rows)], i + rows * columns
+
+
+def decode_uvarint(data: memoryview, i: int) -> Tuple[int, int]:
+    rv, shift = 0, 0
+    while data[i] & 0x80:
+        rv |= (data[i] & 0x7f) << shift
+        shift += 7
+        i += 1
+    return rv | data[i] << shift, i + 1
+
+
+class FrameDecoder:
+    # The inverse of FrameEncoder, as JSON would round trip it. Clients use static/binary.js, which does the same. A
+    # delta that does not apply on top of the last frame decodes to {"frame": n, "base": n - 1}, and the client
+    # resyncs, like it does for JSON deltas.
+    def __init__(self):
+        self.last: Optional[Tuple[int, bytes]] = None
+
+    def __call__(self, message: bytes) -> Dict:
+        message = memoryview(message)
+        kind, frame = MESSAGE.unpack_from(message, 0)
+        if kind == KEYFRAME:
+            data = bytes(message[MESSAGE.size:])
+        else:
+            if self.last is None or self.last[0] != frame - 1:
+                return {"frame": frame, "base": frame - 1}
+            size, i = decode_uvarint(message, MESSAGE.size)
+            last = self.last[1]
+            data = bytearray(size)
+            end, moved = 0, 0  # Bytes that did not change are at end + moved in the last frame.
+            while i < len(message):
+                skip, i = decode_uvarint(message, i)
+                data[end:end + skip] = last[end + moved:end + moved + skip]
+                end += skip
+                length, i = decode_uvarint(message, i)
+                if length & 1:
+                    zigzag, i = decode_uvarint(message, i)
+                    moved += ~(zigzag >> 1) if zigzag & 1 else zigzag >> 1
+                length >>= 1
+                data[end:end + length] = message[i:i + length]
+                end += length
+                i += length
+            rest = last[end + moved:end + moved + size - end]
+            data[end:end + len(rest)] = rest
+            data = bytes(data)
+        self.last = (frame, data)
+        return {"frame": frame, "game": unpack(memoryview(data))}
+
+
+def unpack(data: memoryview) -> Dict:
+    # The state of a frame (see FrameEncoder.pack).
+    self_map, i = decode_map(data, 0)
+    original_map, i = decode_map(data, i)
+    players, i = unpack_dict(data, i, unpack_record)
+    game_objects, i = unpack_dict(data, i, unpack_record)
+    dropped_food, i = unpack_list(data, i)
+    dispensers, i = unpack_dict(data, i, unpack_record)
+    dropped_eggs, i = unpack_list(data, i)
+    dropped_hnls, i = unpack_list(data, i)
+    penance, i = unpack_dict(data, i, unpack_list)
+    values = []
+    for _ in range(8):
+        value, i = decode_from(data, i)
+        values.append(value)
+    correct_calls, start_tick, calls, number, end_flag, tick, relative_tick, text = values
+    return {
+        "tick": tick,
+        "text": text,
+        "players": players,
+        "self_map": self_map,
+        "original_map": original_map,
+        "wave": {
+            "correct_calls": correct_calls,
+            "start_tick": start_tick,
+            "relative_tick": relative_tick,
+            "calls": calls,
+            "number": number,
+            "end_flag": end_flag,
+            "game_objects": game_objects,
+            "dropped_food": dropped_food,
+            "dispensers": dispensers,
+            "dropped_eggs": dropped_eggs,
+            "dropped_hnls": dropped_hnls,
+            "penance": penance,
+        },
+    }
+
+
+def unpack_dict(data: memoryview, i: int,
+                unpack_value: Callable[[memoryview, int], Tuple[Any, int]]) -> Tuple[Dict, int]:
+    count = data[i]
+    i += 1
+    rv = {}
+    for _ in range(count):
+        length = data[i]
+        key = bytes(data[i + 1:i + 1 + length]).decode("utf-8")
+        rv[key], i = unpack_value(data, i + 1 + length)
+    return rv, i
+
+
+def unpack_list(data: memoryview, i: int) -> Tuple[List, int]:
+    count = U16.unpack_from(data, i)[0]
+    i += 2
+    rv = []
+    for _ in range(count):
+        value, i = unpack_record(data, i)
+        rv.append(value)
+    return rv, i
+
+
+def unpack_record(data: memoryview, i: int) -> Tuple[Dict, int]:
+    if U32.unpack_from(data, i)[0] == GENERIC:
+        return decode_from(data, i + U32.size)
+    mask, uuid, x, y, class_length = RECORD.unpack_from(data, i)
+    i += RECORD.size
+    indices = [j for j in range(len(ATTRIBUTES)) if mask >> j & 1]
+    fixed = {}
+    for j in indices:
+        kind = ATTRIBUTE_TYPES[j]
+        if kind == ANY:
+            continue
+        fixed[j] = Struct("<" + FORMATS[kind]).unpack_from(data, i)
+        i += Struct("<" + FORMATS[kind]).size
+
+    rv = {"uuid": uuid, "location": [x, y], "_": bytes(data[i:i + class_length]).decode("utf-8")}
+    i += class_length
+    for j in indices:
+        kind = ATTRIBUTE_TYPES[j]
+        if kind == BOOL:
+            rv[ATTRIBUTES[j]] = fixed[j][0] != 0
+        elif kind == INT:
+            rv[ATTRIBUTES[j]] = fixed[j][0]
+        elif kind == XY:
+            rv[ATTRIBUTES[j]] = list(fixed[j])
+        elif kind == TEXT:
+            rv[ATTRIBUTES[j]] = bytes(data[i:i + fixed[j][0]]).decode("utf-8")
+            i += fixed[j][0]
+        elif kind == TEXTS:
+            count, length = fixed[j]
+            rv[ATTRIBUTES[j]] = bytes(data[i:i + length]).decode("utf-8").split("\x00") if count > 0 else []
+            i += length
+        elif kind == INTS:
+            rv[ATTRIBUTES[j]] = list(Struct(f"<{fixed[j][0]}h").unpack_from(data, i))
+            i += 2 * fixed[j][0]
+        else:
+            rv[ATTRIBUTES[j]], i = decode_from(data, i)
+    return rv, i
@@ -0,0 +1,182 @@
+import json
+import traceback
+from collections import deque
+from threading import Condition, Thread
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+
+from flask_socketio import SocketIO
+
+from log import debug
+from . import binary
+from .delta import DeltaEncoder
+
+class JsonEncoder:
+    # DeltaEncoder, with its messages as JSON. Like FrameEncoder, keyframe gives the latest keyframe, encoded once per
+    # frame no matter how many clients resync on it.
+    def __init__(self):
+        self.encoder: DeltaEncoder = DeltaEncoder()
+        self.cached_keyframe: Optional[Tuple[int, str]] = None
+
+    def __call__(self, state: Dict) -> str:
+        message = self.encoder(state)
+        payload = json.dumps(message)
+        if "game" in message:
+            self.cached_keyframe = (message["frame"], payload)
+        return payload
+
+    def keyframe(self) -> Optional[str]:
+        keyframe = self.encoder.keyframe()
+        if keyframe is None:
+            return None
+        cached = self.cached_keyframe
+        if cached is None or cached[0] != keyframe["frame"]:
+            cached = self.cached_keyframe = (keyframe["frame"], json.dumps(keyframe))
+        return cached[1]
+
+
+# The views a client can get game states in, as the event they are sent as, and the encoder of their messages. Every
+# view numbers its own frames, and every client of a room that gets the same view gets the very same payload.
+VIEWS: Dict[str, Tuple[str, Callable[[], Callable[[Dict], Any]]]] = {
+    "json": ("game_state", JsonEncoder),
+    "binary": ("game_state_binary", binary.FrameEncoder),
+}
+
+
+def view_room(room_id: str, view: str) -> str:
+    # The socketio room of the clients of a room that get a view. JSON clients are in the room itself.
+    return room_id if view == "json" else f"{room_id}/{view}"
+
+
+class Channel:
+    # The game_state messages of a single room, and the clients that get them.
+    def __init__(self, room_id: str):
+        self.room_id: str = room_id
+        self.pending: Optional[Dict] = None  # The latest state of the room, if it was not sent yet.
+        self.viewers: Dict[str, str] = {}  # Maps from request.sid client ids to their view.
+        # Maps from the views in use to their encoder. A view only encodes states while it has clients, and starts
+        # over with a keyframe once it has some again.
+        self.encoders: Dict[str, Any] = {}
+
+    def views(self) -> Set[str]:
+        return set(self.viewers.values())
+
+    def keyframe(self, view: str) -> Optional[Any]:
+        # The payload of the latest keyframe of a view, if the view sent anything yet.
+        encoder = self.encoders.get(view)
+        return encoder.keyframe() if encoder is not None else None
+
+
+class Broadcaster:
+    # Sends the game states rooms publish to their clients, on its own thread. All a tick pays for is building the
+    # state (see Broadcaster.publish). Delta encoding, encoding every view in use once, and writing it to every socket
+    # happen here, so a room with many spectators does not slow down its own ticks, or those of other rooms.
+    #
+    # A room has at most one pending state. If a room publishes again before its last state was sent (a fast forwarded
+    # room, or too many clients to write to), the newer state replaces it, and the deltas skip the older one. Clients
+    # still get consecutive frames, so they do not need to resync, and only the text of the replaced state is kept.
+    def __init__(self, server: SocketIO):
+        self.server: SocketIO = server
+        self.channels: Dict[str, Channel] = {}
+        self.dirty: Deque[str] = deque()  # Rooms with a pending state, in the order they published it.
+        self.condition: Condition = Condition()  # Guards channels, dirty, and pending states.
+        self.thread: Optional[Thread] = None
+        self.is_running: bool = False
+
+        self.sent: int = 0  # States sent so far.
+        self.coalesced: int = 0  # States replaced before they were sent.
+
+    def channel(self, room_id: str) -> Channel:
+        # Should be called while holding the condition.
+        if room_id not in self.channels:
+            self.channels[room_id] = Channel(room_id)
+        return self.channels[room_id]
+
+    def publish(self, room_id: str, state: Dict) -> None:
+        with self.condition:
+            channel = self.channel(room_id)
+            if channel.pending is not None:
+                state["text"] = channel.pending["text"] + state["text"]
+                self.coalesced += 1
+            else:
+                self.dirty.append(room_id)
+            channel.pending = state
+            self.condition.notify()
+        self.start()
+
+    def subscribe(self, room_id: str, client_id: str, view: str = "json") -> None:
+        # Also switches the view of a client that is already subscribed.
+        assert view in VIEWS, f"The view {view} does not exist."
+        with self.condition:
+            channel = self.channel(room_id)
+            old_view = channel.viewers.get(client_id)
+            channel.viewers[client_id] = view
+        self.server.server.enter_room(client_id, view_room(room_id, view), namespace="/")
+        if old_view is not None and old_view != view:
+            self.server.server.leave_room(client_id, view_room(room_id, old_view), namespace="/")
+
+    def unsubscribe(self, room_id: str, client_id: str) -> None:
+        with self.condition:
+            view = self.channels[room_id].viewers.pop(client_id, None) if room_id in self.channels else None
+        if view is not None:
+            self.server.server.leave_room(client_id, view_room(room_id, view), namespace="/")
+
+    def close(self, room_id: str) -> None:
+        with self.condition:
+            self.channels.pop(room_id, None)
+
+    def resync(self, room_id: str, client_id: str) -> None:
+        # Sends the latest keyframe of a room to a single client, in its view, if the room has sent anything yet.
+        with self.condition:
+            channel = self.channels.get(room_id)
+            view = channel.viewers.get(client_id, "json") if channel is not None else None
+        payload = channel.keyframe(view) if channel is not None else None
+        if payload is not None:
+            self.server.emit(VIEWS[view][0], payload, to=client_id)
+
+    def start(self) -> None:
+        with self.condition:
+            if self.is_running:
+                return
+            self.is_running = True
+            self.thread = Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        with self.condition:
+            if not self.is_running:
+                return
+            self.is_running = False
+            self.condition.notify()
+        self.thread.join()
+        self.thread = None
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                while self.is_running and len(self.dirty) == 0:
+                    self.condition.wait()
+                if not self.is_running:
+                    return
+                channel = self.channels.get(self.dirty.popleft())
+                if channel is None:  # The room closed.
+                    continue
+                state, channel.pending = channel.pending, None
+                views = channel.views()
+
+            # A state that fails to encode or send (binary.FrameEncoder raises ValueError on maps it can not pack, for
+            # one) is dropped, and only for its own room. The thread keeps sending every other room.
+            try:
+                self.send(channel, state, views)
+            except Exception as _:
+                debug("Broadcaster.run", "Encountered an error sending a room.", room=channel.room_id)
+                traceback.print_exc()
+
+    def send(self, channel: Channel, state: Dict, views: Set[str]) -> None:
+        for view in set(channel.encoders) - views:
+            del channel.encoders[view]
+        for view in views:
+            event, encoder = VIEWS[view]
+            if view not in channel.encoders:
+                channel.encoders[view] = encoder()
+            self.server.emit(event, channel.encoders[view](state), to=view_room(channel.room_id, view))
+        self.sent += 1
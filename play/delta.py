@@ -0,0 +1,93 @@
+from typing import Any, Dict, Optional, Tuple
+
+# Delta encoding for game_state messages (see DeltaEncoder). The client side of this is patch in static/game.js, and
+# both have to agree on these rules:
+# - Two dicts diff into a dict of the keys whose values changed (as diffs themselves), plus DELETED, the list of keys
+#   that are gone.
+# - Two lists of the same length diff into {LIST: {index: diff}} for the indices that changed. self_map is a list of
+#   rows, and only the rows that units moved on change from one tick to the next.
+# - Anything else that changed is sent as is, and replaces the old value.
+
+DELETED = "-"
+LIST = "[]"
+UNCHANGED = object()
+
+
+def diff(old: Any, new: Any) -> Any:
+    # Returns UNCHANGED if old and new are equal.
+    if isinstance(old, dict) and isinstance(new, dict):
+        rv = {}
+        for key, value in new.items():
+            sub = diff(old[key], value) if key in old else value
+            if sub is not UNCHANGED:
+                rv[key] = sub
+        deleted = [key for key in old if key not in new]
+        if len(deleted) > 0:
+            rv[DELETED] = deleted
+        return rv if len(rv) > 0 else UNCHANGED
+
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        rv = {}
+        for i, (old_value, new_value) in enumerate(zip(old, new)):
+            sub = diff(old_value, new_value)
+            if sub is not UNCHANGED:
+                rv[str(i)] = sub
+        return {LIST: rv} if len(rv) > 0 else UNCHANGED
+
+    return UNCHANGED if old == new else new
+
+
+def patch(old: Any, delta: Any) -> Any:
+    # The inverse of diff: patch(old, diff(old, new)) == new. It does not modify old.
+    if isinstance(old, dict) and isinstance(delta, dict):
+        rv = {key: value for key, value in old.items() if key not in delta.get(DELETED, ())}
+        for key, value in delta.items():
+            if key != DELETED:
+                rv[key] = patch(rv[key], value) if key in rv else value
+        return rv
+
+    if isinstance(old, list) and isinstance(delta, dict) and LIST in delta:
+        rv = list(old)
+        for i, value in delta[LIST].items():
+            rv[int(i)] = patch(rv[int(i)], value)
+        return rv
+
+    return delta
+
+
+class DeltaEncoder:
+    # Turns the game state a room emits every tick into game_state messages. Every message is numbered by frame.
+    # Keyframes carry the whole state:
+    #     {"frame": n, "game": state}
+    # and every KEYFRAME_INTERVAL frames, a keyframe is sent anyway. The other frames only carry what changed since
+    # the frame before them:
+    #     {"frame": n, "base": n - 1, "delta": diff}
+    #
+    # Messages to a room arrive in order, so a client that has applied frame n - 1 can apply frame n. One that has not
+    # (it just joined, or missed a message) asks for a resync, and gets DeltaEncoder.keyframe sent to it alone.
+    KEYFRAME_INTERVAL: int = 100
+
+    def __init__(self, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.keyframe_interval: int = keyframe_interval
+        # Replaced as a whole, so that a resync on another thread always reads a state along with its own frame.
+        self.last: Optional[Tuple[int, Dict]] = None
+
+    def __call__(self, state: Dict) -> Dict:
+        if self.last is None:
+            self.last = (0, state)
+            return self.keyframe()
+
+        frame, last_state = self.last
+        self.last = (frame + 1, state)
+        if (frame + 1) % self.keyframe_interval == 0:
+            return self.keyframe()
+
+        delta = diff(last_state, state)
+        return {"frame": frame + 1, "base": frame, "delta": {} if delta is UNCHANGED else delta}
+
+    def keyframe(self) -> Optional[Dict]:
+        # None until the first state is encoded.
+        if self.last is None:
+            return None
+        frame, state = self.last
+        return {"frame": frame, "game": state}
@@ -1,86 +1,119 @@
-from typing import Dict, Callable, Union, Any
+from typing import Dict, Callable, Union, Any, List
 
 from simulation.base.terrain import C, Locatable, Inspectable
 
 
-def build_emittable_object_from(x: Union[Locatable, Inspectable]) -> Dict:
-    # TODO: Clean this up to only include transmittable stuff (inspects).
-    if isinstance(x, Locatable):
-        _dict = {
-            "uuid": x.uuid,
-            "location": (x.location.x, x.location.y),
-            "_": x.__class__.__name__,
-        }
+# Attributes sent for every Locatable, on top of uuid, location and class name, when the Locatable has them.
+ATTRIBUTES: List[str] = [
+    "inventory",
+    # "busy_i",
+    "calls_with",
+    "destination",
+    # "pathing_queue",
+    "followee",
+    "follow_type",
+    "follow_allow_under",
+    "is_running",
+    "followee_last_found",
+    "CALL_COUNT",
+    "INVENTORY_SPACE",
+    "correct_call",
+    "required_call",
+    "received_call",
+    "sent_call",
+    "name",
+    "spec_restore_i",
+    "spec",
+    "gear_bonus",
+    "is_stalling",
+    "stall_queue",
+    "access_letter",
+    "which",  # For food and eggs.
+    "is_correct",
+    "charges",  # For trap.
+]
 
-        attr_list = [
-            "inventory",
-            # "busy_i",
-            "calls_with",
-            "destination",
-            # "pathing_queue",
-            "followee",
-            "follow_type",
-            "follow_allow_under",
-            "is_running",
-            "followee_last_found",
-            "CALL_COUNT",
-            "INVENTORY_SPACE",
-            "correct_call",
-            "required_call",
-            "received_call",
-            "sent_call",
-            "name",
-            "spec_restore_i",
-            "spec",
-            "gear_bonus",
-            "is_stalling",
-            "stall_queue",
-            "access_letter",
-            "which",  # For food and eggs.
-            "is_correct",
-            "charges",  # For trap.
-        ]
-
-        for attr in attr_list:
-            try:
-                _attr: Union[Callable, Any] = x.__getattribute__(attr)
-            except AttributeError:
-                _attr = None
-            if _attr is not None:
-                if isinstance(_attr, list) and len(_attr) == 0:
-                    _attr = None  # Empty array, we don't know type yet.
 
-                if attr == "access_letter":
-                    _attr = _attr()
+def emittable_attribute(_attr: Any) -> Any:
+    if isinstance(_attr, list) and len(_attr) == 0:
+        return None  # Empty array, we don't know type yet.
 
-                if isinstance(_attr, list) and len(_attr) > 0 and isinstance(_attr[0], tuple):
-                    _attr = len(_attr)
+    if isinstance(_attr, list) and isinstance(_attr[0], tuple):
+        return len(_attr)
 
-                if isinstance(_attr, list) and len(_attr) > 0 and isinstance(_attr[0], C):
-                    _attr = [[c.x, c.y] for c in _attr]
+    if isinstance(_attr, list) and isinstance(_attr[0], C):
+        return [[c.x, c.y] for c in _attr]
 
-                if isinstance(_attr, C):
-                    _attr = [_attr.x, _attr.y]
+    if isinstance(_attr, C):
+        return [_attr.x, _attr.y]
 
-                if isinstance(_attr, Locatable):
-                    _attr = str(_attr.uuid)
+    if isinstance(_attr, Locatable):
+        return str(_attr.uuid)
 
-                _dict[attr] = _attr
+    if isinstance(_attr, list):
+        return list(_attr)  # A copy, since the state is encoded after the game moves on (like inventory changing).
 
-        return _dict
+    return _attr
+
+
+def compile_serializer(x: Locatable) -> Callable[[Locatable], Dict]:
+    # Generates the serializer of the class of x, after probing x once for every attribute in ATTRIBUTES. The
+    # serializer does not look up the attributes the class does not have, and inlines class constants (like
+    # CALL_COUNT, or access_letter, which gets called). The attributes that are left are read directly. Like before,
+    # attributes that are None are left out, and the rest keep the order of ATTRIBUTES.
+    cls = x.__class__
+    namespace = {"emittable_attribute": emittable_attribute}
+    lines = [
+        "def serializer(x):",
+        f"    _dict = {{'uuid': x.uuid, 'location': (x.location.x, x.location.y), '_': {cls.__name__!r}}}",
+    ]
+    for i, attr in enumerate(ATTRIBUTES):
+        try:
+            _attr = x.__getattribute__(attr)
+        except AttributeError:
+            continue
+
+        is_constant = attr not in x.__dict__ and not isinstance(getattr(cls, attr, None), property)
+        if is_constant and attr == "access_letter":
+            _attr = _attr()
+        if is_constant and not isinstance(_attr, (list, dict)):
+            if _attr is not None:
+                namespace[f"constant_{i}"] = emittable_attribute(_attr)
+                lines.append(f"    _dict[{attr!r}] = constant_{i}")
+            continue
+
+        lines.append(f"    _attr = x.{attr}")
+        lines.append(f"    if _attr is not None:")
+        lines.append(f"        _dict[{attr!r}] = emittable_attribute(_attr)")
+    lines.append("    return _dict")
+
+    exec("\n".join(lines), namespace)
+    return namespace["serializer"]
+
+
+SERIALIZERS: Dict[type, Callable[[Locatable], Dict]] = {}
+
+
+def build_emittable_object_from(x: Union[Locatable, Inspectable]) -> Dict:
+    # TODO: Clean this up to only include transmittable stuff (inspects).
+    if isinstance(x, Locatable):
+        serializer = SERIALIZERS.get(x.__class__)
+        if serializer is None:
+            serializer = SERIALIZERS[x.__class__] = compile_serializer(x)
+        return serializer(x)
 
     if isinstance(x, Inspectable):
         _dict = {
             "tick": x.tick,
-            "text": x.text_payload,
+            "text": x.events.format(x.wave.number),
             "players": {k: build_emittable_object_from(locatable) for k, locatable in x.players},
             "self_map": x.map,
             "original_map": x.original_map,
             "wave": {
-                "correct_calls": x.wave.correct_calls,
+                "correct_calls": dict(x.wave.correct_calls),
                 "start_tick": x.wave.start_tick,
                 "relative_tick": x.wave.relative_tick,
-                "calls": x.wave.calls,
+                "calls": dict(x.wave.calls),
                 "number": x.wave.number,
                 "end_flag": x.wave.end_flag,
                 "game_objects": {
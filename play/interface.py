@@ -3,10 +3,13 @@ from typing import Dict
 from uuid import UUID
 
 from flask import Flask, request
-from flask_socketio import SocketIO, join_room, leave_room
+from flask_socketio import SocketIO
 
 from log import debug
-from simulation import EventHandler, Room
+from simulation.event_handler import EventHandler
+from simulation.room import Room
+from simulation.ticker import ticker
+from .broadcast import Broadcaster
 from .emit import build_emittable_object_from
 
 # The architecture is:
@@ -25,17 +28,25 @@ server: SocketIO = SocketIO(app, cors_allowed_origins="*")
 rooms: Dict[str, Room] = {}
 active_sids: Dict[str, str] = {}  # Maps from request.sid client ids to uuid room ids.
 event_handler = EventHandler()
+broadcaster = Broadcaster(server)
 
 
 def emit(self) -> None:
-    # Should provide a full game state, ending on something that's Transmittable.
-    rv = json.dumps({
-        "game": build_emittable_object_from(self.game.inspectable),
-    })
+    # Should provide a full game state, ending on something that's Transmittable. This runs on the tick, so it only
+    # builds the state. The broadcaster encodes it once per view and sends it to every client (see Broadcaster).
+    state = build_emittable_object_from(self.game.inspectable)
 
-    self.game.inspectable.text_payload = []
+    self.game.inspectable.events.clear()
 
-    return self.server.emit("game_state", rv, to=self.id)
+    broadcaster.publish(self.id, state)
+
+
+def set_encoding(room_id: str, encoding: str) -> None:
+    # Switches the requesting client between JSON game_state messages and binary game_state_binary messages, and
+    # resyncs it, since it may have missed a frame while switching.
+    assert active_sids.get(request.sid) == room_id, "Only clients connected to a room can set its encoding."
+    broadcaster.subscribe(room_id, request.sid, encoding)
+    broadcaster.resync(room_id, request.sid)
 
 
 setattr(Room, "emit_state", emit)
@@ -47,7 +58,7 @@ def disconnect_handler() -> None:
         return
 
     # This happens early so that spectators leave the room even though their leaving the room does not destroy it.
-    leave_room(active_sids[request.sid])
+    broadcaster.unsubscribe(active_sids[request.sid], request.sid)
 
     if active_sids[request.sid] not in rooms:  # Spectators cause this (among other weird cases).
         return
@@ -63,8 +74,9 @@ def disconnect_handler() -> None:
     if len(rooms[active_sids[request.sid]].clients_by_id) == 0:
         rooms[active_sids[request.sid]].is_alive = False
         del rooms[active_sids[request.sid]]
+        broadcaster.close(active_sids[request.sid])
 
-    debug("Interface.disconnect_handler", f"Room deleted. There are {len(rooms)} rooms left.")
+    debug("Interface.disconnect_handler", "Room deleted.", rooms_left=len(rooms))
 
 
 @server.on("client_action")
@@ -88,7 +100,7 @@ def on_client_action(message=None) -> None:
             assert 1 <= len(args) <= 2, "Only the role and maybe mode should be passed as argument to room creation."
             room = room_create(room_id)
             if room_connect(room_id, request.sid, args[0]):
-                join_room(room_id)
+                broadcaster.subscribe(room_id, request.sid)
             if len(args) == 2:
                 room.set_mode(args[1])
 
@@ -99,7 +111,20 @@ def on_client_action(message=None) -> None:
         if action == "room_connect":
             assert len(args) == 1, "Only the role should be passed as argument to room connection."
             if room_connect(room_id, request.sid, args[0]):
-                join_room(room_id)
+                broadcaster.subscribe(room_id, request.sid)
+                broadcaster.resync(room_id, request.sid)
+            return
+
+        # Clients that missed a game_state frame, or joined mid-game, ask for a keyframe (see DeltaEncoder).
+        if action == "resync":
+            assert len(args) == 0, "No arguments should be passed to resync."
+            broadcaster.resync(room_id, request.sid)
+            return
+
+        # Clients ask for binary game states after they create or connect to a room (see play/binary.py).
+        if action == "set_encoding":
+            assert len(args) == 1, "Only the encoding should be passed as argument to set_encoding."
+            set_encoding(room_id, args[0])
             return
 
         event_existed = event_handler.handle(
@@ -144,7 +169,7 @@ def room_connect(room_id: str, client_id: str, role: str) -> bool:
         assert room_id in rooms, f"You tried to connect to a room {room_id} that does not exist."
         rooms[room_id].accept_player_connection(client_id, role)
     except AssertionError as e:
-        debug("Interface.room_connect", "AssertionError:", e)
+        debug("Interface.room_connect", "Could not connect.", assertion=str(e))
         return False
 
     active_sids[client_id] = room_id
@@ -153,9 +178,9 @@ def room_connect(room_id: str, client_id: str, role: str) -> bool:
 
 def kill_rooms() -> None:
     for room_id in rooms:
-        if rooms[room_id].thread is not None:
-            rooms[room_id].thread.join()
-        rooms[room_id].thread = None
+        rooms[room_id].is_alive = False
+    ticker.stop()
+    broadcaster.stop()
 
 
 def run() -> None:
@@ -0,0 +1,314 @@
+// Decodes the binary game_state messages of play/binary.py, which documents the format.
+// Keep in mind that this changes if the format, ATTRIBUTES, or TYPES in the server change.
+
+const KEYFRAME = 0, DELTA = 1;
+const NONE = 0, FALSE = 1, TRUE = 2, INT8 = 3, INT16 = 4, INT32 = 5, FLOAT64 = 6;
+const STR = 7, LIST = 8, BYTES = 9, MAP = 10, DICT = 11;
+const STRING_KEY = 255;
+const GENERIC = 0xffffffff;
+
+/** @type {string[]} - ATTRIBUTES in play/emit.py. */
+const ATTRIBUTES = [
+    "inventory", "calls_with", "destination", "followee", "follow_type", "follow_allow_under", "is_running",
+    "followee_last_found", "CALL_COUNT", "INVENTORY_SPACE", "correct_call", "required_call", "received_call",
+    "sent_call", "name", "spec_restore_i", "spec", "gear_bonus", "is_stalling", "stall_queue", "access_letter",
+    "which", "is_correct", "charges",
+];
+
+/** @type {string[]} - Field ids are indices into FIELDS. */
+const FIELDS = ["uuid", "location", "_", ...ATTRIBUTES];
+
+const BOOL = 0, INT = 1, XY = 2, TEXT = 3, TEXTS = 4, INTS = 5, ANY = 6;
+/** @type {Object<string, number>} - TYPES in play/binary.py. */
+const TYPES = {
+    "inventory": TEXTS,
+    "calls_with": TEXT,
+    "destination": XY,
+    "followee": TEXT,
+    "follow_type": INTS,
+    "follow_allow_under": BOOL,
+    "is_running": BOOL,
+    "followee_last_found": XY,
+    "CALL_COUNT": INT,
+    "INVENTORY_SPACE": INT,
+    "correct_call": INT,
+    "required_call": INT,
+    "received_call": INT,
+    "sent_call": INT,
+    "name": TEXT,
+    "spec_restore_i": INT,
+    "spec": INT,
+    "gear_bonus": INTS,
+    "is_stalling": BOOL,
+    "stall_queue": ANY,
+    "access_letter": TEXT,
+    "which": INT,
+    "is_correct": BOOL,
+    "charges": INT,
+};
+const ATTRIBUTE_TYPES = ATTRIBUTES.map(attr => attr in TYPES ? TYPES[attr] : ANY);
+const RECORD_SIZE = 11;  // The mask, uuid, location and class name length of a record.
+
+const utf8 = new TextDecoder("utf-8");
+
+export class FrameDecoder {
+    /**
+     * Decodes binary game_state messages into what JSON.parse would give for the JSON keyframe of the same state. It
+     * keeps the last frame, which the next delta applies on top of.
+     */
+    constructor () {
+        this.frame = null;
+        /** @type {Uint8Array|null} */
+        this.last = null;
+    };
+
+    /**
+     * A delta that does not apply on top of the last frame decodes to {frame, base}, and the client resyncs.
+     *
+     * @param {ArrayBuffer} buffer
+     * @returns {{frame: number, game?: object, base?: number}}
+     */
+    decode (buffer) {
+        const message = new Uint8Array(buffer);
+        const view = new DataView(buffer);
+        const frame = view.getUint32(1, true);
+        let data;
+        if (message[0] === KEYFRAME) {
+            data = message.slice(5);
+        } else if (message[0] === DELTA) {
+            if (this.last === null || this.frame !== frame - 1) {
+                return {frame: frame, base: frame - 1};
+            }
+            const reader = {bytes: message, i: 5};
+            const size = decodeUvarint(reader);
+            const last = this.last;
+            data = new Uint8Array(size);
+            // Bytes that did not change are at end + moved in the last frame.
+            let end = 0, moved = 0;
+            while (reader.i < message.length) {
+                const skip = decodeUvarint(reader);
+                data.set(last.subarray(end + moved, end + moved + skip), end);
+                end += skip;
+                let length = decodeUvarint(reader);
+                if (length % 2 === 1) {
+                    const zigzag = decodeUvarint(reader);
+                    moved += zigzag % 2 === 1 ? -(zigzag + 1) / 2 : zigzag / 2;
+                }
+                length = Math.floor(length / 2);
+                data.set(message.subarray(reader.i, reader.i + length), end);
+                end += length;
+                reader.i += length;
+            }
+            data.set(last.subarray(end + moved, end + moved + size - end), end);
+        } else {
+            throw `Unknown binary message ${message[0]}.`;
+        }
+        this.frame = frame;
+        this.last = data;
+        return {frame: frame, game: unpack(data)};
+    };
+}
+
+function decodeUvarint (reader) {
+    // Multiplies rather than shifts, since lengths may not fit in 31 bits.
+    let rv = 0, scale = 1;
+    while (reader.bytes[reader.i] & 0x80) {
+        rv += (reader.bytes[reader.i++] & 0x7f) * scale;
+        scale *= 0x80;
+    }
+    return rv + reader.bytes[reader.i++] * scale;
+}
+
+function unpack (data) {
+    // The state of a frame (see FrameEncoder.pack in play/binary.py).
+    const reader = {view: new DataView(data.buffer, data.byteOffset, data.byteLength), bytes: data, i: 0};
+    const selfMap = decodeMap(reader);
+    const originalMap = decodeMap(reader);
+    const players = unpackDict(reader, unpackRecord);
+    const gameObjects = unpackDict(reader, unpackRecord);
+    const droppedFood = unpackList(reader);
+    const dispensers = unpackDict(reader, unpackRecord);
+    const droppedEggs = unpackList(reader);
+    const droppedHnls = unpackList(reader);
+    const penance = unpackDict(reader, unpackList);
+    const [correctCalls, startTick, calls, number, endFlag, tick, relativeTick, text] =
+        Array.from({length: 8}, () => decodeValue(reader));
+    return {
+        tick: tick,
+        text: text,
+        players: players,
+        self_map: selfMap,
+        original_map: originalMap,
+        wave: {
+            correct_calls: correctCalls,
+            start_tick: startTick,
+            relative_tick: relativeTick,
+            calls: calls,
+            number: number,
+            end_flag: endFlag,
+            game_objects: gameObjects,
+            dropped_food: droppedFood,
+            dispensers: dispensers,
+            dropped_eggs: droppedEggs,
+            dropped_hnls: droppedHnls,
+            penance: penance,
+        },
+    };
+}
+
+function unpackDict (reader, unpackValue) {
+    const count = reader.bytes[reader.i++];
+    const rv = {};
+    for (let n = 0; n < count; n++) {
+        const length = reader.bytes[reader.i++];
+        const key = utf8.decode(reader.bytes.subarray(reader.i, reader.i + length));
+        reader.i += length;
+        rv[key] = unpackValue(reader);
+    }
+    return rv;
+}
+
+function unpackList (reader) {
+    const count = reader.view.getUint16(reader.i, true);
+    reader.i += 2;
+    const rv = [];
+    for (let n = 0; n < count; n++) rv.push(unpackRecord(reader));
+    return rv;
+}
+
+function unpackRecord (reader) {
+    const {view, bytes} = reader;
+    const mask = view.getUint32(reader.i, true);
+    if (mask === GENERIC) {
+        reader.i += 4;
+        return decodeValue(reader);
+    }
+    const uuid = view.getUint32(reader.i + 4, true);
+    const location = [bytes[reader.i + 8], bytes[reader.i + 9]];
+    const classLength = bytes[reader.i + 10];
+    reader.i += RECORD_SIZE;
+
+    const indices = ATTRIBUTES.map((_, j) => j).filter(j => (mask >>> j) & 1);
+    const fixed = {};
+    for (const j of indices) {
+        switch (ATTRIBUTE_TYPES[j]) {
+            case BOOL: case TEXT: case INTS:
+                fixed[j] = [bytes[reader.i]];
+                reader.i += 1;
+                break;
+            case INT:
+                fixed[j] = [view.getInt16(reader.i, true)];
+                reader.i += 2;
+                break;
+            case XY: case TEXTS:
+                fixed[j] = [bytes[reader.i], bytes[reader.i + 1]];
+                reader.i += 2;
+                break;
+        }
+    }
+
+    const rv = {uuid: uuid, location: location, _: utf8.decode(bytes.subarray(reader.i, reader.i + classLength))};
+    reader.i += classLength;
+    for (const j of indices) {
+        const attr = ATTRIBUTES[j];
+        switch (ATTRIBUTE_TYPES[j]) {
+            case BOOL:
+                rv[attr] = fixed[j][0] !== 0;
+                break;
+            case INT:
+                rv[attr] = fixed[j][0];
+                break;
+            case XY:
+                rv[attr] = fixed[j];
+                break;
+            case TEXT:
+                rv[attr] = utf8.decode(bytes.subarray(reader.i, reader.i + fixed[j][0]));
+                reader.i += fixed[j][0];
+                break;
+            case TEXTS: {
+                const [count, length] = fixed[j];
+                rv[attr] = count > 0 ? utf8.decode(bytes.subarray(reader.i, reader.i + length)).split("\0") : [];
+                reader.i += length;
+                break;
+            }
+            case INTS:
+                rv[attr] = [];
+                for (let n = 0; n < fixed[j][0]; n++) rv[attr].push(view.getInt16(reader.i + 2 * n, true));
+                reader.i += 2 * fixed[j][0];
+                break;
+            default:
+                rv[attr] = decodeValue(reader);
+        }
+    }
+    return rv;
+}
+
+function decodeString (reader) {
+    const length = reader.view.getUint16(reader.i, true);
+    reader.i += 2 + length;
+    return utf8.decode(reader.bytes.subarray(reader.i - length, reader.i));
+}
+
+function decodeMap (reader) {
+    const {bytes} = reader;
+    const rows = bytes[reader.i], columns = bytes[reader.i + 1];
+    reader.i += 2;
+    const rv = [];
+    for (let n = 0; n < rows; n++) {
+        // Tiles are Latin-1, which maps bytes to the code points with the same value.
+        rv.push(String.fromCharCode.apply(null, bytes.subarray(reader.i, reader.i + columns)));
+        reader.i += columns;
+    }
+    return rv;
+}
+
+function decodeValue (reader) {
+    const {view, bytes} = reader;
+    const tag = bytes[reader.i++];
+    let rv;
+    switch (tag) {
+        case NONE: return null;
+        case FALSE: return false;
+        case TRUE: return true;
+        case INT8:
+            reader.i += 1;
+            return view.getInt8(reader.i - 1);
+        case INT16:
+            reader.i += 2;
+            return view.getInt16(reader.i - 2, true);
+        case INT32:
+            reader.i += 4;
+            return view.getInt32(reader.i - 4, true);
+        case FLOAT64:
+            reader.i += 8;
+            return view.getFloat64(reader.i - 8, true);
+        case STR:
+            return decodeString(reader);
+        case LIST: {
+            const count = view.getUint16(reader.i, true);
+            reader.i += 2;
+            rv = [];
+            for (let n = 0; n < count; n++) rv.push(decodeValue(reader));
+            return rv;
+        }
+        case BYTES: {
+            const count = bytes[reader.i];
+            reader.i += 1 + count;
+            return Array.from(bytes.subarray(reader.i - count, reader.i));
+        }
+        case MAP:
+            return decodeMap(reader);
+        case DICT: {
+            const count = view.getUint16(reader.i, true);
+            reader.i += 2;
+            rv = {};
+            for (let n = 0; n < count; n++) {
+                const fieldId = bytes[reader.i++];
+                const key = fieldId === STRING_KEY ? decodeString(reader) : FIELDS[fieldId];
+                rv[key] = decodeValue(reader);
+            }
+            return rv;
+        }
+    }
+    throw `Unknown binary tag ${tag}.`;
+}
@@ -117,6 +117,11 @@ export const ROOM_PAUSE = 1;
 export const ROOM_F_FWD = 2;
 
 
+// Game state encodings (see play/binary.py)
+/** @type {string[]} */
+export const ENCODINGS = ["json", "binary"];
+
+
 // Mouse buttons
 /** @type {enum} */
 export const MOUSE_LEFT = 0;
@@ -84,3 +84,43 @@ export class Locatable {
         };
     }
 }
+
+/** @type {string} */
+const DELETED = "-";
+/** @type {string} */
+const LIST = "[]";
+
+const isObject = (x) => x !== null && typeof x === "object" && !Array.isArray(x);
+
+/**
+ * Applies a game_state delta to the state it was taken against, without modifying it.
+ * This mirrors patch in play/delta.py, which documents the delta format.
+ *
+ * @param {*} base
+ * @param {*} delta
+ * @returns {*}
+ */
+export function patch (base, delta) {
+    if (isObject(base) && isObject(delta)) {
+        const deleted = delta[DELETED] ?? [];
+        const rv = {};
+        for (const key in base) {
+            if (!deleted.includes(key)) rv[key] = base[key];
+        }
+        for (const key in delta) {
+            if (key === DELETED) continue;
+            rv[key] = key in rv ? patch(rv[key], delta[key]) : delta[key];
+        }
+        return rv;
+    }
+
+    if (Array.isArray(base) && isObject(delta) && LIST in delta) {
+        const rv = base.slice();
+        for (const i in delta[LIST]) {
+            rv[+i] = patch(rv[+i], delta[LIST][i]);
+        }
+        return rv;
+    }
+
+    return delta;
+}
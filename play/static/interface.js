@@ -1,4 +1,4 @@
-import { Game, Locatable } from "./game.js";
+import { Game, Locatable, patch } from "./game.js";
 import { Interactor } from "./interactor.js";
 import * as C from "./constants.js";
 
@@ -6,6 +6,8 @@ import * as C from "./constants.js";
 const TICK_SUCCESS = 0;
 /** @type {enum} */
 const GAME_NOT_STARTED = 1;
+/** @type {string[]} - The only actions spectators send, since they do not play. */
+const SPECTATOR_ACTIONS = ["room_connect", "resync", "set_encoding"];
 
 export class Interface {
     /**
@@ -17,24 +19,32 @@ export class Interface {
      * @typedef  {object} Options - The arguments required to start an interface.
      * @property {array}  room
      * @property {string} role
+     * @property {string} encoding - How the server encodes game states for this client, "json" or "binary".
      *
      * @typedef  {object} GameState - The object received from the server.
-     * @property {Game} game
+     * @property {number} frame
+     * @property {Game} game - Only on keyframes.
+     * @property {number} base - Only on deltas, the frame the delta was taken against.
+     * @property {object} delta - Only on deltas.
      * @property {object} error - An optional error.
      *
      * @param {Options} options
      * @param {WS}      ws
      * @param {Canvas}  canvas
      */
-    constructor ({room, role}, ws, canvas)  {
+    constructor ({room, role, encoding = "json"}, ws, canvas)  {
         if (!room?.length) {
             throw "Room needs to be set on options before interface is initialized.";
         }
         if (!C.ROLES.includes(role) && role !== "_") {
             throw `The role ${role} set on options is invalid.`;
         }
+        if (!C.ENCODINGS.includes(encoding)) {
+            throw `The encoding ${encoding} set on options is invalid.`;
+        }
         this.room = room;
         this.role = role;
+        this.encoding = encoding;
 
         this.player = new Locatable();
         this.game = new Game();
@@ -42,6 +52,10 @@ export class Interface {
         this.penancePerGameTile = {};
         this.text = [];
 
+        // The last game_state frame received, and the raw game state it carried.
+        this.frame = undefined;
+        this.state = null;
+
         this.interactor = null;
 
         this.ws = ws;
@@ -62,12 +76,26 @@ export class Interface {
 
     /**
      * The basic listener which populates this.game, this.player, and this.text
-     * from the server data.
+     * from the server data. The server sends keyframes with the whole game, and
+     * otherwise only what changed since the frame before (see play/delta.py).
      *
      * @param {GameState} json
      */
-    receiveListener ({game}) {
-        if (game === undefined) return;
+    receiveListener ({frame, game, base, delta}) {
+        if (frame === undefined) return;
+        if (game === undefined) {
+            // A delta only applies on top of the frame right before it. Otherwise, a frame got missed (or this
+            // client just joined), and the server needs to send a keyframe. Binary deltas are applied by their
+            // decoder, which leaves out the delta when it can not apply one.
+            if (base !== this.frame || delta === undefined) {
+                this.frame = undefined;
+                this.sendAction("resync", []);
+                return;
+            }
+            game = patch(this.state, delta);
+        }
+        this.frame = frame;
+        this.state = game;
         this.game = new Game(game);
         this.populateEntriesPerGameTile();
         this.player = this.game.players[this.role];
@@ -94,7 +122,7 @@ export class Interface {
      * @returns {Interface}
      */
     roomCreate (mode = C.ROOM_DELAY) {
-        return this.sendAction("room_create", [this.role, mode]);
+        return this.sendAction("room_create", [this.role, mode]).sendEncoding();
     };
 
     /**
@@ -103,7 +131,18 @@ export class Interface {
      * @returns {Interface}
      */
     roomConnect () {
-        return this.sendAction("room_connect", [this.role]);
+        return this.sendAction("room_connect", [this.role]).sendEncoding();
+    };
+
+    /**
+     * Asks the server to encode game states for this client as this.encoding. JSON is the default,
+     * so this is only sent for other encodings.
+     *
+     * @returns {Interface}
+     */
+    sendEncoding () {
+        if (this.encoding === "json") return this;
+        return this.sendAction("set_encoding", [this.encoding]);
     };
 
     /**
@@ -264,7 +303,7 @@ export class Interface {
             throw "Action needs to be a string.";
         }
 
-        if (this.role === "_" && action !== "room_connect") return this;
+        if (this.role === "_" && !SPECTATOR_ACTIONS.includes(action)) return this;
 
         this.ws.send({
             "room": this.room,
@@ -22,6 +22,7 @@ import * as C from "./constants.js";
 
 const FPS = 20;
 const CLICK_FPS = 9;
+const ENCODING = "binary";
 
 const $sideWaveNumber = $("#number");
 const $sideWaveTick = $("#tick");
@@ -84,6 +85,7 @@ $createForm.on("submit", function (e) {
     window.iface = new Interface({
         "room": room,
         "role": $role.val(),
+        "encoding": ENCODING,
     }, new WS(), new Canvas());
 
     // Set the value of the read only field in case we need to copy it for an invite.
@@ -109,6 +111,7 @@ $connectForm.on("submit", function (e) {
     window.iface = new Interface({
         "room": $roomIdRw.val(),
         "role": $role.val(),
+        "encoding": ENCODING,
     }, new WS(), new Canvas());
 
     disableForms($roomIdRw.val());
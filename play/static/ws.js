@@ -1,7 +1,9 @@
 import io from "./io.js";
+import { FrameDecoder } from "./binary.js";
 
 const SENT_EVENT_NAME = "client_action";
 const RECEIVED_EVENT_NAME = "game_state";
+const RECEIVED_BINARY_EVENT_NAME = "game_state_binary";
 const WEBSOCKET_ONLY = true;
 
 export class WS {
@@ -15,10 +17,25 @@ export class WS {
         this.ws.on(RECEIVED_EVENT_NAME, (message) => {
             // The event.data object we receive has the game and the player.
             // If no game has been started yet, game is null. If no player has been set yet, player is null.
-            for (let i = 0; i < this.fns.length; i++) {
-                this.fns[i](JSON.parse(message));
-            }
+            this.receive(JSON.parse(message));
         });
+        // Clients that set their encoding to binary get the same objects, encoded by play/binary.py. Binary deltas
+        // apply on top of the last binary frame, which the decoder keeps.
+        this.decoder = new FrameDecoder();
+        this.ws.on(RECEIVED_BINARY_EVENT_NAME, (message) => {
+            this.receive(this.decoder.decode(message));
+        });
+    };
+
+    /**
+     * Passes a received object to every receive listener.
+     *
+     * @param {object} json
+     */
+    receive (json) {
+        for (let i = 0; i < this.fns.length; i++) {
+            this.fns[i](json);
+        }
     };
 
     /**
@@ -1,2 +1,4 @@
-from .event_handler import EventHandler
-from .room import Room
+# Room and EventHandler (which pull in flask_socketio) are intentionally not imported here, so that running games
+# headlessly (see simulator.py) never loads the web stack. Import them from simulation.room and
+# simulation.event_handler directly.
+from .simulator import Simulator, SimulationResult
@@ -1,6 +1,7 @@
 from abc import abstractmethod
 from typing import Optional
 
+import log
 from log import debug
 from simulation.base.player import Player
 from simulation.base.terrain import Inspectable, C
@@ -60,6 +61,13 @@ class Ai:
         # The room calls this method to signal the AI to start acting..
         self.wave_started = True
 
+    def next_event_tick(self) -> int:
+        # The earliest relative tick on which calling this Ai can do anything (see Game.next_event_tick). An Ai that
+        # has not started its wave does nothing at all. Ais that know when they wait override this.
+        if not self.wave_started:
+            return Inspectable.WAVE
+        return self.game.wave.relative_tick + 1
+
 
 class RuleBasedAi(Ai):
     def __init__(self, game: Inspectable):
@@ -97,6 +105,15 @@ class RuleBasedAi(Ai):
             # Conditionally fires a Player.click_ action based on logic checks, then returns self.current_action.
             self.current_action = self.do_new_action()
 
+    def next_event_tick(self) -> int:
+        # An Ai waiting for a tick does nothing until it sees that tick, unless it has a call to send. Ais are called
+        # before the game tick advances, so it sees target_tick on the game tick after it.
+        tick = self.game.wave.relative_tick
+        if not self.wave_started or self.current_action != A.WAITING_FOR_TICK or \
+                self.player.sent_call != self.player.required_call:
+            return super().next_event_tick()
+        return max(tick + 1, self.target_tick + 1)
+
     @abstractmethod
     def do_new_action(self) -> int:
         raise NotImplementedError("Generic RuleBasedAi do not understand what action they're supposed to do."
@@ -124,6 +141,7 @@ class RuleBasedAi(Ai):
             return condition
 
         if self.player.is_idle():
-            debug("Ai.wait_current_action", f"{self.player} waiting for the current action, "
-                                            f"{self.current_action}, finished.")
+            if log.DEBUG:
+                debug("Ai.wait_current_action", "Waiting for the current action to finish.", unit=self.player,
+                      current_action=self.current_action)
         return self.player.is_idle()
@@ -1,5 +1,6 @@
 from typing import List, Tuple
 
+import log
 from log import debug
 from simulation.base.terrain import Inspectable, E, D
 from simulation import player
@@ -96,7 +97,8 @@ class Healer(RuleBasedAi):
             self.stock_i += 1
             # If this is the last stock, we don't overstock, and we change state to S.PATHING.
             if self.stock_i == self.stocks[self.stocks_i]:
-                debug("Healer.do_new_action", f"{self.player} using dispenser for the last time.")
+                if log.DEBUG:
+                    debug("Healer.do_new_action", "Using dispenser for the last time.", unit=self.player)
                 if self.stock_i == 0:
                     self.current_state = S.PATHING
                 else:
@@ -104,24 +106,28 @@ class Healer(RuleBasedAi):
                 self.stock_i = -1
                 self.player.click_use_dispenser()
                 return A.USING_DISPENSER
-            debug("Healer.do_new_action", f"{self.player} using dispenser.")
+            if log.DEBUG:
+                debug("Healer.do_new_action", "Using dispenser.", unit=self.player)
             self.player.click_use_dispenser(self.call)
             return A.USING_DISPENSER
 
         if self.current_state == S.PATHING:
-            debug("Healer.do_new_action", f"{self.player} sliding.")
+            if log.DEBUG:
+                debug("Healer.do_new_action", "Sliding.", unit=self.player)
             self.target_location = E.SLIDE_TILE
             self.current_state = S.FOLLOWING_CODE
             self.player.click_move(self.target_location)
             return A.RUNNING_IDLE
 
         if self.current_state == S.FOLLOWING_CODE:
-            debug("Healer.do_new_action", f"{self.player} following code.")
+            if log.DEBUG:
+                debug("Healer.do_new_action", "Following code.", unit=self.player)
             self.current_state, rv = self.follow_code()
             return rv
 
         if self.current_state == S.SPAMMING_DOWN:
-            debug("Healer.do_new_action", f"{self.player} spamming down.")
+            if log.DEBUG:
+                debug("Healer.do_new_action", "Spamming down.", unit=self.player)
             healers_alive = [healer for healer in self.healers if healer.is_alive()]
             if len(healers_alive) == 0:
                 return A.IDLE
@@ -130,7 +136,8 @@ class Healer(RuleBasedAi):
             self.player.click_use_poison_food(self.call, healers_alive[0])
             return A.USING_POISON
 
-        debug("Healer.do_new_action", f"{self.player} is idle. This should never happen.")
+        if log.DEBUG:
+            debug("Healer.do_new_action", "Idle. This should never happen.", unit=self.player)
         return A.IDLE
 
     def follow_code(self) -> Tuple[int, int]:
@@ -169,8 +176,9 @@ class Healer(RuleBasedAi):
                         (self.player.game.wave.relative_tick - 1) // Inspectable.CALL
                     ) + 1
                 ) * Inspectable.CALL + 2
-            debug("Healer.follow_code", f"{self.player} decided to wait till next call with "
-                                        f"self.target_tick = {self.target_tick}.")
+            if log.DEBUG:
+                debug("Healer.follow_code", "Decided to wait till the next call.", unit=self.player,
+                      target_tick=self.target_tick)
             return S.FOLLOWING_CODE, A.WAITING_FOR_TICK
 
         # If the code tells us to delay, we delay.
@@ -0,0 +1,127 @@
+from collections import deque
+from enum import Enum
+from random import Random
+from types import MethodType, FunctionType, BuiltinFunctionType, ModuleType
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from .terrain import C, Grid
+
+
+# A structural cloner for game object graphs (see Game.snapshot and Game.fork).
+#
+# copy.deepcopy works on these graphs, but it is slow since it goes through the generic __reduce_ex__ protocol for
+# every object. Game graphs only hold a handful of types, so this cloner dispatches on the exact type of each object to
+# a handler that knows how to copy it. Like deepcopy, it keeps a memo of everything it has cloned, so that shared
+# references and cycles (every Locatable points back to the Inspectable that lists it) are preserved in the clone.
+#
+# Bound methods are rebound to the clone of the object they are bound to. This matters for the stall queue, which
+# holds actions as (bound method, args, kwargs).
+#
+# Anything immutable (numbers, strings, classes, functions, read-only numpy arrays like the tables in L) is shared
+# between the original and the clone.
+
+ATOMIC = frozenset([
+    int, float, bool, str, bytes, complex, frozenset, type(None), type, range,
+    FunctionType, BuiltinFunctionType, ModuleType, type(Ellipsis), type(NotImplemented),
+])
+
+
+class Cloner:
+    def __init__(self, memo: Optional[Dict[int, Any]] = None):
+        # Prefill memo with {id(original): replacement} to redirect references instead of cloning them.
+        self.memo: Dict[int, Any] = {} if memo is None else memo
+
+    def __call__(self, x: Any) -> Any:
+        cls = type(x)
+        if cls in ATOMIC:
+            return x
+        rv = self.memo.get(id(x))
+        if rv is not None:
+            return rv
+        return HANDLERS.get(cls, Cloner.clone_object)(self, x)
+
+    def clone_list(self, x: list) -> list:
+        rv = self.memo[id(x)] = []
+        rv.extend([self(item) for item in x])
+        return rv
+
+    def clone_tuple(self, x: tuple) -> tuple:
+        rv = tuple([self(item) for item in x])
+        # A tuple can only be part of a cycle through a mutable object, which would have been memoized already.
+        return self.memo.setdefault(id(x), rv)
+
+    def clone_dict(self, x: dict) -> dict:
+        rv = self.memo[id(x)] = {}
+        for key, value in x.items():
+            rv[self(key)] = self(value)
+        return rv
+
+    def clone_set(self, x: set) -> set:
+        rv = self.memo[id(x)] = set()
+        rv.update([self(item) for item in x])
+        return rv
+
+    def clone_deque(self, x: deque) -> deque:
+        rv = self.memo[id(x)] = deque(maxlen=x.maxlen)
+        rv.extend([self(item) for item in x])
+        return rv
+
+    def clone_bytearray(self, x: bytearray) -> bytearray:
+        rv = self.memo[id(x)] = bytearray(x)
+        return rv
+
+    def clone_c(self, x: C) -> C:
+        rv = self.memo[id(x)] = C(x.x, x.y)
+        rv.is_difference = x.is_difference
+        if x.parent is not None:
+            rv.parent = self(x.parent)
+        return rv
+
+    def clone_grid(self, x: Grid) -> Grid:
+        rv = self.memo[id(x)] = x.copy()
+        return rv
+
+    def clone_random(self, x: Random) -> Random:
+        # Random() would seed itself from the system first, only to have its state overwritten.
+        rv = self.memo[id(x)] = Random.__new__(Random)
+        rv.setstate(x.getstate())
+        return rv
+
+    def clone_method(self, x: MethodType) -> MethodType:
+        rv = self.memo[id(x)] = MethodType(x.__func__, self(x.__self__))
+        return rv
+
+    def clone_array(self, x: np.ndarray) -> np.ndarray:
+        rv = self.memo[id(x)] = x.copy() if x.flags.writeable else x
+        return rv
+
+    def clone_object(self, x: Any) -> Any:
+        # Any other object is cloned attribute by attribute, without calling its __init__ (which would, for example,
+        # register a Locatable into the game a second time).
+        cls = type(x)
+        if isinstance(x, Enum):
+            return x  # Enum members are singletons.
+        rv = self.memo[id(x)] = cls.__new__(cls)
+        rv.__dict__.update({key: self(value) for key, value in x.__dict__.items()})
+        return rv
+
+
+HANDLERS: Dict[type, Callable[[Cloner, Any], Any]] = {
+    list: Cloner.clone_list,
+    tuple: Cloner.clone_tuple,
+    dict: Cloner.clone_dict,
+    set: Cloner.clone_set,
+    deque: Cloner.clone_deque,
+    bytearray: Cloner.clone_bytearray,
+    C: Cloner.clone_c,
+    Grid: Cloner.clone_grid,
+    Random: Cloner.clone_random,
+    MethodType: Cloner.clone_method,
+    np.ndarray: Cloner.clone_array,
+}
+
+
+def clone(x: Any, memo: Optional[Dict[int, Any]] = None) -> Any:
+    return Cloner(memo)(x)
@@ -1,3 +1,5 @@
+from typing import Dict, Iterator, List, Tuple
+
 from .terrain import Locatable, C, D, E, Inspectable
 
 
@@ -36,3 +38,50 @@ class Food(DroppedItem):
         super().__init__(location, game)
         self.which: int = which
         self.is_correct: bool = is_correct
+
+
+class DroppedFood:
+    # All the food dropped in a wave (Wave.dropped_food). Food should only be added and removed through this class.
+    #
+    # Iterating over it goes over all food in the order it was dropped, like the list it used to be. On top of that,
+    # food is kept bucketed by runner zone (see C.get_runner_zone), which is what runners scan when looking for food to
+    # target. Food never moves, so a food item stays in the bucket it was dropped in until it is removed.
+    #
+    # Both the whole collection and every bucket are dicts used as insertion-ordered sets, which keeps drop order
+    # while making existence checks and removals O(1).
+    def __init__(self):
+        self.food: Dict[Food, None] = {}
+        self.zones: Dict[Tuple[int, int], Dict[Food, None]] = {}
+
+    def __iter__(self) -> Iterator[Food]:
+        return iter(self.food)
+
+    def __len__(self) -> int:
+        return len(self.food)
+
+    def __contains__(self, food: Food) -> bool:
+        return food in self.food
+
+    def __getitem__(self, index: int) -> Food:
+        # Only for convenience. Prefer iterating.
+        return list(self.food)[index]
+
+    @staticmethod
+    def zone_key(zone: C) -> Tuple[int, int]:
+        return zone.x, zone.y
+
+    def add(self, food: Food) -> None:
+        self.food[food] = None
+        self.zones.setdefault(DroppedFood.zone_key(food.location.get_runner_zone()), {})[food] = None
+
+    def remove(self, food: Food) -> None:
+        del self.food[food]
+        del self.zones[DroppedFood.zone_key(food.location.get_runner_zone())][food]
+
+    def in_zone(self, zone: C) -> List[Food]:
+        # The food in a runner zone, oldest first.
+        return list(self.zones.get(DroppedFood.zone_key(zone), ()))
+
+    def newest_in_zone(self, zone: C) -> Iterator[Food]:
+        # The food in a runner zone, newest first. This is the order runners scan food in.
+        return reversed(self.zones.get(DroppedFood.zone_key(zone), {}))
@@ -0,0 +1,103 @@
+from typing import List
+
+import numpy as np
+
+from . import terrain  # Not from .terrain import Terrain, since terrain imports this module.
+
+
+# Game event codes. Every event is a row of (code, relative tick, uuid, payload) in an EventLog. The uuid is the
+# Locatable the event is about, or NO_UUID for wave events. What the payload holds depends on the code.
+class Event:
+    CALL = 0  # payload: the call number.
+    WAVE_END = 1
+    PENANCE_SPAWN = 2  # payload: penance(species).
+    PENANCE_EXTINCT = 3  # payload: penance(species).
+    PENANCE_DEATH = 4  # payload: penance(species, spawn tick).
+    RUNNER_DEATH = 5
+    RUNNER_ESCAPE = 6
+    RUNNER_CORRECT_EAT = 7
+    RUNNER_INCORRECT_EAT = 8
+    INCORRECT_POISON = 9
+
+    NO_UUID = -1
+
+    # Indexed by species, in the order of Penance._get.
+    SPECIES = ["Fighter", "Ranger", "Runner", "Healer"]
+
+    # Said by a unit, and printed after its uuid.
+    MESSAGES = {
+        RUNNER_DEATH: "Urghhh!",
+        RUNNER_ESCAPE: "Raaa!",
+        RUNNER_CORRECT_EAT: "Chomp, chomp.",
+        RUNNER_INCORRECT_EAT: "Blughhhh.",
+        INCORRECT_POISON: "Incorrect poison food.",
+    }
+
+    @staticmethod
+    def penance(species: int, spawn_tick: int = 0) -> int:
+        # Packs a penance payload. The species takes the two low bits.
+        return spawn_tick << 2 | species
+
+    @staticmethod
+    def format(code: int, tick: int, uuid: int, payload: int, wave_number: int) -> str:
+        # The text Npc, Player and Wave used to print for an event. Only the edges (the web emitter, GAME_PRINT) call
+        # this. The simulation itself never formats events.
+        if code in Event.MESSAGES:
+            return f"{uuid}| {Event.MESSAGES[code]}"
+
+        at = terrain.Terrain.tick_to_string(tick)
+        species = Event.SPECIES[payload & 3]
+        if code == Event.CALL:
+            text = f"Call {payload} ({at})."
+        elif code == Event.WAVE_END:
+            text = f"Wave ended ({at})."
+        elif code == Event.PENANCE_SPAWN:
+            text = f"A new {species.lower()} has spawned ({at})."
+        elif code == Event.PENANCE_EXTINCT:
+            text = f"All penance {species.lower()}s have been killed ({at})."
+        elif code == Event.PENANCE_DEATH:
+            text = f"{terrain.Terrain.tick_to_string(payload >> 2):0>3} {species} death animation finished ({at})."
+        else:
+            raise KeyError(f"Event code {code} does not exist.")
+        return f"WAVE {wave_number}:: {text}"
+
+
+class EventLog:
+    # A ring buffer of the latest CAPACITY events, preallocated so that logging an event is four integer stores. An
+    # interface drains it every tick (see EventLog.drain). Nothing drains it when running headlessly, in which case the
+    # oldest events are overwritten, and counted in dropped.
+    CAPACITY: int = 1024
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.buffer: np.ndarray = np.zeros((capacity, 4), dtype=np.int64)
+        self.start: int = 0
+        self.count: int = 0
+        self.dropped: int = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, code: int, tick: int, uuid: int = Event.NO_UUID, payload: int = 0) -> None:
+        capacity = len(self.buffer)
+        if self.count == capacity:
+            self.start = (self.start + 1) % capacity
+            self.count -= 1
+            self.dropped += 1
+        self.buffer[(self.start + self.count) % capacity] = code, tick, uuid, payload
+        self.count += 1
+
+    def events(self) -> np.ndarray:
+        # A copy of the buffered events, oldest first, one (code, tick, uuid, payload) row per event.
+        return np.roll(self.buffer, -self.start, axis=0)[:self.count].copy()
+
+    def clear(self) -> None:
+        self.start = 0
+        self.count = 0
+
+    def drain(self) -> np.ndarray:
+        rv = self.events()
+        self.clear()
+        return rv
+
+    def format(self, wave_number: int) -> List[str]:
+        return [Event.format(*(int(x) for x in row), wave_number) for row in self.events()]
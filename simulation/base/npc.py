@@ -1,9 +1,10 @@
-from random import randrange, choice, randint
 from abc import abstractmethod
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
+import log
 from log import game_print, J, LC
-from .terrain import Locatable, C, Inspectable, Targeting, D
+from .events import Event
+from .terrain import Locatable, C, Inspectable, Targeting, D, Terrain
 from .unit import Unit
 
 
@@ -37,10 +38,20 @@ class Npc(Unit):
         self.cycle: int = 0
         self.despawn_i: int = self.DESPAWN_TICKS
         self.state: int = Npc.ALIVE
+        self.death_tick: Optional[int] = None  # The relative tick the Npc died on (see Npc.die).
         self.hitpoints: int = self.HITPOINTS[self.game.wave.number]
         self.is_still_static: bool = True
         self.no_random_walk_i: int = 0  # The time it would've taken to reach the destination.
 
+        # Set by Penance.spawn.
+        self.penance_key: Optional[str] = None
+        self.spawn_i: int = 0
+        self.spawn_tick: int = self.game.wave.relative_tick  # The tick the spawn was queued on, which names the Npc.
+
+        # For Penance.scheduler. Counters are only up to date as of settled_tick while an Npc is not being called.
+        self.wake_tick: Optional[int] = None
+        self.settled_tick: int = self.game.wave.relative_tick
+
     def __call__(self) -> bool:
         self.cycle += 1  # Cycle starts at 1 and ends at 0 after 9.
         self.cycle %= self.CYCLE_COUNT
@@ -50,7 +61,7 @@ class Npc(Unit):
             self.do_cycle()
             if self.hitpoints <= 0:
                 self.hitpoints = 0
-                self.state = Npc.DEAD
+                self.die()
 
         if self.tick_despawn():
             return False  # Our return False (the condition for Npc removal in Penance.__call__).
@@ -65,13 +76,12 @@ class Npc(Unit):
     def str_info(self) -> str:
         return f"{LC}{self.name:<11}({self.game.tick:0>3}, {self.cycle}, _)@{self.location}{J}"
 
-    def print(self, *args, **kwargs) -> None:
-        game_print("Penance.print", f"{self}", *args, **kwargs)
-        self.game.text_payload.append(
-            " ".join([str(arg) for arg in (
-                f"{self.uuid}|", *args
-            )])
-        )
+    def event(self, code: int, payload: int = 0) -> None:
+        # Logs an Event about this Npc (see EventLog).
+        tick = self.game.wave.relative_tick
+        self.game.events.append(code, tick, self.uuid, payload)
+        if log.GAME_PRINT:
+            game_print("Penance.print", f"{self}", Event.format(code, tick, self.uuid, payload, self.game.wave.number))
 
     @abstractmethod
     def do_cycle(self) -> None:
@@ -96,16 +106,41 @@ class Npc(Unit):
         self.despawn_i -= 1
         return self.despawn_i == -1
 
+    def next_event_tick(self) -> int:
+        # The earliest relative tick on which calling this Npc can do more than what Npc.skip_ticks does in bulk.
+        # Species that know when they stand idle override this. Check Game.next_event_tick.
+        return self.game.wave.relative_tick + 1
+
+    def skip_ticks(self, ticks: int) -> None:
+        # Advances the counters of an Npc that would otherwise do nothing for that many ticks.
+        self.cycle = (self.cycle + ticks) % self.CYCLE_COUNT
+        self.no_random_walk_i = max(0, self.no_random_walk_i - ticks)
+
+    def settle(self, tick: int) -> None:
+        # Catches the counters up on the ticks up to tick that this Npc was not called on, since it had nothing to do.
+        if tick > self.settled_tick:
+            self.skip_ticks(tick - self.settled_tick)
+            self.settled_tick = tick
+
+    def ticks_until_cycle(self, cycles: List[int]) -> int:
+        # The number of ticks until this Npc is next called on one of cycles.
+        return min((cycle - self.cycle - 1) % self.CYCLE_COUNT + 1 for cycle in cycles)
+
     def is_alive(self) -> bool:
         return self.state == Npc.ALIVE
 
+    def die(self) -> None:
+        # The Npc is only removed DESPAWN_TICKS after this (see Npc.tick_despawn), so the tick it died on is kept.
+        self.state = Npc.DEAD
+        self.death_tick = self.game.wave.relative_tick
+
     def is_followable(self) -> bool:
         return self.is_alive() and super().is_followable()
 
     def get_closest_adjacent_square_to(self, target: Locatable) -> C:
         if not target.follow_allow_under and self.location == target.location:
             # Npcs will path randomly to get out from under a player.
-            return target.location + choice([D.W, D.E, D.S, D.N])
+            return target.location + self.game.rng.npcs.choice([D.W, D.E, D.S, D.N])
         return target.location + (self.location - target.location).single_step_taxicab()
 
     def path(self, destination: C = None, start: C = None) -> C:
@@ -113,13 +148,12 @@ class Npc(Unit):
         #
         # A move that relies on Npc.path will only ever move one tile. Maker of the move function is responsible
         # for the repetitive per-tick calling of this function that is going to make the Npc move seamlessly.
+        # Both start and destination are only read from, and every tile returned is a new one.
         if start is None:
-            start = self.location.copy()
+            start = self.location
 
         if destination is None:
-            destination = self.destination.copy()
-
-        relative = destination - start
+            destination = self.destination
 
         # Always try stepping in x, then always try stepping in y.
         # Legacy note: Diagonal checks are very processor intensive.
@@ -127,25 +161,26 @@ class Npc(Unit):
         # Keep in mind we can only do this because Npcs won't try to run up cannon, and therefore,
         # the wall processing part (which is why recursion was introduced into diagonal can_single_step)
         # won't be necessary.
-        single_step_x = relative.single_step_x()
-        single_step_y = relative.single_step_y()
+        #
+        # Each check is a bit lookup in the precomputed Npc step masks plus player blocking (see Terrain.can_npc_step).
+        step_x = (destination.x > start.x) - (destination.x < start.x)
+        step_y = (destination.y > start.y) - (destination.y < start.y)
+        grid = self.game.block_map
 
-        if start.can_npc_single_step(start + single_step_y + single_step_x, self.game.block_map):
+        if Terrain.can_npc_step(start, step_x, step_y, grid):
             # If we can step diagonally, or the tile is horizontal, we will.
-            return start + single_step_x + single_step_y
+            return C(start.x + step_x, start.y + step_y)
 
         # If we can't step to the tile directly, let's try to step in x alone.
-        if start.can_npc_single_step(start + single_step_x, self.game.block_map):
-            # Unlike with the diagonal case this taxicab can_npc_single_step will never recurse.
-            return start + single_step_x
+        if Terrain.can_npc_step(start, step_x, 0, grid):
+            return C(start.x + step_x, start.y)
 
         # Then in y alone.
-        if start.can_npc_single_step(start + single_step_y, self.game.block_map):
-            # Unlike with the diagonal case this taxicab can_npc_single_step will never recurse.
-            return start + single_step_y
+        if Terrain.can_npc_step(start, 0, step_y, grid):
+            return C(start.x, start.y + step_y)
 
         # We're stuck.
-        return start
+        return start.copy()
 
     def set_random_walk_destination(self) -> None:
         if self.no_random_walk_i > 0:
@@ -154,17 +189,20 @@ class Npc(Unit):
         self.destination = self.location
 
         # Using self instead of Npc because maybe overridable.
-        if not self.is_still_static or randrange(0, self.RANDOM_WALK_ROLL[1]) < self.RANDOM_WALK_ROLL[0]:
+        rng = self.game.rng.npcs
+        if not self.is_still_static or rng.randrange(0, self.RANDOM_WALK_ROLL[1]) < self.RANDOM_WALK_ROLL[0]:
             self.destination = self.location + C(
-                randint(-self.RANDOM_WALK_RADIUS, self.RANDOM_WALK_RADIUS),
-                randint(-self.RANDOM_WALK_RADIUS, self.RANDOM_WALK_RADIUS))
+                rng.randint(-self.RANDOM_WALK_RADIUS, self.RANDOM_WALK_RADIUS),
+                rng.randint(-self.RANDOM_WALK_RADIUS, self.RANDOM_WALK_RADIUS))
             self.is_still_static = False
             self.no_random_walk_i = self.location.chebyshev_to(self.destination)
             if self.no_random_walk_i < 2:
                 self.no_random_walk_i = 2  # For if we path right under ourselves / right beside ourselves.
 
     def switch_followee(self) -> bool:
-        self.followee = Targeting.choice(self.choice_arg, self.location, Unit.ACTION_DISTANCE)
+        self.followee = Targeting.choice(
+            self.choice_arg, self.location, Unit.ACTION_DISTANCE, self.game.rng.targeting
+        )
         if self.followee is not None:
             self.follow(self.followee)
             return True
@@ -1,12 +1,13 @@
 from abc import abstractmethod
 from collections import deque
-from random import random
 from typing import Optional, List
 
+import log
 from log import debug, J, C as LOG_C, game_print
 from .dispenser import Dispenser
+from .events import Event
 from .dropped_item import DroppedItem
-from .terrain import Terrain, C, Inspectable, Y, Locatable, D
+from .terrain import Terrain, C, Inspectable, Y, Locatable, D, P
 from .unit import Unit
 
 
@@ -50,7 +51,8 @@ class Player(Unit):
 
     def __call__(self) -> bool:
         if self.busy_i > 0:  # Cannot move or do any other action when busy (repairing trap / using dispenser).
-            debug("Player.__call__.busy_i", f"{self} is currently busy with busy_i = {self.busy_i}.")
+            if log.DEBUG:
+                debug("Player.__call__.busy_i", "Currently busy.", unit=self, busy_i=self.busy_i)
             self.busy_i -= 1
             return True
 
@@ -61,7 +63,8 @@ class Player(Unit):
         self.step()
         self.act()
 
-        debug("Player.__call__", f"{self}")
+        if log.DEBUG:
+            debug("Player.__call__", "Ticked.", unit=self, inventory=tuple(self.inventory))
 
         return True
 
@@ -73,13 +76,12 @@ class Player(Unit):
     def str_info(self) -> str:
         return f"{LOG_C}{self.name:<11}({self.game.tick:0>3}, _, _)@{self.location}{J}"
 
-    def print(self, *args, **kwargs) -> None:
-        game_print("Player.print", f"{self}", *args, **kwargs)
-        self.game.text_payload.append(
-            " ".join([str(arg) for arg in (
-                f"{self.uuid}|", *args
-            )])
-        )
+    def event(self, code: int, payload: int = 0) -> None:
+        # Logs an Event about this Player (see EventLog).
+        tick = self.game.wave.relative_tick
+        self.game.events.append(code, tick, self.uuid, payload)
+        if log.GAME_PRINT:
+            game_print("Player.print", f"{self}", Event.format(code, tick, self.uuid, payload, self.game.wave.number))
 
     @staticmethod
     @abstractmethod
@@ -92,6 +94,16 @@ class Player(Unit):
         rv.extend(self.game.wave.game_objects.cannons)
         return rv
 
+    def next_event_tick(self) -> int:
+        # A player with nothing to follow and nowhere to go does nothing until it is clicked. A busy player only counts
+        # down busy_i until it is done. Check Game.next_event_tick.
+        if self.followee is None and len(self.pathing_queue) == 0:
+            return Inspectable.WAVE
+        return self.game.wave.relative_tick + self.busy_i + 1
+
+    def skip_ticks(self, ticks: int) -> None:
+        self.busy_i = max(0, self.busy_i - ticks)
+
     def is_idle(self) -> bool:
         return self.followee is None and \
                (self.destination is None or self.destination == self.location) and \
@@ -120,12 +132,24 @@ class Player(Unit):
         #
         # Player.path completely ignores path_more_than_one_tile, as it always paths the full thing.
         # The method argument is just there for compatibility with super().
+        #
+        # The breadth-first search itself is in Player.search_path. Since it only depends on MAP, its result for every
+        # pair of tiles is precomputed in P, and walking that is what Player.path does whenever it can.
         if start is None:
             start = self.location.copy()
 
         if destination is None:
             destination = self.destination.copy()
 
+        if P.covers(start):
+            return P.path(start, destination)
+
+        return self.search_path(destination, start)
+
+    def search_path(self, destination: C, start: C) -> C:
+        # Returns the destination tile (or the closest tile to it that can be reached) with the C.parent chain leading
+        # back to start. This is only used directly when starting from a tile that P has no table row for.
+        # Changing anything here requires bumping P.VERSION so that the persisted tables get rebuilt.
         closest = start  # We need to keep track of the closest tile in case BFS does not conclude.
         closest_distance = start.chebyshev_to(destination)  # The closest tile is decided based on chebyshev distance.
         visited = set()
@@ -151,7 +175,8 @@ class Player(Unit):
                     bfs_queue.append(tile)
 
             if len(bfs_queue) == 0:
-                debug("Player.path", f"{self}'s bfs_queue finished before we find a path.")
+                if log.DEBUG:
+                    debug("Player.path", "The bfs_queue finished before we found a path.", unit=self)
                 return closest
 
             bfs_i += 1
@@ -159,8 +184,9 @@ class Player(Unit):
             # BFS queue should always be empty (triggering the condition above) before bfs_i hits BFS_LIMIT.
             # This condition should never be reached.
             if bfs_i == Player.BFS_LIMIT:
-                debug("Player.path", f"{self} tried more than BFS_LIMIT pops "
-                                     f"in bfs_queue but couldn't find a path.")
+                if log.DEBUG:
+                    debug("Player.path", "Tried more than BFS_LIMIT pops in bfs_queue but couldn't find a path.",
+                          unit=self)
                 return closest
 
     def move(self, destination: C) -> None:
@@ -172,7 +198,8 @@ class Player(Unit):
         # one or two tiles per tick depending on whether the unit is running.
         #
         # Any move command should overwrite any existing move commands.
-        debug("Player.move", f"{self} fires a move.")
+        if log.DEBUG:
+            debug("Player.move", "Fires a move.", unit=self, destination=(destination.x, destination.y))
         self.stop_movement(clear_destination=True)
         self.destination = destination  # For other classes to know that we're pathing.
 
@@ -187,12 +214,15 @@ class Player(Unit):
 
         if len(self.pathing_queue) == 0:
             self.stop_movement(clear_destination=True)
-            debug("Player.move.pathing_queue", f"{self} tried to path but ended up with an empty pathing queue.")
+            if log.DEBUG:
+                debug("Player.move.pathing_queue", "Tried to path but ended up with an empty pathing queue.", unit=self)
             return
 
         # The leftmost element should be the current tile, we pop it.
         self.pathing_queue.popleft()
-        debug("Player.move.pathing_queue", f"{self}'s final pathing queue is: {Terrain.queue_info(self.pathing_queue)}")
+        if log.DEBUG:
+            debug("Player.move.pathing_queue", "Pathed.", unit=self,
+                  pathing_queue=tuple((tile.x, tile.y) for tile in self.pathing_queue))
 
     def cant_single_step_callback(self, tile: C) -> None:
         # This method is called if the single step fails.
@@ -207,6 +237,9 @@ class Player(Unit):
         # The conditions for location change cannot be decided without inspecting the pathing queue, making it much
         # easier to inspect Unit.single_step return value instead of re-checking. However, Unit.single_step changes
         # our location. This is why we need to "remember" what out location before stepping was.
+        if len(self.pathing_queue) == 0:
+            return False  # Nothing to step to, so there is nothing to remember.
+
         old_location = self.location.copy()
 
         location_changed = super().single_step()
@@ -214,7 +247,8 @@ class Player(Unit):
         if location_changed:
             Terrain.unblock(old_location, self.game.block_map)
             Terrain.block(self.location, self.game.block_map)
-            debug("Player.single_step", f"{self} successfully single stepped to {self.location}.")
+            if log.DEBUG:
+                debug("Player.single_step", "Successfully single stepped.", unit=self)
 
         return location_changed
 
@@ -305,8 +339,9 @@ class Player(Unit):
         assert self.calls_with is not None, "This player has to calls_with someone in order to click_call."
         correct_call = self.required_call
         my_call = correct_call
-        if random() < mess_up_probability:  # We messed up!
-            my_call = int(random() * (self.CALL_COUNT - 1))
+        rng = self.game.rng.players
+        if rng.random() < mess_up_probability:  # We messed up!
+            my_call = int(rng.random() * (self.CALL_COUNT - 1))
             if my_call >= correct_call:
                 my_call += 1
         self.sent_call = my_call
@@ -0,0 +1,30 @@
+from random import Random, SystemRandom
+from typing import Optional
+
+
+class Rng:
+    # Every random draw in a game goes through the Rng owned by that game (Game.rng), never through the global random
+    # module. This makes a seeded game reproducible no matter what else runs in the same process.
+    #
+    # Each subsystem draws from its own stream. Streams are seeded from the game seed and the stream name, so they are
+    # independent of each other: for example, adding a draw to Npc random walks does not change the calls of the wave.
+    STREAMS = ("calls", "runners", "npcs", "targeting", "players")
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed: int = 0
+        self.calls: Random = Random()  # Wave.change_call
+        self.runners: Random = Random()  # Runner.get_random_walk
+        self.npcs: Random = Random()  # Npc random walks and adjacent square choice
+        self.targeting: Random = Random()  # Targeting.choice
+        self.players: Random = Random()  # Player.click_call mess ups
+        self.reseed(seed)
+
+    def reseed(self, seed: Optional[int] = None) -> None:
+        # An unseeded Rng picks a random seed, which is kept in self.seed so that the game can be replayed.
+        self.seed = seed is None and SystemRandom().getrandbits(64) or seed
+        for name in Rng.STREAMS:
+            getattr(self, name).seed(f"{self.seed}:{name}")
+
+    def stream(self, name: str) -> Random:
+        # A new stream that is independent of the named ones above, for code outside of the game loop.
+        return Random(f"{self.seed}:{name}")
@@ -0,0 +1,46 @@
+import heapq
+from typing import Any, List, Optional, Tuple
+
+
+class Scheduler:
+    # A min-heap of units keyed by the relative tick they next need to be called on (see Npc.next_event_tick). Finding
+    # the units that are due on a tick costs O(log n) per due unit, instead of a pass over every unit.
+    #
+    # A unit is scheduled on a single tick at a time, which it keeps in its wake_tick attribute (None while it is not
+    # scheduled). Rescheduling a unit pushes a new entry and leaves the old one in the heap. Entries whose tick is not
+    # their unit's wake_tick anymore are stale, and are dropped as they reach the top.
+    def __init__(self):
+        self.heap: List[Tuple[int, int, Any]] = []
+        self.pushes: int = 0  # Breaks ties between entries of the same tick, since units do not compare.
+
+    def schedule(self, unit: Any, tick: int) -> None:
+        unit.wake_tick = tick
+        heapq.heappush(self.heap, (tick, self.pushes, unit))
+        self.pushes += 1
+
+    def wake(self, unit: Any, tick: int) -> None:
+        # Moves unit up to tick, unless it is already scheduled on or before it.
+        if unit.wake_tick is None or tick < unit.wake_tick:
+            self.schedule(unit, tick)
+
+    @staticmethod
+    def cancel(unit: Any) -> None:
+        unit.wake_tick = None
+
+    def pop_due(self, tick: int) -> List[Any]:
+        # Unschedules and returns every unit due on or before tick. It is up to the caller to schedule them again.
+        rv = []
+        heap = self.heap
+        while len(heap) > 0 and heap[0][0] <= tick:
+            due_tick, _, unit = heapq.heappop(heap)
+            if unit.wake_tick == due_tick:
+                unit.wake_tick = None
+                rv.append(unit)
+        return rv
+
+    def peek(self) -> Optional[int]:
+        # The earliest tick any unit is scheduled on, if any.
+        heap = self.heap
+        while len(heap) > 0 and heap[0][2].wake_tick != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if len(heap) > 0 else None
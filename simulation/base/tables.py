@@ -0,0 +1,245 @@
+import hashlib
+import os
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Lookup tables that are precomputed over the static map, along with the helpers used to build and persist them.
+#
+# This file sits at the bottom of the hierarchy with log.py. It cannot import terrain.py, since terrain.py builds its
+# tables using the functions here. Every builder is therefore passed the map layers (see L in terrain.py) explicitly.
+#
+# Building some of these tables takes a few seconds, so each table is saved to TABLES_DIRECTORY the first time it is
+# built, keyed by a hash of everything it was built from. Editing MAP (or the builder version) invalidates the key,
+# and the table gets rebuilt on the next import.
+
+TABLES_DIRECTORY: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tables")
+
+# Line of sight uses fixed-point "integer decimals" with a precision of DECIMAL_SHIFT bits. Keep in sync with E.
+DECIMAL_SHIFT: int = 16
+DECIMAL_HALF: int = 1 << (DECIMAL_SHIFT - 1)
+
+
+def cached(name: str, version: int, inputs: Tuple[np.ndarray, ...],
+           build: Callable[[], Tuple[np.ndarray, ...]]) -> Tuple[np.ndarray, ...]:
+    # Loads the arrays that build() returns from disk if they have been built before from the same inputs.
+    # Otherwise, builds them and tries to persist them. Failing to persist (read-only install) is not an error.
+    digest = hashlib.sha1(str(version).encode())
+    for array in inputs:
+        digest.update(str(array.shape).encode())
+        digest.update(np.ascontiguousarray(array).tobytes())
+    path = os.path.join(TABLES_DIRECTORY, f"{name}-{digest.hexdigest()[:16]}.npz")
+
+    try:
+        with np.load(path) as archive:
+            return tuple(archive[f"arr_{i}"] for i in range(len(archive.files)))
+    except (OSError, ValueError, KeyError):
+        pass
+
+    arrays = build()
+
+    try:
+        os.makedirs(TABLES_DIRECTORY, exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as f:  # A file object stops np.savez from appending its own extension.
+            np.savez(f, *arrays)
+        os.replace(temporary_path, path)  # Atomic, so that parallel processes never load a half written table.
+    except OSError:
+        pass
+
+    return arrays
+
+
+def tile_coordinates(shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    # The (xs, ys) of every tile id, where a tile id is y * width + x.
+    ys, xs = np.divmod(np.arange(shape[0] * shape[1], dtype=np.int64), shape[1])
+    return xs, ys
+
+
+def letter_index(letter: np.ndarray) -> Dict[str, np.ndarray]:
+    # Maps every letter in a (latin-1 ordinal) letter layer to the sorted tile ids it appears on.
+    flat = letter.ravel()
+    return {chr(code): np.flatnonzero(flat == code) for code in np.unique(flat).tolist()}
+
+
+def can_single_see(level: np.ndarray, seeable: np.ndarray,
+                   x1: np.ndarray, y1: np.ndarray, x2: np.ndarray, y2: np.ndarray) -> np.ndarray:
+    # Array version of C.can_single_see. Coordinates need to be inside the map.
+    return (np.abs(x2 - x1) + np.abs(y2 - y1) <= 1) & \
+           (np.abs(level[y1, x1].astype(np.int64) - level[y2, x2]) <= 1) & \
+           (seeable[y2, x2] != 0)
+
+
+def line_of_sight(level: np.ndarray, seeable: np.ndarray, x: int, y: int,
+                  xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    # Array version of C.trace_sight from a single tile (x, y) to every tile in (xs, ys) at once.
+    # Check C.trace_sight for comments on what the lines below do. The only difference is that instead of walking
+    # each line separately, step k of every line is taken at the same time, and lines that are shorter than k are
+    # masked out by the active variable.
+    dx = xs - x
+    dy = ys - y
+
+    short_is_y = np.abs(dx) > np.abs(dy)
+    short_distance = np.where(short_is_y, dy, dx)
+    long_distance = np.where(short_is_y, dx, dy)
+    short_start = np.where(short_is_y, y, x)
+    long_start = np.where(short_is_y, x, y)
+
+    steps = np.abs(long_distance)
+    decimal_slope = (short_distance << DECIMAL_SHIFT) // np.maximum(steps, 1)
+    long_axis_increment = np.where(long_distance > 0, 1, -1)
+    decimal_short = (short_start << DECIMAL_SHIFT) + DECIMAL_HALF + np.where(short_distance < 0, -1, 0)
+
+    height, width = level.shape
+    visible = np.ones(xs.shape, dtype=bool)
+
+    def to_xy(long_axis: np.ndarray, short_axis: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Lines that are already finished can point outside the map. They are clipped, since they are masked out.
+        tile_x = np.clip(np.where(short_is_y, long_axis, short_axis), 0, width - 1)
+        tile_y = np.clip(np.where(short_is_y, short_axis, long_axis), 0, height - 1)
+        return tile_x, tile_y
+
+    old_long = long_start
+    old_short = short_start
+
+    for k in range(1, int(steps.max(initial=0)) + 1):
+        active = steps >= k
+        new_long = long_start + k * long_axis_increment
+        first_short = decimal_short >> DECIMAL_SHIFT
+        decimal_short = decimal_short + decimal_slope
+        second_short = decimal_short >> DECIMAL_SHIFT
+
+        # Check one longer distance tile.
+        ok = can_single_see(level, seeable, *to_xy(old_long, old_short), *to_xy(new_long, first_short))
+
+        # Check a fraction of a shorter distance tile, only if the added decimals formed a full square.
+        ok &= (first_short == second_short) | \
+            can_single_see(level, seeable, *to_xy(new_long, first_short), *to_xy(new_long, second_short))
+
+        visible &= ~active | ok
+
+        old_long = new_long
+        old_short = second_short
+
+    return visible
+
+
+def build_sight_table(level: np.ndarray, seeable: np.ndarray) -> Tuple[np.ndarray]:
+    # Row a of the table is a bitset (little-endian bit order) of every tile b for which a can see b.
+    xs, ys = tile_coordinates(level.shape)
+    table = np.zeros((xs.size, (xs.size + 7) // 8), dtype=np.uint8)
+    for source in range(xs.size):
+        table[source] = np.packbits(line_of_sight(level, seeable, xs[source], ys[source], xs, ys), bitorder="little")
+    return table,
+
+
+# The eight king moves, in the order C.get_adjacent_tiles returns them (W, E, S, N, SW, SE, NW, NE). BFS tie-breaking
+# depends on this order. Bit i of a step mask stands for a step in direction ADJACENCY[i].
+ADJACENCY: Tuple[Tuple[int, int], ...] = ((-1, 0), (1, 0), (0, 1), (0, -1), (-1, 1), (1, 1), (-1, -1), (1, -1))
+
+
+def shifted(layer: np.ndarray, dx: int, dy: int, fill: int = 0) -> np.ndarray:
+    # Returns a layer where rv[y, x] = layer[y + dy, x + dx], and tiles outside the map read as fill.
+    height, width = layer.shape
+    padded = np.full((height + 2, width + 2), fill, dtype=layer.dtype)
+    padded[1:-1, 1:-1] = layer
+    return padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+
+
+def player_steps(occupiable: np.ndarray, level: np.ndarray) -> np.ndarray:
+    # Array version of C.trace_single_step without a grid. Returns a per-tile uint8 mask where bit i is set if a player
+    # standing on the tile can single step in direction ADJACENCY[i]. Steps outside the map are never legal.
+    #
+    # A straight step needs an occupiable destination with a level difference of at most 1. A diagonal step also needs
+    # both L-shaped paths around it (through the x neighbour and through the y neighbour) to be legal straight steps.
+    level = level.astype(np.int64)
+
+    def straight(dx: int, dy: int) -> np.ndarray:
+        return (shifted(occupiable, dx, dy) != 0) & (np.abs(level - shifted(level, dx, dy)) <= 1)
+
+    steps = np.zeros(occupiable.shape, dtype=np.uint8)
+    for i, (dx, dy) in enumerate(ADJACENCY):
+        legal = straight(dx, dy)
+        if dx != 0 and dy != 0:
+            legal &= straight(dx, 0) & straight(0, dy)
+            legal &= shifted(straight(0, dy), dx, 0) & shifted(straight(dx, 0), 0, dy)
+        steps |= legal.astype(np.uint8) << i
+    return steps
+
+
+def npc_steps(occupiable: np.ndarray, level: np.ndarray) -> np.ndarray:
+    # Array version of C.trace_npc_single_step, without the player blocking part, which changes every tick and is
+    # checked separately against block_map. Same mask layout as player_steps.
+    #
+    # Npcs step like players, except that they can never step on a tile with a level above 1. For diagonal steps, this
+    # also applies to both L-shaped neighbours, while the steps from those neighbours to the diagonal tile follow the
+    # player rules (exactly like the recursion in C.trace_single_step does).
+    level = level.astype(np.int64)
+
+    def straight(dx: int, dy: int) -> np.ndarray:
+        return (shifted(occupiable, dx, dy) != 0) & (np.abs(level - shifted(level, dx, dy)) <= 1)
+
+    def npc_straight(dx: int, dy: int) -> np.ndarray:
+        return straight(dx, dy) & (shifted(level, dx, dy, 2) <= 1)
+
+    steps = np.zeros(occupiable.shape, dtype=np.uint8)
+    for i, (dx, dy) in enumerate(ADJACENCY):
+        legal = npc_straight(dx, dy)
+        if dx != 0 and dy != 0:
+            legal &= npc_straight(dx, 0) & npc_straight(0, dy)
+            legal &= shifted(straight(0, dy), dx, 0) & shifted(straight(dx, 0), 0, dy)
+        steps |= legal.astype(np.uint8) << i
+    return steps
+
+
+def adjacency_csr(steps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # The graph of legal single steps as compressed sparse row arrays (indptr, indices), both int32. The neighbours of
+    # tile id t are indices[indptr[t]:indptr[t + 1]], in ADJACENCY order.
+    height, width = steps.shape
+    bits = steps.ravel()[:, None] >> np.arange(len(ADJACENCY), dtype=np.uint8) & 1
+    offsets = np.array([dy * width + dx for dx, dy in ADJACENCY], dtype=np.int64)
+    tiles, directions = np.nonzero(bits)  # Sorted by tile, then by direction, which is exactly the order we need.
+    indptr = np.zeros(steps.size + 1, dtype=np.int32)
+    np.cumsum(bits.sum(axis=1), out=indptr[1:])
+    return indptr, (tiles + offsets[directions]).astype(np.int32)
+
+
+def neighbours(indptr: np.ndarray, indices: np.ndarray) -> List[List[int]]:
+    # The CSR graph as one list of neighbour tile ids per tile id, for code that iterates it from Python.
+    indices = indices.tolist()
+    return [indices[start:end] for start, end in zip(indptr[:-1].tolist(), indptr[1:].tolist())]
+
+
+def build_path_tables(occupiable: np.ndarray, steps: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Runs the Player.search_path breadth-first search to completion from every occupiable tile.
+    #
+    # Returns three (tiles x tiles) tables whose row is the BFS source:
+    # * parent[s, t] is the tile that discovered t in the BFS from s, i.e. the previous tile on the path from s to t.
+    #   Following parent back from t to s gives exactly the path Player.search_path would return, ties included.
+    # * order[s, t] is the position at which t is popped out of the BFS queue, which Player.search_path uses to choose
+    #   between equally close tiles when the destination cannot be reached.
+    # * distance[s, t] is the number of steps on that path.
+    # Unreachable tiles (and rows of tiles that cannot be stood on) are -1 in every table.
+    size = steps.size
+    adjacent = neighbours(*adjacency_csr(steps))
+
+    parent = np.full((size, size), -1, dtype=np.int16)
+    order = np.full((size, size), -1, dtype=np.int16)
+    distance = np.full((size, size), -1, dtype=np.int16)
+
+    for source in np.flatnonzero(occupiable.ravel()).tolist():
+        parent_row = [-1] * size
+        distance_row = [-1] * size
+        distance_row[source] = 0
+        queue = [source]  # Nothing is ever removed. The pop position is the queue index, which is what order holds.
+        for vertex in queue:
+            for tile in adjacent[vertex]:
+                if distance_row[tile] == -1:
+                    parent_row[tile] = vertex
+                    distance_row[tile] = distance_row[vertex] + 1
+                    queue.append(tile)
+        parent[source] = parent_row
+        distance[source] = distance_row
+        order[source, queue] = np.arange(len(queue), dtype=np.int16)
+
+    return parent, order, distance
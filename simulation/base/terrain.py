@@ -1,8 +1,14 @@
 from __future__ import annotations
 
-from random import choice
+from random import Random
+import random
 import re
-from typing import Union, Optional, List, Callable, Deque, Tuple, Dict
+from typing import Any, Union, Optional, List, Callable, Deque, Tuple, Dict
+
+import numpy as np
+
+from . import tables
+from .events import EventLog
 
 # Note that blocking and sight calculations here are inaccurate, but are intentionally left this way to simplify
 # writing code. Right now, I prefer code legibility and ease over code rigour and speed.
@@ -99,23 +105,28 @@ F = {
 
 
 class C:  # Tile, Location, Displacement
+    # Tiles are created and thrown away all the time while pathing, so they carry no __dict__. Code that needs to do
+    # bulk work on tiles should work on tile ids (C.id) instead, and only turn them into tiles at the edges.
+    __slots__ = ("x", "y", "parent", "is_difference")
+
     def __init__(self, x: Union[C, int], y: Optional[int] = None):
         self.parent: Optional[C] = None  # For BFS
         self.is_difference: bool = False  # To prevent errors.
 
-        if isinstance(x, self.__class__) and y is None:
+        if y is not None:
+            # The common case (and the one every C operator uses) comes first.
+            self.x: int = x
+            self.y: int = y
+            return
+
+        if isinstance(x, self.__class__):
             # This form is possible for copying: C(my_var) but it's more recommended to use my_var + D.X instead.
-            self.x: int = x.x
-            self.y: int = x.y
+            self.x = x.x
+            self.y = x.y
             self.parent = x.parent
             self.is_difference = x.is_difference
             return
 
-        if isinstance(x, int) and isinstance(y, int):
-            self.x = x
-            self.y = y
-            return
-
         assert True, "None of the conditions required for the formation of C from the given arguments were met."
 
     def __getitem__(self, key: Union[int, str]) -> int:
@@ -138,22 +149,22 @@ class C:  # Tile, Location, Displacement
         return f"{X}({self.x:>2}, {self.y:>2}, {Terrain.letter_at(self)}){K}"
 
     def __hash__(self) -> int:
-        return hash((self.x, self.y))
+        # Distinct for every x from 0 to 65535, which covers every tile inside the map. Differences, with a negative x,
+        # can collide with far away tiles, which is fine for a hash. This avoids building a tuple on every hash.
+        return self.y * 65536 + self.x
+
+    # The operators below are on the hot path of all pathing code, and therefore do not type check their operands.
 
     def __eq__(self, other: C) -> bool:
-        assert isinstance(other, self.__class__) or other is None, \
-            "Cannot compare equality to something that isn't of type C."
         if other is None:
             return False  # We are definitely of type C here and are not None!
         return self.x == other.x and self.y == other.y
 
     def __add__(self, other: C) -> C:
-        assert isinstance(other, self.__class__), "Cannot add something that isn't of type C."
-        return self.__class__(self.x + other.x, self.y + other.y)
+        return C(self.x + other.x, self.y + other.y)
 
     def __sub__(self, other: C) -> C:
-        assert isinstance(other, self.__class__), "Cannot subtract something that isn't of type C."
-        difference = self.__class__(self.x - other.x, self.y - other.y)
+        difference = C(self.x - other.x, self.y - other.y)
         difference.is_difference = True
         return difference
 
@@ -168,6 +179,17 @@ class C:  # Tile, Location, Displacement
     def __rmul__(self, other) -> C:
         return self.__mul__(other)
 
+    @property
+    def id(self) -> int:
+        # The packed tile id (y * width + x) that the precomputed tables in L, V and P are indexed by.
+        # Only meaningful for tiles inside the map.
+        return self.y * L.WIDTH + self.x
+
+    @staticmethod
+    def from_id(tile: int) -> C:
+        y, x = divmod(tile, L.WIDTH)
+        return C(x, y)
+
     def compare_assert(self, other: int) -> None:
         assert self.is_difference, "Only length intervals and not actual tiles can be compared."
         assert isinstance(other, int), "Type C can only be compared to an int."
@@ -194,7 +216,7 @@ class C:  # Tile, Location, Displacement
     def copy(self) -> C:
         # Copy is great because it doesn't copy over parent and is_difference, unlike
         # initializing a C from this C.
-        return self + D.X
+        return C(self.x, self.y)
 
     def single_step_x(self) -> C:
         self.step_assert()
@@ -206,7 +228,7 @@ class C:  # Tile, Location, Displacement
 
     def single_step(self) -> C:
         self.step_assert()
-        return self.single_step_x() + self.single_step_y()
+        return D.step((self.x > 0) - (self.x < 0), (self.y > 0) - (self.y < 0))
 
     def single_step_taxicab(self) -> C:
         if abs(self.x) <= abs(self.y):
@@ -216,17 +238,14 @@ class C:  # Tile, Location, Displacement
     def taxicab_to(self, other: C) -> int:
         # Look up Taxicab Distance to understand why this is named this way and how it functions.
         # A quick analogy to chess would be the shortest distance traversed by a rook to reach a tile.
-        d = self - other
-        return abs(d.x) + abs(d.y)
+        return abs(self.x - other.x) + abs(self.y - other.y)
 
     def chebyshev_to(self, other: C) -> int:
         # Look up Chebyshev Distance to understand why this is named this way and how it functions.
         # A quick analogy to chess would be the shortest distance traversed by a king / queen to reach a tile.
-        d = self - other
-        return max(abs(d.x), abs(d.y))
+        return max(abs(self.x - other.x), abs(self.y - other.y))
 
     def is_aligned_with(self, other: C) -> bool:
-        assert isinstance(other, self.__class__), "Cannot check alignment to something that isn't of type C."
         return self.x == other.x or self.y == other.y
 
     def is_southwest_of(self, other: C) -> bool:
@@ -244,18 +263,20 @@ class C:  # Tile, Location, Displacement
         return rv
 
     def get_adjacent_tiles(self) -> List[C]:
-        rv = []
-
-        # For BFS related reasons, this should return the tiles in a specific order.
-        # Game tends for x movement (east/west) before y movement (north/south).
-        # Game tends for negative x movement (west), and positive y movement (south) before their direction opposites.
-        # Game tends for rook movement before bishop movement.
-        for i in [D.W, D.E, D.S, D.N, D.SW, D.SE, D.NW, D.NE]:
-            rv.append(self + i)
-
-        return rv
-
-    def can_single_step(self, destination: C, grid: Optional[List[str]] = None) -> bool:
+        # For BFS related reasons, this should return the tiles in a specific order (see D.ADJACENT).
+        return [C(self.x + d.x, self.y + d.y) for d in D.ADJACENT]
+
+    def can_single_step(self, destination: C, grid: Optional[Grid] = None) -> bool:
+        # Every legal single step from every tile is precomputed in the L.PLAYER_STEPS masks, which hold the result of
+        # C.trace_single_step for all eight king moves. Tiles outside the map fall back to tracing the step.
+        if grid is None and 0 <= self.x < L.WIDTH and 0 <= self.y < L.HEIGHT:
+            return Terrain.can_player_step(self, destination.x - self.x, destination.y - self.y)
+        return self.trace_single_step(destination, grid)
+
+    def trace_single_step(self, destination: C, grid: Optional[Grid] = None) -> bool:
+        # This is the single step algorithm that L.PLAYER_STEPS and L.NPC_STEPS precompute for every tile (see
+        # tables.player_steps and tables.npc_steps). Changing how stepping works here requires bumping P.VERSION.
+        #
         # We can only single step to a square that's king-movable (one of the eight squares around us).
         if self.chebyshev_to(destination) > 1:
             return False
@@ -283,18 +304,24 @@ class C:  # Tile, Location, Displacement
         x_tile = C(self.x + move.x, self.y)
         y_tile = C(self.x, self.y + move.y)
 
-        recursion_function: Callable = grid is not None and self.can_npc_single_step or self.can_single_step
+        recursion_function: Callable = grid is not None and self.trace_npc_single_step or self.trace_single_step
 
         if self.chebyshev_to(destination) == 1 and \
            recursion_function(x_tile, grid) and \
            recursion_function(y_tile, grid) and \
-           x_tile.can_single_step(destination) and \
-           y_tile.can_single_step(destination):
+           x_tile.trace_single_step(destination) and \
+           y_tile.trace_single_step(destination):
             return True
 
         return False
 
-    def can_npc_single_step(self, destination: C, grid: List[str]) -> bool:
+    def can_npc_single_step(self, destination: C, grid: Grid) -> bool:
+        # Looked up from L.NPC_STEPS, with player blocking checked against the grid. See Terrain.can_npc_step.
+        if 0 <= self.x < L.WIDTH and 0 <= self.y < L.HEIGHT:
+            return Terrain.can_npc_step(self, destination.x - self.x, destination.y - self.y, grid)
+        return self.trace_npc_single_step(destination, grid)
+
+    def trace_npc_single_step(self, destination: C, grid: Grid) -> bool:
         if Terrain.level_at(destination) > 1:
             # The penance cannot step on all cannon squares.
             return False
@@ -304,7 +331,7 @@ class C:  # Tile, Location, Displacement
             # Note that a player stepping you unblocks the tile (Runescape mechanism).
             return False
 
-        return self.can_single_step(destination, grid)
+        return self.trace_single_step(destination, grid)
 
     def can_single_see(self, destination: C) -> bool:
         # Very similar in mechanics for C.can_single_step, but for seeing.
@@ -319,6 +346,17 @@ class C:  # Tile, Location, Displacement
 
     # TODO: REMEMBER Sight is required for Player to launch an attack against a CombatNpc
     def can_see(self, destination: C) -> bool:
+        # Line of sight between two tiles of the map is looked up from the precomputed table in V.
+        # Only tiles outside the map fall back to tracing the line of sight tile by tile.
+        if 0 <= self.x < V.WIDTH and 0 <= self.y < V.HEIGHT and \
+           0 <= destination.x < V.WIDTH and 0 <= destination.y < V.HEIGHT:
+            return V.sees(self.id, destination.id)
+        return self.trace_sight(destination)
+
+    def trace_sight(self, destination: C) -> bool:
+        # This is the line of sight algorithm that V precomputes for every pair of tiles (see tables.line_of_sight).
+        # Changing how sight works here requires bumping V.VERSION so that the persisted table gets rebuilt.
+        #
         # We have an iterator that starts at self, and is supposed to reach destination by traversing in blocks of
         # absolute magnitude of 1 in the long axis and slope in the short axis (with the respective sign for direction).
         iterator = self.copy()
@@ -406,7 +444,13 @@ class C:  # Tile, Location, Displacement
         return self.chebyshev_to(target.location) <= E.DROPPED_ITEM_RENDER_DISTANCE
 
     def get_runner_zone(self) -> C:
-        return (self - E.RUNNER_ZONE_EDGE) // E.RUNNER_ZONE_DIM
+        return C((self.x - E.RUNNER_ZONE_EDGE.x) // E.RUNNER_ZONE_DIM,
+                 (self.y - E.RUNNER_ZONE_EDGE.y) // E.RUNNER_ZONE_DIM)
+
+    def is_in_runner_zone(self, zone: C) -> bool:
+        # Same as self.get_runner_zone() == zone, without creating the zone.
+        return (self.x - E.RUNNER_ZONE_EDGE.x) // E.RUNNER_ZONE_DIM == zone.x and \
+            (self.y - E.RUNNER_ZONE_EDGE.y) // E.RUNNER_ZONE_DIM == zone.y
 
     def clamp(self, floor: C = None, ceil: C = None) -> C:
         # Clamps a C to only take values between a specified range.
@@ -439,6 +483,23 @@ class D:  # Direction
     NE = N + E
     NW = N + W
 
+    # The directions above are shared constants, and must never be modified in place.
+
+    # For BFS related reasons, adjacent tiles are always visited in this order.
+    # Game tends for x movement (east/west) before y movement (north/south).
+    # Game tends for negative x movement (west), and positive y movement (south) before their direction opposites.
+    # Game tends for rook movement before bishop movement.
+    # Keep in sync with tables.ADJACENCY.
+    ADJACENT: List[C] = [W, E, S, N, SW, SE, NW, NE]
+
+    # The direction of every single step (dx, dy), indexed by 3 * dy + dx + 4. Check D.step.
+    STEPS: List[C] = [NW, N, NE, W, X, E, SW, S, SE]
+
+    @staticmethod
+    def step(dx: int, dy: int) -> C:
+        # Returns the shared direction constant for a single step, without allocating.
+        return D.STEPS[3 * dy + dx + 4]
+
 
 class Y:  # Inventory
     # 0, 1, 2 = typical cdh items. 3 = hammer/vial/bag, 4 = logs, e = empty.
@@ -481,10 +542,13 @@ class Locatable:  # Used by: [Unit, GameObject, DroppedItem]
 
         # I know this looks ugly, but this is how we'll be able to find Locatables
         # from our interface in order to draw them.
-        self.uuid: int = id(self)
         self.game = game
-        self.game.locatables.append(self)
-        self.game.uuids.append(self.uuid)
+        self.uuid: int = self.game.register(self)
+
+    def deregister(self) -> None:
+        # Called once a Locatable leaves the game for good (despawned, eaten, picked up), so that it can be garbage
+        # collected, and so that clicks on it are ignored.
+        self.game.deregister(self)
 
     def is_followable(self) -> bool:
         # Dead NPCs are not followable.
@@ -508,14 +572,33 @@ class Inspectable:
     # This interface also has a nice function for stalling actions.
     def __init__(self, arg):  # arg: Game
         self.arg = arg
-        self.locatables: List[Locatable] = []
-        self.uuids: List[int] = []
+        # Live locatables by uuid. Uuids count up from 0 and are never reused, even across waves, so that a click on
+        # something that is gone cannot land on something else.
+        self.locatables: Dict[int, Locatable] = {}
+        self.total_locatables: int = 0  # Every locatable ever registered. This is also the next uuid.
         self.wave_number: Optional[int] = None
 
-        self.text_payload = []  # An array of things printed by Wave and Npc objects. This is exhausted by an interface.
+        self.events: EventLog = EventLog()  # Events logged by Wave, Npc and Player objects. An interface drains it.
+
+        # Inspectable.occupancy of the tick and wave it was rendered on, shared by every observation taken on them.
+        self.occupancy_cache: Optional[Tuple[int, Any, np.ndarray]] = None
+
+    def register(self, locatable: Locatable) -> int:
+        uuid = self.total_locatables
+        self.locatables[uuid] = locatable
+        self.total_locatables += 1
+        return uuid
+
+    def deregister(self, locatable: Locatable) -> None:
+        self.locatables.pop(locatable.uuid, None)
 
-    def find_by_uuid(self, uuid: int) -> Locatable:
-        return self.locatables[self.uuids.index(uuid)]
+    @property
+    def live_locatables(self) -> int:
+        return len(self.locatables)
+
+    def find_by_uuid(self, uuid: int) -> Optional[Locatable]:
+        # None if nothing by that uuid is in the game anymore.
+        return self.locatables.get(uuid)
 
     @property
     def wave(self):  # -> Wave
@@ -531,6 +614,14 @@ class Inspectable:
 
         raise RuntimeError("Something weird happened and we reached this point.")
 
+    @property
+    def rng(self):  # -> Rng
+        return self.arg.rng
+
+    @property
+    def fast_forward(self) -> bool:
+        return self.arg.fast_forward
+
     @property
     def ai(self) -> Dict:
         assert self.arg.ai is not None, \
@@ -554,19 +645,29 @@ class Inspectable:
 
     @property
     def map(self) -> List[str]:
-        return self.arg.render_map()
+        return self.arg.render_map().to_list()
 
     @property
     def original_map(self) -> List[str]:
         return MAP
 
     @property
-    def block_map(self) -> List[str]:
+    def block_map(self) -> Grid:
         return self.arg.block_map
 
     @property
     def player_map(self) -> List[str]:
-        return self.arg.render_map(players_only=True)
+        return self.arg.render_map(players_only=True).to_list()
+
+    @property
+    def occupancy(self) -> np.ndarray:
+        # Rendered once per tick (see Game.render_occupancy). Callers must not modify it.
+        cache = self.occupancy_cache
+        if cache is None or cache[0] != self.arg.tick or cache[1] is not self.arg.wave:
+            occupancy = self.arg.render_occupancy()
+            occupancy.setflags(write=False)
+            cache = self.occupancy_cache = (self.arg.tick, self.arg.wave, occupancy)
+        return cache[2]
 
     def stall(self, action: Action) -> None:
         self.arg.players.main_attacker.stall_queue.append(action)
@@ -583,34 +684,100 @@ class Targeting:
         ]
 
     @staticmethod
-    def choice(candidates: List[Locatable], center: C = None, radius: int = None) -> Optional[Locatable]:
+    def choice(candidates: List[Locatable], center: C = None, radius: int = None,
+               rng: Optional[Random] = None) -> Optional[Locatable]:
+        # Pass the game's rng (Inspectable.rng.targeting). Only code outside of a game should leave it out.
         if center is not None:
             candidates = Targeting.filter_by_sight(candidates, center, radius)
 
         if len(candidates) == 0:
             return None
 
-        return choice(candidates)
+        return (rng or random).choice(candidates)
+
+
+class Grid:
+    # A mutable copy of MAP (check Terrain.new), used for maps that change every tick, like Game.block_map and the
+    # rendered maps. Letters are stored as latin-1 bytes in a single flat bytearray indexed by tile id (see C.id), so
+    # that changing a letter is a single in-place write instead of rebuilding a row string.
+    #
+    # Code that expects the List[str] form of a map (like MAP itself) should convert at the edges with Grid.to_list.
+    WIDTH: int = len(MAP[0])
+    HEIGHT: int = len(MAP)
+    TEMPLATE: bytes = "".join(MAP).encode("latin-1")
+
+    __slots__ = ("cells",)
+
+    def __init__(self, rows: Optional[List[str]] = None):
+        if rows is None:
+            self.cells: bytearray = bytearray(Grid.TEMPLATE)
+        else:
+            assert len(rows) == Grid.HEIGHT and all(len(row) == Grid.WIDTH for row in rows), \
+                "A Grid can only be created from rows of the same dimensions as MAP."
+            self.cells = bytearray("".join(rows).encode("latin-1"))
+
+    def __str__(self) -> str:
+        return "\n".join(self.to_list())
+
+    def __eq__(self, other: Grid) -> bool:
+        return isinstance(other, Grid) and self.cells == other.cells
+
+    def copy(self) -> Grid:
+        rv = Grid.__new__(Grid)
+        rv.cells = self.cells.copy()
+        return rv
+
+    def letter_at(self, x: int, y: int) -> str:
+        return chr(self.cells[y * Grid.WIDTH + x])
+
+    def set_letter(self, x: int, y: int, letter: str) -> None:
+        self.cells[y * Grid.WIDTH + x] = ord(letter)
+
+    def to_list(self) -> List[str]:
+        cells = self.cells
+        return [cells[i:i + Grid.WIDTH].decode("latin-1") for i in range(0, len(cells), Grid.WIDTH)]
+
+    def as_array(self) -> np.ndarray:
+        # A writable (y, x) uint8 view over the same memory, matching the layout of L.LETTER.
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(Grid.HEIGHT, Grid.WIDTH)
 
 
 class Terrain:
     # All methods and constants of class Terrain should be static.
     BLOCKED_BY_PLAYER = "p"
+    BLOCKED_BY_PLAYER_BYTE: int = ord(BLOCKED_BY_PLAYER)  # How BLOCKED_BY_PLAYER is stored in a Grid.
     BLOCKED = "#qweyKkRrPX$"
     SIGHT_BLOCKED = "#qweyRr"
     HIGH_LEVEL = "^KkRr"
     PENANCE = "@%&?"
     PLAYERS = "EQZWY"
 
+    # Unit occupancy (see Game.render_occupancy) is a padded uint8 layer (see L.pad) in which the bit
+    # OCCUPANCY_BITS[key] of a tile is set if a unit of that kind stands on it. Penance use their keys in Penance.
+    # Unlike rendered maps, units on the same tile do not hide each other.
+    OCCUPIED_BY_PLAYER = "p"
+    OCCUPANCY_BITS: Dict[str, int] = {OCCUPIED_BY_PLAYER: 0, "a": 1, "s": 2, "d": 3, "h": 4}
+
+    @staticmethod
+    def channels(center: C, radius: int, occupancy: np.ndarray) -> np.ndarray:
+        # All the observation channels around center, stacked into a (channel, y, x) array. The channel order is
+        # occupiable, seeable, level, players, runners, healers, same as the individual Terrain.channel_* methods.
+        return Terrain.batch_channels(np.array([center.x]), np.array([center.y]), radius, occupancy)[0]
+
     @staticmethod
-    def new() -> List[str]:
-        return MAP.copy()
+    def batch_channels(xs: np.ndarray, ys: np.ndarray, radius: int, occupancy: np.ndarray) -> np.ndarray:
+        # Terrain.channels for many centers at once, returning a (center, channel, y, x) array.
+        units = occupancy >> np.array([Terrain.OCCUPANCY_BITS[key] for key in (Terrain.OCCUPIED_BY_PLAYER, "d", "h")],
+                                      dtype=np.uint8)[:, None, None] & 1
+        return L.windows(np.concatenate([L.STATIC_CHANNELS_PADDED, units]), xs, ys, radius)
 
     @staticmethod
-    def print(grid: Optional[List[str]] = None) -> None:
-        if grid is None:
-            grid = MAP
-        rv = "\n".join(grid)
+    def new() -> Grid:
+        return Grid()
+
+    @staticmethod
+    def print(grid: Optional[Grid] = None) -> None:
+        rv = grid is None and "\n".join(MAP) or str(grid)
         # from os import system
         # system('clear')
         game_print("Terrain.print", "\n", rv)
@@ -626,135 +793,118 @@ class Terrain:
 
     @staticmethod
     def is_occupiable(tile: C) -> bool:
-        return MAP[tile.y][tile.x] not in Terrain.BLOCKED
+        return L.OCCUPIABLE_ROWS[tile.y][tile.x]
 
     @staticmethod
-    def channel_occupiable(center: C, radius: int) -> List[List[int]]:
-        return [
-            [
-                Terrain.is_occupiable(center + C(i, j)) and 1 or 0
-                for i in range(-radius, radius + 1)
-            ] for j in range(-radius, radius + 1)
-        ]
+    def channel_occupiable(center: C, radius: int) -> np.ndarray:
+        return L.window(L.OCCUPIABLE_PADDED, center, radius)
 
     @staticmethod
     def is_seeable(tile: C) -> bool:
-        return MAP[tile.y][tile.x] not in Terrain.SIGHT_BLOCKED
+        return L.SEEABLE_ROWS[tile.y][tile.x]
 
     @staticmethod
-    def channel_seeable(center: C, radius: int) -> List[List[int]]:
-        return [
-            [
-                Terrain.is_seeable(center + C(i, j)) and 1 or 0
-                for i in range(-radius, radius + 1)
-            ] for j in range(-radius, radius + 1)
-        ]
+    def channel_seeable(center: C, radius: int) -> np.ndarray:
+        return L.window(L.SEEABLE_PADDED, center, radius)
 
     @staticmethod
-    def is_blocked(tile: C, grid: List[str]) -> bool:
+    def is_blocked(tile: C, grid: Grid) -> bool:
         # Returns true for a tile that is blocked by a player that hasn't been run through.
-        return grid[tile.y][tile.x] == Terrain.BLOCKED_BY_PLAYER
+        return grid.cells[tile.y * Grid.WIDTH + tile.x] == Terrain.BLOCKED_BY_PLAYER_BYTE
 
     @staticmethod
-    def set_letter(tile: C, letter: str, grid: Optional[List[str]] = None) -> None:
-        if grid is None:
-            grid = MAP
-        grid[tile.y] = grid[tile.y][:tile.x] + letter + grid[tile.y][tile.x + 1:]
+    def can_player_step(tile: C, dx: int, dy: int) -> bool:
+        # Whether a player standing on tile (which has to be inside the map) can single step by (dx, dy).
+        if dx < -1 or dx > 1 or dy < -1 or dy > 1:
+            return False
+        bit = L.STEP_BITS[3 * dy + dx + 4]
+        return bit >= 0 and L.PLAYER_STEPS_ROWS[tile.y][tile.x] >> bit & 1 == 1
 
     @staticmethod
-    def block(tile: C, grid: List[str]) -> None:
+    def can_npc_step(tile: C, dx: int, dy: int, grid: Grid) -> bool:
+        # Whether an Npc standing on tile (which has to be inside the map) can single step by (dx, dy).
+        # The static part of the check is a bit in L.NPC_STEPS. The dynamic part is the player blocking overlay, which
+        # is read straight from the grid (Game.block_map): the destination tile and, for diagonal steps, both L-shaped
+        # neighbours need to not be blocked by a player.
+        if dx < -1 or dx > 1 or dy < -1 or dy > 1:
+            return False
+        bit = L.STEP_BITS[3 * dy + dx + 4]
+        if bit < 0 or not L.NPC_STEPS_ROWS[tile.y][tile.x] >> bit & 1:
+            return False
+        cells = grid.cells
+        i = tile.y * Grid.WIDTH + tile.x
+        if cells[i + dy * Grid.WIDTH + dx] == Terrain.BLOCKED_BY_PLAYER_BYTE:
+            return False
+        if dx != 0 and dy != 0:
+            return cells[i + dx] != Terrain.BLOCKED_BY_PLAYER_BYTE and \
+                cells[i + dy * Grid.WIDTH] != Terrain.BLOCKED_BY_PLAYER_BYTE
+        return True
+
+    @staticmethod
+    def set_letter(tile: C, letter: str, grid: Grid) -> None:
+        # MAP itself is never modified, since all the tables in L, V and P are built from it.
+        grid.cells[tile.y * Grid.WIDTH + tile.x] = ord(letter)
+
+    @staticmethod
+    def block(tile: C, grid: Grid) -> None:
         # Blocking by a player.
         Terrain.set_letter(tile, Terrain.BLOCKED_BY_PLAYER, grid)
 
     @staticmethod
-    def unblock(tile: C, grid: List[str]) -> None:
+    def unblock(tile: C, grid: Grid) -> None:
         # Unblocking by a player.
         Terrain.set_letter(tile, Terrain.letter_at(tile), grid)
 
     @staticmethod
-    def letter_at(tile: C, grid: Optional[List[str]] = None) -> str:
-        if grid is None:
-            grid = MAP
+    def letter_at(tile: C, grid: Optional[Grid] = None) -> str:
         if 0 < tile.x < E.MAP_DIM.x and 0 < tile.y < E.MAP_DIM.y:
-            return grid[tile.y][tile.x]
+            return grid is None and MAP[tile.y][tile.x] or chr(grid.cells[tile.y * Grid.WIDTH + tile.x])
 
         return "#"  # Out of bounds are all #.
 
     @staticmethod
-    def channel_healers(center: C, radius: int, grid: List[str]) -> List[List[int]]:
-        return [
-            [
-                Terrain.letter_at(center + C(i, j), grid) == F["h"] and 1 or 0
-                for i in range(-radius, radius + 1)
-            ] for j in range(-radius, radius + 1)
-        ]
+    def channel_healers(center: C, radius: int, occupancy: np.ndarray) -> np.ndarray:
+        return L.window(occupancy, center, radius) >> Terrain.OCCUPANCY_BITS["h"] & 1
 
     @staticmethod
-    def channel_runners(center: C, radius: int, grid: List[str]) -> List[List[int]]:
-        return [
-            [
-                Terrain.letter_at(center + C(i, j), grid) == F["d"] and 1 or 0
-                for i in range(-radius, radius + 1)
-            ] for j in range(-radius, radius + 1)
-        ]
+    def channel_runners(center: C, radius: int, occupancy: np.ndarray) -> np.ndarray:
+        return L.window(occupancy, center, radius) >> Terrain.OCCUPANCY_BITS["d"] & 1
 
     @staticmethod
-    def channel_players(center: C, radius: int, grid: List[str]) -> List[List[int]]:
-        return [
-            [
-                Terrain.letter_at(center + C(i, j), grid) in Terrain.PLAYERS and 1 or 0
-                for i in range(-radius, radius + 1)
-            ] for j in range(-radius, radius + 1)
-        ]
+    def channel_players(center: C, radius: int, occupancy: np.ndarray) -> np.ndarray:
+        return L.window(occupancy, center, radius) >> Terrain.OCCUPANCY_BITS[Terrain.OCCUPIED_BY_PLAYER] & 1
 
     @staticmethod
     def level_at(tile: C) -> int:
-        letter = MAP[tile.y][tile.x]
-        if letter in Terrain.HIGH_LEVEL:
-            return 2
-        if letter in ".":
-            return 1
-        return 0
+        return L.LEVEL_ROWS[tile.y][tile.x]
 
     @staticmethod
-    def channel_level(center: C, radius: int) -> List[List[int]]:
-        return [
-            [
-                Terrain.level_at(center + C(i, j)) == 2 and 1 or 0
-                for i in range(-radius, radius + 1)
-            ] for j in range(-radius, radius + 1)
-        ]
+    def channel_level(center: C, radius: int) -> np.ndarray:
+        return L.window(L.HIGH_LEVEL_PADDED, center, radius)
 
     @staticmethod
-    def find(letter) -> Optional[C]:
-        for row, row_string in enumerate(MAP):
-            col = row_string.find(letter)
-            if col != -1:
-                return C(col, row)
-        return None
+    def find(letter: str) -> Optional[C]:
+        # The first tile (in reading order) with this letter on MAP.
+        tiles = L.tiles(letter)
+        if len(tiles) == 0:
+            return None
+        return C.from_id(int(tiles[0]))
 
     @staticmethod
     def find_nearest(letter: str, location: C) -> Optional[C]:
-        rv = None
-        dist = E.MAP_MAX_DIST
-        for row, row_string in enumerate(MAP):
-            col = row_string.find(letter)
-            if col != -1:
-                tmp_rv = C(row, col)
-                tmp_dist = tmp_rv.chebyshev_to(location)
-                if tmp_dist < dist:
-                    rv = tmp_rv
-                    dist = tmp_dist
-        return rv
+        # The tile with this letter on MAP that is closest to location in chebyshev distance. Ties go to the first tile
+        # in reading order.
+        tiles = L.tiles(letter)
+        if len(tiles) == 0:
+            return None
+        ys, xs = np.divmod(tiles, L.WIDTH)
+        distance = np.maximum(np.abs(xs - location.x), np.abs(ys - location.y))
+        return C.from_id(int(tiles[np.argmin(distance)]))
 
     @staticmethod
-    def find_all(letter) -> List[Optional[C]]:
-        matches = []
-        for row, row_string in enumerate(MAP):
-            col = row_string.find(letter)
-            if col != -1:
-                matches.append(C(row, col))
-        return matches
+    def find_all(letter: str) -> List[C]:
+        # Every tile with this letter on MAP, in reading order.
+        return [C.from_id(tile) for tile in L.tiles(letter).tolist()]
 
     @staticmethod
     def tick_to_string(tick: int) -> str:
@@ -764,8 +914,8 @@ class Terrain:
 
     @staticmethod
     def filter_food_by_zone(food_list: List[Locatable], zone: C) -> List[Locatable]:
-        # This information should be memoized in the C++ version of this project.
-        return [food for food in food_list if food.location.get_runner_zone() == zone]
+        # Wave.dropped_food keeps food bucketed by zone (see DroppedFood.in_zone). This is for plain lists of food.
+        return [food for food in food_list if food.location.is_in_runner_zone(zone)]
 
     @staticmethod
     def parse_runner_movements(runner_movements: str) -> List[List[C]]:
@@ -778,6 +928,264 @@ class Terrain:
         ]
 
 
+class L:  # Layers
+    # All methods and constants of class L should be static.
+    #
+    # MAP compiled once into typed uint8 arrays that are indexed as layer[y, x]. The Terrain predicates read from these
+    # instead of scanning letter strings with `in` on every call.
+    #
+    # Indexing a numpy array with a single tile is slower than indexing a nested list, and single tile lookups happen
+    # hundreds of times per tick. This is why every layer also has a *_ROWS nested list mirror, which is what the
+    # single tile predicates use. Callers that need many tiles at once should use the array methods below instead.
+    LETTER: np.ndarray = np.array([[ord(letter) for letter in row] for row in MAP], dtype=np.uint8)
+    OCCUPIABLE: np.ndarray = np.isin(
+        LETTER, np.frombuffer(Terrain.BLOCKED.encode("latin-1"), dtype=np.uint8), invert=True
+    ).astype(np.uint8)
+    SEEABLE: np.ndarray = np.isin(
+        LETTER, np.frombuffer(Terrain.SIGHT_BLOCKED.encode("latin-1"), dtype=np.uint8), invert=True
+    ).astype(np.uint8)
+    LEVEL: np.ndarray = np.where(
+        np.isin(LETTER, np.frombuffer(Terrain.HIGH_LEVEL.encode("latin-1"), dtype=np.uint8)), 2,
+        np.where(LETTER == ord("."), 1, 0)
+    ).astype(np.uint8)
+
+    # Step masks. Bit i of a tile is set if a single step in direction tables.ADJACENCY[i] (W, E, S, N, SW, SE, NW, NE)
+    # is legal from that tile. Npc masks do not account for player blocking. Check Terrain.can_npc_step for that.
+    PLAYER_STEPS: np.ndarray = tables.player_steps(OCCUPIABLE, LEVEL)
+    NPC_STEPS: np.ndarray = tables.npc_steps(OCCUPIABLE, LEVEL)
+
+    # Layers are read-only. Anything that needs a mutable map should use Terrain.new() instead.
+    for layer in (LETTER, OCCUPIABLE, SEEABLE, LEVEL, PLAYER_STEPS, NPC_STEPS):
+        layer.flags.writeable = False
+    del layer
+
+    HEIGHT, WIDTH = LETTER.shape
+
+    OCCUPIABLE_ROWS: List[List[bool]] = OCCUPIABLE.astype(bool).tolist()
+    SEEABLE_ROWS: List[List[bool]] = SEEABLE.astype(bool).tolist()
+    LEVEL_ROWS: List[List[int]] = LEVEL.tolist()
+    PLAYER_STEPS_ROWS: List[List[int]] = PLAYER_STEPS.tolist()
+    NPC_STEPS_ROWS: List[List[int]] = NPC_STEPS.tolist()
+
+    # Maps a step (dx, dy) to its bit in the step masks through STEP_BITS[3 * dy + dx + 4]. Not moving is -1.
+    STEP_BITS: List[int] = [
+        tables.ADJACENCY.index((i % 3 - 1, i // 3 - 1)) if i != 4 else -1 for i in range(9)
+    ]
+
+    # Out of bounds tiles are all # (see Terrain.letter_at), so that is what they read as in the array methods.
+    OUT_OF_BOUNDS: int = ord("#")
+
+    # Observation windows (see Terrain.channel_*) are slices of layers padded by PADDING tiles on every side, so that a
+    # window around any tile in the map is a view, with no bounds checks. Tiles outside the map read as 0.
+    PADDING: int = max(HEIGHT, WIDTH)
+    PADDED_SHAPE: Tuple[int, int] = (HEIGHT + 2 * PADDING, WIDTH + 2 * PADDING)
+
+    @staticmethod
+    def pad(layer: np.ndarray, fill: int = 0) -> np.ndarray:
+        return np.pad(layer, L.PADDING, constant_values=fill)
+
+    @staticmethod
+    def unpadded(padded: np.ndarray) -> np.ndarray:
+        # The view of a padded layer that covers the map itself.
+        return padded[..., L.PADDING:L.PADDING + L.HEIGHT, L.PADDING:L.PADDING + L.WIDTH]
+
+    @staticmethod
+    def window(padded: np.ndarray, center: C, radius: int) -> np.ndarray:
+        # A (2 * radius + 1) square view of a padded layer around center, which has to be inside the map.
+        assert radius <= L.PADDING, "Windows cannot be larger than the layer padding."
+        x = center.x + L.PADDING
+        y = center.y + L.PADDING
+        return padded[..., y - radius:y + radius + 1, x - radius:x + radius + 1]
+
+    @staticmethod
+    def windows(padded: np.ndarray, xs: np.ndarray, ys: np.ndarray, radius: int) -> np.ndarray:
+        # L.window for many centers at once. Returns a (center, ..., y, x) array, which is a copy.
+        assert radius <= L.PADDING, "Windows cannot be larger than the layer padding."
+        size = 2 * radius + 1
+        views = np.lib.stride_tricks.sliding_window_view(padded, (size, size), axis=(-2, -1))
+        rv = views[..., np.asarray(ys) + L.PADDING - radius, np.asarray(xs) + L.PADDING - radius, :, :]
+        return np.moveaxis(rv, -3, 0)
+
+    OCCUPIABLE_PADDED: np.ndarray = np.pad(OCCUPIABLE, PADDING)
+    SEEABLE_PADDED: np.ndarray = np.pad(SEEABLE, PADDING)
+    HIGH_LEVEL_PADDED: np.ndarray = np.pad((LEVEL == 2).astype(np.uint8), PADDING)
+    STATIC_CHANNELS_PADDED: np.ndarray = np.stack([OCCUPIABLE_PADDED, SEEABLE_PADDED, HIGH_LEVEL_PADDED])
+    for layer in (OCCUPIABLE_PADDED, SEEABLE_PADDED, HIGH_LEVEL_PADDED, STATIC_CHANNELS_PADDED):
+        layer.flags.writeable = False
+    del layer
+
+    # The sorted tile ids of every letter on MAP. Check L.tiles.
+    TILES_BY_LETTER: Dict[str, np.ndarray] = tables.letter_index(LETTER)
+    for layer in TILES_BY_LETTER.values():
+        layer.flags.writeable = False
+    del layer
+    NO_TILES: np.ndarray = np.zeros(0, dtype=np.intp)
+
+    @staticmethod
+    def tiles(letter: str) -> np.ndarray:
+        # The sorted tile ids (see C.id) of every tile with this letter on MAP, without scanning MAP.
+        return L.TILES_BY_LETTER.get(letter, L.NO_TILES)
+
+    @staticmethod
+    def coordinates(tiles: List[C]) -> Tuple[np.ndarray, np.ndarray]:
+        # Converts a list of tiles to the (xs, ys) pair that the array methods below expect.
+        return np.array([tile.x for tile in tiles], dtype=np.intp), np.array([tile.y for tile in tiles], dtype=np.intp)
+
+    @staticmethod
+    def at(layer: np.ndarray, xs: np.ndarray, ys: np.ndarray, fill: int = 0) -> np.ndarray:
+        # Gathers layer values for many tiles at once. Out of bounds tiles take the value of fill.
+        xs = np.asarray(xs, dtype=np.intp)
+        ys = np.asarray(ys, dtype=np.intp)
+        inside = (xs >= 0) & (xs < layer.shape[1]) & (ys >= 0) & (ys < layer.shape[0])
+        rv = np.full(xs.shape, fill, dtype=layer.dtype)
+        rv[inside] = layer[ys[inside], xs[inside]]
+        return rv
+
+    @staticmethod
+    def occupiable(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        return L.at(L.OCCUPIABLE, xs, ys).astype(bool)
+
+    @staticmethod
+    def seeable(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        return L.at(L.SEEABLE, xs, ys).astype(bool)
+
+    @staticmethod
+    def level(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        return L.at(L.LEVEL, xs, ys)
+
+    @staticmethod
+    def letter(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        # Letter codes are the latin-1 ordinals of the MAP letters. Use chr() to get the letter back.
+        return L.at(L.LETTER, xs, ys, L.OUT_OF_BOUNDS)
+
+
+class V:  # Visibility
+    # All methods and constants of class V should be static.
+    #
+    # The line of sight oracle. It holds whether every tile of the map can see every other tile, as computed by
+    # C.trace_sight, which makes C.can_see a single lookup instead of a walk. The table is a bitset per tile (a few
+    # hundred KB), and it is only built the first time the map changes, after which it is loaded from disk.
+    VERSION: int = 1  # Bump this when C.trace_sight or tables.line_of_sight change.
+
+    HEIGHT, WIDTH = L.LEVEL.shape
+    TABLE: np.ndarray = tables.cached(
+        "sight", VERSION, (L.LEVEL, L.SEEABLE), lambda: tables.build_sight_table(L.LEVEL, L.SEEABLE)
+    )[0]
+    STRIDE: int = TABLE.shape[1]
+    BITS: bytes = TABLE.tobytes()  # Indexing bytes is much faster than indexing a numpy array for single lookups.
+
+    @staticmethod
+    def sees(source: int, destination: int) -> bool:
+        # Both arguments are tile ids (y * V.WIDTH + x).
+        return (V.BITS[source * V.STRIDE + (destination >> 3)] >> (destination & 7)) & 1 == 1
+
+    @staticmethod
+    def seen_from(tile: C) -> np.ndarray:
+        # Every tile that can be seen from the given tile, as a boolean layer indexed [y, x].
+        row = np.unpackbits(V.TABLE[tile.id], bitorder="little")
+        return row[:V.HEIGHT * V.WIDTH].reshape(V.HEIGHT, V.WIDTH).astype(bool)
+
+
+class P:  # Pathing
+    # All methods and constants of class P should be static.
+    #
+    # Player pathing only depends on MAP, since players are never blocked by other players. This means that the
+    # breadth-first search in Player.search_path can be run to completion from every tile a player can stand on once,
+    # and kept in all-pairs tables (see tables.build_path_tables). Pathing then walks the tables back from the
+    # destination instead of searching, while still ending up with the same path search_path would, ties included.
+    VERSION: int = 1  # Bump this when Player.search_path, C.trace_single_step or the tables builders change.
+
+    PARENT, ORDER, DISTANCE = tables.cached(
+        "paths", VERSION, (L.OCCUPIABLE, L.LEVEL), lambda: tables.build_path_tables(L.OCCUPIABLE, L.PLAYER_STEPS)
+    )
+    XS, YS = tables.tile_coordinates(L.OCCUPIABLE.shape)
+
+    # The graphs of legal single steps, in compressed sparse row form (see tables.adjacency_csr). Neighbours keep the
+    # D.ADJACENT order that breadth-first searches rely on. The Npc graph leaves out player blocking, which changes
+    # every tick (check Terrain.can_npc_step). The *_NEIGHBOURS lists hold the same graphs for iterating from Python
+    # without allocating anything.
+    PLAYER_INDPTR, PLAYER_INDICES = tables.adjacency_csr(L.PLAYER_STEPS)
+    NPC_INDPTR, NPC_INDICES = tables.adjacency_csr(L.NPC_STEPS)
+    for layer in (PLAYER_INDPTR, PLAYER_INDICES, NPC_INDPTR, NPC_INDICES):
+        layer.flags.writeable = False
+    del layer
+    PLAYER_NEIGHBOURS: List[List[int]] = tables.neighbours(PLAYER_INDPTR, PLAYER_INDICES)
+    NPC_NEIGHBOURS: List[List[int]] = tables.neighbours(NPC_INDPTR, NPC_INDICES)
+
+    @staticmethod
+    def neighbours(tile: int, npc: bool = False) -> List[int]:
+        # The tile ids a single step away from the tile id tile. The returned list is shared, and must not be modified.
+        return (npc and P.NPC_NEIGHBOURS or P.PLAYER_NEIGHBOURS)[tile]
+
+    @staticmethod
+    def export_graph(path: str, npc: bool = False) -> None:
+        # Saves a step graph to a .npz file for offline analysis, along with what is needed to make sense of it.
+        # Load it with np.load(path), then use scipy.sparse.csr_matrix((data, indices, indptr)) or any CSR tooling.
+        indptr, indices = npc and (P.NPC_INDPTR, P.NPC_INDICES) or (P.PLAYER_INDPTR, P.PLAYER_INDICES)
+        np.savez_compressed(
+            path,
+            indptr=indptr,
+            indices=indices,
+            data=np.ones(indices.shape, dtype=np.uint8),
+            xs=P.XS,
+            ys=P.YS,
+            shape=np.array(L.OCCUPIABLE.shape),
+            directions=np.array(tables.ADJACENCY),
+        )
+
+    @staticmethod
+    def covers(tile: C) -> bool:
+        # The tables only have rows for tiles a player can stand on.
+        return 0 <= tile.x < V.WIDTH and 0 <= tile.y < V.HEIGHT and L.OCCUPIABLE_ROWS[tile.y][tile.x]
+
+    @staticmethod
+    def distance(start: C, destination: C) -> int:
+        # The number of steps on the player path from start to destination, or -1 if there is no such path.
+        if not P.covers(start) or not (0 <= destination.x < V.WIDTH and 0 <= destination.y < V.HEIGHT):
+            return -1
+        return int(P.DISTANCE[start.id, destination.id])
+
+    @staticmethod
+    def target(source: int, destination: C) -> int:
+        # The tile id that Player.search_path from the tile id source towards destination ends on.
+        if 0 <= destination.x < V.WIDTH and 0 <= destination.y < V.HEIGHT:
+            target = destination.id
+            if target != source and P.ORDER[source, target] >= 0:
+                return target
+
+        # The destination cannot be reached (or is where we already are), so search_path would have gone through every
+        # reachable tile, and ended on the first one it popped among the ones with the smallest taxicab distance to the
+        # destination. Only tiles that are closer than the chebyshev distance from the source count.
+        order = P.ORDER[source]
+        taxicab = np.abs(P.XS - destination.x) + np.abs(P.YS - destination.y)
+        candidates = (order >= 0) & (taxicab < max(abs(source % V.WIDTH - destination.x),
+                                                   abs(source // V.WIDTH - destination.y)))
+        if not candidates.any():
+            return source
+        key = np.where(candidates, taxicab * (V.HEIGHT * V.WIDTH) + order, np.iinfo(np.int64).max)
+        return int(np.argmin(key))
+
+    @staticmethod
+    def path(start: C, destination: C) -> C:
+        # Same return value as Player.search_path. The destination tile is returned, with the C.parent chain leading
+        # back to start. The start tile has to be covered by the tables.
+        source = start.id
+        tile = P.target(source, destination)
+
+        parent_row = P.PARENT[source]
+        tiles = []
+        while tile != source:
+            tiles.append(tile)
+            tile = int(parent_row[tile])
+
+        rv = start
+        for tile in reversed(tiles):
+            parent = rv
+            rv = C.from_id(tile)
+            rv.parent = parent
+        return rv
+
+
 class E:  # Element - All constants are of type C unless otherwise stated.
     # Npcs
     FIGHTER_SPAWN = Terrain.find("A")
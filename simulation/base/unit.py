@@ -4,6 +4,7 @@ from abc import abstractmethod
 from typing import Optional, List, Deque, Tuple, Type, Callable
 from collections import deque
 
+import log
 from log import debug, J, C as LOG_C
 from .terrain import Terrain, C, D, Locatable, Inspectable
 
@@ -92,7 +93,8 @@ class Unit(Locatable):
                 rv = action(*self.action_args)
             except AssertionError as e:
                 rv = False
-                debug("Unit.act", f"{self} returned False due to the assertion: {str(e)}")
+                if log.DEBUG:
+                    debug("Unit.act", "Returned False due to an assertion.", unit=self, assertion=str(e))
 
             self.action_args = ()
             self.stop_movement()
@@ -154,11 +156,13 @@ class Unit(Locatable):
             return False
 
         if len(self.choice_arg) > 0 and self.followee not in self.choice_arg:
-            debug("Unit.refollow", f"{self} was following {self.followee} but it can't anymore.")
+            if log.DEBUG:
+                debug("Unit.refollow", "Can't follow its followee anymore.", unit=self, followee=self.followee.uuid)
             self.stop_movement()
             return False
 
-        debug("Unit.refollow", f"{self} is following {self.followee} and decided to refollow it.")
+        if log.DEBUG:
+            debug("Unit.refollow", "Decided to refollow its followee.", unit=self, followee=self.followee.uuid)
         self.follow(self.followee)  # Re-follow a followee that might move.
         return True
 
@@ -209,6 +213,6 @@ class Unit(Locatable):
         tmp = Terrain.new()
         for tile in self.pathing_queue:
             Terrain.set_letter(tile, "@", tmp)
-        rv = "\n".join(tmp)
+        rv = str(tmp)
         del tmp
         return rv
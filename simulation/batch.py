@@ -0,0 +1,746 @@
+from random import Random
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+from .base.dropped_item import Food
+from .base.game_object import Trap, WEGameObject
+from .base.npc import Npc
+from .base.rng import Rng
+from .base.terrain import C, D, E, Grid, Inspectable, L, Targeting, Terrain
+from .base.unit import Unit
+from .game import Game
+from .penance import Healer, Runner
+
+
+# Batched simulation of the penance of many games at once.
+#
+# The runners and healers of K games of the same wave are kept in struct-of-arrays form: every Npc field that changes
+# during a wave is one (K, N) array, where N is the number of slots per game. A tick advances every npc of every game
+# with a handful of array operations, instead of walking each npc through Npc.__call__, Npc.do_cycle, Npc.step and
+# Npc.path. Only runners that have food to look at or eat are walked one by one (see Batch.forage), since food and traps
+# are shared by the runners of a game.
+#
+# The games of a batch are played with idle players (no Ai). What players do to the penance is given per game as a
+# Script instead: dropping and picking up food, repairing traps, and poisoning healers. Idle players stand out of the
+# sight of the healer spawn, so healers never leave their initial state (see Healer.in_initial_state): they stand still,
+# and only take poison damage. Runners only interact with players by being blocked by them. Fighters and rangers are
+# never spawned (see Fighter.SPAWNS). Use Simulator or MonteCarlo for waves with Ai.
+#
+# Random walks draw from the same per-game stream as Game (Rng.runners), so game k of a batch plays out tick for tick
+# like Game(seeds[k]) with the same wave, runner movements and script. Check validate.
+
+
+class Script:
+    # What the players of a batched game do, as events that happen after the game tick they are on, in order:
+    #   (tick, Script.FOOD, x, y, is_correct): food gets dropped on tile (x, y).
+    #   (tick, Script.PICK, n, _, _): the food of the nth FOOD event gets picked up, if it is still on the map.
+    #   (tick, Script.REPAIR, which, _, _): a trap (WEGameObject.EAST or WEGameObject.WEST) gets repaired.
+    #   (tick, Script.POISON, i, _, _): the healer at index i of Penance.healers gets poisoned, if it is alive.
+    FOOD, PICK, REPAIR, POISON = 0, 1, 2, 3
+
+    def __init__(self, events: Optional[List[Tuple[int, int, int, int, int]]] = None):
+        self.ticks: Dict[int, List[Tuple[int, int, int, int]]] = {}
+        for tick, *event in sorted(events or [], key=lambda e: e[0]):
+            self.ticks.setdefault(tick, []).append(tuple(event))
+
+    def at(self, tick: int) -> List[Tuple[int, int, int, int]]:
+        return self.ticks.get(tick, [])
+
+    def apply(self, game: Game, foods: List[Food]) -> None:
+        # Plays the events of the tick the game is on in the object engine. foods keeps the food of every FOOD event.
+        wave = game.wave
+        for kind, a, b, c in self.at(wave.relative_tick):
+            if kind == Script.FOOD:
+                foods.append(Food(C(a, b), Food.TOFU, bool(c), game.inspectable))
+                wave.dropped_food.add(foods[-1])
+            if kind == Script.PICK and foods[a] in wave.dropped_food:
+                wave.dropped_food.remove(foods[a])
+                foods[a].deregister()
+            if kind == Script.REPAIR:
+                wave.game_objects.traps[a].charges = Trap.MAX_CHARGES
+            if kind == Script.POISON and a < len(wave.penance.healers) and wave.penance.healers[a].is_alive():
+                wave.penance.healers[a].apply_poison()
+
+    @staticmethod
+    def random(rng: Random, drops: int = 60, poisons: int = 40) -> "Script":
+        # A random script, mostly to validate with: food dropped around the traps (mostly correct, half of it beside a
+        # trap, and some of it picked back up), a trap repair every other cycle, and healer poisonings.
+        events = []
+        for n, tick in enumerate(sorted(rng.randrange(Inspectable.WAVE) for _ in range(drops))):
+            trap = rng.choice(Batch.TRAPS)
+            if rng.random() < 0.5:
+                x, y = trap.x + rng.randint(-1, 1), trap.y + rng.randint(-1, 1)
+            else:
+                x, y = trap.x + rng.randint(-3, 3), trap.y + rng.randint(-8, 2)
+            events.append((tick, Script.FOOD, x, y, rng.random() < 0.75))
+            if rng.random() < 0.2:
+                events.append((tick + rng.randint(1, 20), Script.PICK, n, 0, 0))
+        for tick in range(2 * Inspectable.CYCLE, Inspectable.WAVE, 2 * Inspectable.CYCLE):
+            events.append((tick, Script.REPAIR, rng.choice([WEGameObject.EAST, WEGameObject.WEST]), 0, 0))
+        for _ in range(poisons):
+            events.append((rng.randrange(Inspectable.WAVE), Script.POISON, rng.randrange(4), 0, 0))
+        return Script(events)
+
+
+class Species:
+    # The struct-of-arrays store of a penance species, along with its Penance.spawns bookkeeping. Slot s of game k is in
+    # use if active[k, s]. Slots are reused once their npc despawns, so the order of the npcs of a game (which matters for
+    # the order of random draws and the Penance.tick_species quirks) is kept in seq, the running count of spawns.
+    NPC: Type[Npc] = None
+    KEY: str = None  # The Penance key of the species.
+    SPAWN: C = None
+    FIELDS: Tuple[str, ...] = ("active", "seq", "x", "y", "cycle", "hitpoints", "despawn_i", "alive", "death_tick")
+
+    def __init__(self, wave_number: int, games: int):
+        self.wave_number: int = wave_number
+        at_once, reserves = self.NPC.SPAWNS[wave_number]
+        self.at_once: int = at_once
+        self.reserves: np.ndarray = np.full(games, at_once + reserves, dtype=np.int32)
+        self.due_to_spawn: np.ndarray = np.zeros(games, dtype=bool)
+        self.spawned: int = 0
+
+        slots = (games, at_once + 2)
+        self.active: np.ndarray = np.zeros(slots, dtype=bool)
+        self.seq: np.ndarray = np.zeros(slots, dtype=np.int64)
+        self.x: np.ndarray = np.zeros(slots, dtype=np.int32)
+        self.y: np.ndarray = np.zeros(slots, dtype=np.int32)
+        self.cycle: np.ndarray = np.zeros(slots, dtype=np.int32)
+        self.hitpoints: np.ndarray = np.zeros(slots, dtype=np.int32)
+        self.despawn_i: np.ndarray = np.zeros(slots, dtype=np.int32)
+        self.alive: np.ndarray = np.zeros(slots, dtype=bool)
+        self.death_tick: np.ndarray = np.zeros(slots, dtype=np.int32)
+
+    @property
+    def slots(self) -> int:
+        return self.active.shape[1]
+
+    def grow(self) -> None:
+        # Doubles the number of slots of every game.
+        for field in self.FIELDS:
+            array = getattr(self, field)
+            setattr(self, field, np.concatenate([array, np.zeros_like(array)], axis=1))
+
+    def ordered(self, k: int) -> List[int]:
+        # The slots of game k in the order of their Penance list.
+        slots = np.flatnonzero(self.active[k])
+        return slots[np.argsort(self.seq[k, slots])].tolist()
+
+    def has_escaped_at(self, k: int, s: int) -> bool:
+        return False
+
+    def spawn(self, ks: np.ndarray) -> np.ndarray:
+        # Penance.spawn for every game in ks. Returns the slots the new npcs took.
+        while not (~self.active[ks]).any(axis=1).all():
+            self.grow()
+        ss = np.argmax(~self.active[ks], axis=1)
+
+        self.reserves[ks] -= 1
+        self.due_to_spawn[ks] = False
+        self.active[ks, ss] = True
+        self.seq[ks, ss] = np.arange(self.spawned, self.spawned + len(ks))
+        self.spawned += len(ks)
+        self.x[ks, ss] = self.SPAWN.x
+        self.y[ks, ss] = self.SPAWN.y
+        self.cycle[ks, ss] = 0
+        self.hitpoints[ks, ss] = self.NPC.HITPOINTS[self.wave_number]
+        self.despawn_i[ks, ss] = Npc.DESPAWN_TICKS
+        self.alive[ks, ss] = True
+        self.death_tick[ks, ss] = 0
+        return ss
+
+
+class Runners(Species):
+    NPC: Type[Npc] = Runner
+    KEY: str = "d"
+    SPAWN: C = E.RUNNER_SPAWN
+    FIELDS: Tuple[str, ...] = Species.FIELDS + (
+        "destination_x", "destination_y", "target_state", "blugh_i", "has_chomped", "urgh_raa_i", "has_escaped",
+        "followee", "followee_x", "followee_y",
+    )
+
+    def __init__(self, wave_number: int, games: int):
+        super().__init__(wave_number, games)
+        slots = self.active.shape
+        self.destination_x: np.ndarray = np.zeros(slots, dtype=np.int32)
+        self.destination_y: np.ndarray = np.zeros(slots, dtype=np.int32)
+        self.target_state: np.ndarray = np.zeros(slots, dtype=np.int32)
+        self.blugh_i: np.ndarray = np.zeros(slots, dtype=np.int32)
+        self.has_chomped: np.ndarray = np.zeros(slots, dtype=bool)
+        self.urgh_raa_i: np.ndarray = np.zeros(slots, dtype=np.int32)
+        self.has_escaped: np.ndarray = np.zeros(slots, dtype=bool)
+        self.followee: np.ndarray = np.zeros(slots, dtype=np.int32)  # The id of the food followed (see Batch.drop).
+        self.followee_x: np.ndarray = np.zeros(slots, dtype=np.int32)
+        self.followee_y: np.ndarray = np.zeros(slots, dtype=np.int32)
+
+    def has_escaped_at(self, k: int, s: int) -> bool:
+        return bool(self.has_escaped[k, s])
+
+    def spawn(self, ks: np.ndarray) -> np.ndarray:
+        ss = super().spawn(ks)
+        self.destination_x[ks, ss] = self.SPAWN.x
+        self.destination_y[ks, ss] = self.SPAWN.y
+        self.target_state[ks, ss] = Runner.INITIAL_TARGET_STATE
+        self.blugh_i[ks, ss] = 0
+        self.has_chomped[ks, ss] = False
+        self.urgh_raa_i[ks, ss] = Runner.URGH_RAA_DELAY
+        self.has_escaped[ks, ss] = False
+        self.followee[ks, ss] = -1
+        return ss
+
+
+class Healers(Species):
+    NPC: Type[Npc] = Healer
+    KEY: str = "h"
+    SPAWN: C = E.PENANCE_HEALER_SPAWN
+    FIELDS: Tuple[str, ...] = Species.FIELDS + ("poison_i", "poison_start_tick")
+
+    def __init__(self, wave_number: int, games: int):
+        super().__init__(wave_number, games)
+        slots = self.active.shape
+        self.poison_i: np.ndarray = np.zeros(slots, dtype=np.int32)
+        self.poison_start_tick: np.ndarray = np.zeros(slots, dtype=np.int32)
+
+    def spawn(self, ks: np.ndarray) -> np.ndarray:
+        ss = super().spawn(ks)
+        self.poison_i[ks, ss] = 1
+        self.poison_start_tick[ks, ss] = 0
+        return ss
+
+
+class Batch:
+    STEP_BITS: np.ndarray = np.array(L.STEP_BITS, dtype=np.int32)
+    TRAPS: List[C] = [E.TRAP, E.WEST_TRAP]  # Indexed by WEGameObject.EAST and WEGameObject.WEST.
+    SCAN_ORDER: List[C] = [D.NE, D.E, D.SE, D.N, D.X, D.S, D.NW, D.W, D.SW]  # Check Runner.tick_target.
+    CYCLE_MAP: np.ndarray = np.array([-1 if state is None else state for state in Runner.CYCLE_MAP] +
+                                     [-1] * (Npc.CYCLE_COUNT - len(Runner.CYCLE_MAP)), dtype=np.int32)
+
+    def __init__(self, wave_number: int, runner_movements: str = "", seeds: Optional[List[Optional[int]]] = None,
+                 games: int = 1, scripts: Optional[List[Script]] = None):
+        # Either pass one seed per game, or the number of games to play with random seeds. Games without a script
+        # leave the penance alone.
+        assert 0 <= wave_number < 10, "The wave (0-indexed) should be between 0 and 9."
+        assert wave_number != 9, "Wave 10 is not implemented yet in this project."
+        if seeds is None:
+            seeds = [None] * games
+        self.wave_number: int = wave_number
+        self.rngs: List[Rng] = [Rng(seed) for seed in seeds]
+        self.seeds: List[int] = [rng.seed for rng in self.rngs]
+        self.games: int = len(seeds)
+        self.scripts: List[Script] = scripts or [Script() for _ in seeds]
+        self.scripted: Dict[int, List[int]] = {}  # The games with script events on each tick.
+        for k, script in enumerate(self.scripts):
+            for tick in script.ticks:
+                self.scripted.setdefault(tick, []).append(k)
+        self.tick: int = -1
+        self.running: np.ndarray = np.ones(self.games, dtype=bool)
+        self.ending: np.ndarray = np.zeros(self.games, dtype=bool)  # Games on which Wave.end was stalled.
+
+        # Player blocking (see Terrain.can_npc_step) is taken from a game with idle players, padded by one tile so that
+        # looking up a step from an empty slot never goes out of bounds.
+        game = Game()
+        game.set_new_players({})
+        self.blocked: np.ndarray = np.pad(
+            np.frombuffer(game.block_map.cells, dtype=np.uint8).reshape(Grid.HEIGHT, Grid.WIDTH) ==
+            Terrain.BLOCKED_BY_PLAYER_BYTE, 1
+        )
+        # Healers are only kept in their initial state (see Batch.update_healers), which holds as long as the players
+        # stand out of their sight. Following, random walking and targeting are left to the object engine.
+        assert len(Targeting.filter_by_sight(game.players.get_iterable(), E.PENANCE_HEALER_SPAWN,
+                                             Unit.ACTION_DISTANCE)) == 0, \
+            "Batch needs the idle players to stand out of the sight of the healer spawn."
+
+        self.runners: Runners = Runners(wave_number, self.games)
+        self.healers: Healers = Healers(wave_number, self.games)
+        self.deaths: List[Dict[str, List[int]]] = [{"a": [], "s": [], "d": [], "h": []} for _ in seeds]
+        self.escapes: List[List[int]] = [[] for _ in seeds]
+
+        movements = Terrain.parse_runner_movements(runner_movements)
+        self.runner_movements: List[List[List[C]]] = [[list(runner) for runner in movements] for _ in seeds]
+        self.forced_movements: Dict[Tuple[int, int], List[C]] = {}
+
+        # Per game Wave.dropped_food, as food ids mapped to (x, y, is_correct) in drop order, bucketed by runner zone
+        # like DroppedFood does. Food ids count the FOOD events of the game's script.
+        self.food: List[Dict[int, Tuple[int, int, bool]]] = [{} for _ in seeds]
+        self.zones: List[Dict[Tuple[int, int], Dict[int, None]]] = [{} for _ in seeds]
+        self.dropped: List[int] = [0] * self.games
+        self.food_counts: np.ndarray = np.zeros(self.games, dtype=np.int32)
+        self.charges: np.ndarray = np.full((self.games, len(Batch.TRAPS)), Trap.MAX_CHARGES, dtype=np.int32)
+
+    def __call__(self) -> bool:
+        # Advances every running game by one tick. Returns False once no game is running anymore, which happens when
+        # the wave times out, like Game.__call__ does. Games whose penance all died stop running on their own.
+        self.tick += 1
+        self.running &= ~self.ending
+        if self.tick == Inspectable.WAVE:
+            self.running[:] = False
+        if not self.running.any():
+            return False
+
+        # Every npc that can die this tick is known up front, which is all that Penance.tick_death needs.
+        runners = self.runners
+        alive_after = runners.alive & ~(runners.has_chomped & (runners.urgh_raa_i == 1))
+        alive_after &= runners.has_chomped | ~runners.has_escaped
+        returning = runners.alive & runners.has_escaped & ~runners.has_chomped
+        called, orders = self.settle_species(runners, alive_after, returning)
+        self.update_runners(called, orders)
+
+        healers = self.healers
+        poison_i = healers.poison_i - self.poisoned(healers.alive)
+        damage = np.where(poison_i < healers.poison_i, -(-poison_i // Healer.POISON_TICKS_PER_HITSPLAT), 0)
+        alive_after = healers.alive & (healers.hitpoints - damage > 0)
+        called, _ = self.settle_species(healers, alive_after, np.zeros_like(alive_after))
+        self.update_healers(called)
+
+        count_alive = runners.active.sum(axis=1) + healers.active.sum(axis=1)
+        if self.tick % Inspectable.CYCLE == 0 and self.tick > 0:
+            self.spawn(runners)
+            self.spawn(healers)
+        self.ending = self.running & (count_alive == 0) & (runners.reserves + healers.reserves == 0)
+
+        for k in self.scripted.get(self.tick, []):
+            if self.running[k]:
+                self.play(k)
+
+        return True
+
+    def run(self) -> List[List[int]]:
+        # Plays every game to the end of the wave, and returns the runner escape ticks of each.
+        while self():
+            pass
+        return self.escapes
+
+    def settle_species(self, species: Species, alive_after: np.ndarray,
+                       returning: np.ndarray) -> Tuple[np.ndarray, Dict[int, List[int]]]:
+        # The npcs of a species that get called this tick, along with their order in the games that needed settling.
+        # Only games with npcs that are dead, or die this tick, do.
+        called = species.active & self.running[:, None]
+        orders = {}
+        for k in np.flatnonzero((called & ~alive_after).any(axis=1)):
+            orders[k] = self.settle(species, k, called, alive_after, returning)
+        return called, orders
+
+    def settle(self, species: Species, k: int, called: np.ndarray, alive_after: np.ndarray,
+               returning: np.ndarray) -> List[int]:
+        # The bookkeeping of Penance.tick_death for game k. Removing an npc from its list while iterating over it skips
+        # the npc after it for that tick, and extinction pops the last npc of the list. Both are reproduced here, before
+        # the npcs themselves are updated. Returns the slots called, in order.
+        #
+        # Every field used here is as it was at the start of the tick. The outcome of an npc's own update (whether it
+        # dies, whether an escaped runner goes back to the reserves, and its despawn count) only depends on those, and
+        # is passed in.
+        order = species.ordered(k)
+        reserves = int(species.reserves[k])
+        after: Dict[int, bool] = {}
+        called[k] = False
+        rv = []
+
+        i = 0
+        while i < len(order):
+            s = order[i]
+            called[k, s] = True
+            rv.append(s)
+            reserves += bool(returning[k, s])
+            after[s] = bool(alive_after[k, s])
+            despawn_i = species.despawn_i[k, s] - (not after[s])
+
+            if not after[s] and despawn_i < species.NPC.DUE_TO_SPAWN_TICKS:
+                species.due_to_spawn[k] = True
+                none_alive = not any(after.get(o, species.alive[k, o]) for o in order)
+                if none_alive and reserves == 0:
+                    order.pop()
+
+            if despawn_i == -1:
+                if len(order) > 0:
+                    order.pop(i)
+                if species.has_escaped_at(k, s):
+                    self.escapes[k].append(self.tick)
+                else:
+                    self.deaths[k][species.KEY].append(int(species.death_tick[k, s]))
+
+            i += 1
+
+        for s in np.flatnonzero(species.active[k]):
+            if s not in order:
+                species.active[k, s] = False
+                self.forced_movements.pop((k, s), None)
+        return rv
+
+    def update_runners(self, called: np.ndarray, orders: Dict[int, List[int]]) -> None:
+        # Npc.__call__ and Runner.do_cycle for every called runner.
+        runners = self.runners
+        despawning = called & ~runners.alive & (runners.despawn_i == 0)
+        cycle = np.where(called, (runners.cycle + 1) % Npc.CYCLE_COUNT, runners.cycle)
+        runners.cycle = cycle
+
+        # Runners that chomped urgh, and runners that escaped last tick die, and go back to the reserves.
+        alive = called & runners.alive
+        chomped = alive & runners.has_chomped
+        runners.urgh_raa_i -= chomped
+        escaping = alive & runners.has_escaped & ~runners.has_chomped
+        if escaping.any():
+            runners.reserves += escaping.sum(axis=1, dtype=np.int32)
+        dying = (chomped & (runners.urgh_raa_i == 0)) | escaping
+        runners.alive &= ~dying
+        runners.death_tick[dying] = self.tick
+        live = alive & ~runners.has_chomped & ~runners.has_escaped
+
+        # Unit.refollow. Food never moves, and following food that is under the runner keeps its destination.
+        following = live & (runners.followee >= 0) & ((runners.x != runners.followee_x) |
+                                                      (runners.y != runners.followee_y))
+        runners.destination_x = np.where(following, runners.followee_x, runners.destination_x)
+        runners.destination_y = np.where(following, runners.followee_y, runners.destination_y)
+
+        edge = live & ((cycle == 1) | (cycle == 6))
+        runners.has_escaped |= edge & (runners.y == E.RAA_TILE.y)
+        runners.blugh_i -= edge & (runners.blugh_i > 0)
+
+        first = live & (cycle == 1) & (runners.blugh_i == 0)
+        target_state = runners.target_state
+        runners.target_state = np.where(
+            first, np.where(target_state == Runner.TARGET_STATE_COUNT, 1, target_state + 1), target_state
+        )
+
+        # Only runners that follow food, look for food on a map that has some, or break traps are walked one by one.
+        targeting = live & (runners.target_state == Batch.CYCLE_MAP[cycle]) & (self.food_counts > 0)[:, None]
+        foraging = targeting | (live & (runners.followee >= 0)) | despawning
+        acted = np.zeros_like(live)
+        for k in np.flatnonzero(foraging.any(axis=1)):
+            self.forage(k, orders[k] if k in orders else runners.ordered(k), foraging, targeting, despawning, acted)
+
+        cycle = runners.cycle
+        idle = live & (runners.followee < 0) & (runners.blugh_i == 0)
+        walking = idle & (cycle == 6) & ~runners.has_chomped
+        if walking.any():
+            self.walk(walking)
+
+        # With no followee, runners stop on cycle 1.
+        first = idle & (cycle == 1)
+        runners.destination_x = np.where(first, runners.x, runners.destination_x)
+        runners.destination_y = np.where(first, runners.y, runners.destination_y)
+
+        self.step(live & ~acted)
+
+        runners.despawn_i -= called & ~runners.alive
+
+    def forage(self, k: int, order: List[int], foraging: np.ndarray, targeting: np.ndarray, despawning: np.ndarray,
+               acted: np.ndarray) -> None:
+        # Runner.tick_target, Runner.tick_eat and Runner.tick_despawn for the foraging runners of game k, one by one in
+        # list order, since the food eaten and the traps broken by a runner change what the runners after it get to do.
+        # Sets acted for the runners that ate, or lost their food, which do not step.
+        runners = self.runners
+        food = self.food[k]
+        for s in order:
+            if not foraging[k, s]:
+                continue
+            x, y = int(runners.x[k, s]), int(runners.y[k, s])
+            if despawning[k, s]:
+                for j, trap in enumerate(Batch.TRAPS):
+                    if max(abs(x - trap.x), abs(y - trap.y)) <= 1 and self.charges[k, j] > 0:
+                        self.charges[k, j] -= 1
+                continue
+
+            cycle = int(runners.cycle[k, s])
+            if targeting[k, s] and len(food) > 0:
+                self.target(k, s, x, y)
+
+            followee = int(runners.followee[k, s])
+            if followee < 0:
+                continue
+            acted[k, s] = True
+            if followee not in food:
+                runners.target_state[k, s] = 0
+            elif food[followee][:2] != (x, y):
+                acted[k, s] = False
+                continue
+            elif food[followee][2]:
+                for j, trap in enumerate(Batch.TRAPS):
+                    if max(abs(x - trap.x), abs(y - trap.y)) <= 1 and self.charges[k, j] > 0:
+                        runners.has_chomped[k, s] = True
+                self.remove(k, followee)
+            else:
+                runners.blugh_i[k, s] = 3
+                runners.target_state[k, s] = 0
+                runners.cycle[k, s] -= 5 if cycle > 5 or cycle == 0 else 0
+                self.remove(k, followee)
+
+            # Unit.stop_movement.
+            runners.destination_x[k, s], runners.destination_y[k, s] = x, y
+            runners.followee[k, s] = -1
+
+    def target(self, k: int, s: int, x: int, y: int) -> None:
+        # Runner.tick_target for runner s of game k, which is on tile (x, y).
+        runners = self.runners
+        food, zones = self.food[k], self.zones[k]
+        location = C(x, y)
+        zone = location.get_runner_zone()
+        first_food = None
+        for zone_delta in Batch.SCAN_ORDER:
+            scan_zone = zone + zone_delta
+            if not (0 <= scan_zone.x < E.RUNNER_ZONE_COUNT and 0 <= scan_zone.y < E.RUNNER_ZONE_COUNT):
+                continue
+
+            for n in reversed(zones.get((scan_zone.x, scan_zone.y), {})):
+                food_x, food_y, _ = food[n]
+                if not location.can_see(C(food_x, food_y)):
+                    continue
+                if first_food is None:
+                    first_food = n
+                if max(abs(x - food_x), abs(y - food_y)) <= Runner.SNIFF_DISTANCE:
+                    food_x, food_y, _ = food[first_food]
+                    runners.target_state[k, s] = 0
+                    runners.followee[k, s] = first_food
+                    runners.followee_x[k, s], runners.followee_y[k, s] = food_x, food_y
+                    if (food_x, food_y) != (x, y):
+                        runners.destination_x[k, s], runners.destination_y[k, s] = food_x, food_y
+                    return
+
+    def walk(self, walking: np.ndarray) -> None:
+        # Runner.walk for every walking runner. Only runners that are not redirected draw, in the order of their game.
+        runners = self.runners
+        ks, ss = np.nonzero(walking)
+        order = np.lexsort((runners.seq[ks, ss], ks))
+        ks, ss = ks[order], ss[order]
+        x, y = runners.x[ks, ss], runners.y[ks, ss]
+
+        def southwest_of(tile: C) -> np.ndarray:
+            return (x <= tile.x) & (y >= tile.y)
+
+        # The redirects of Runner.walk, in the order they are checked in.
+        redirects = [
+            ((x == E.RUNNER_REDIRECT_1.x) & (y == E.RUNNER_REDIRECT_1.y), E.RUNNER_DESTINATION_1),
+            (southwest_of(E.RUNNER_REDIRECT_2) & ~southwest_of(E.RUNNER_REDIRECT_1), E.RUNNER_DESTINATION_2),
+            (southwest_of(E.RUNNER_REDIRECT_3), E.RAA_TILE),
+            (southwest_of(E.RUNNER_REDIRECT_4), E.RUNNER_DESTINATION_4),
+        ]
+        destination_x, destination_y = x.copy(), y.copy()
+        redirected = np.zeros(len(ks), dtype=bool)
+        for hit, destination in redirects:
+            hit &= ~redirected
+            destination_x[hit] = destination.x
+            destination_y[hit] = destination.y
+            redirected |= hit
+
+        for i in np.flatnonzero(~redirected):
+            direction = self.get_random_walk(ks[i], ss[i])
+            destination_x[i] = x[i] + Runner.TILES_PER_RANDOM_WALK * direction.x
+            destination_y[i] = y[i] + Runner.TILES_PER_RANDOM_WALK * direction.y
+        destination_x[~redirected] = np.clip(destination_x[~redirected], (E.WEST_TRAP + D.W).x, E.TRAP.x)
+
+        runners.destination_x[ks, ss] = destination_x
+        runners.destination_y[ks, ss] = destination_y
+
+    def get_random_walk(self, k: int, s: int) -> C:
+        # Runner.get_random_walk, drawing from the stream of game k.
+        forced_movements = self.forced_movements.get((k, s))
+        if forced_movements:
+            return forced_movements.pop(0)
+
+        roll = int(self.rngs[k].runners.random() * 6)
+        if roll == 0:
+            return D.E
+        if roll == 1:
+            return D.W
+        return D.S
+
+    def can_step(self, x: np.ndarray, y: np.ndarray, dx: np.ndarray, dy: np.ndarray) -> np.ndarray:
+        # Terrain.can_npc_step over arrays of tiles and steps.
+        bit = Batch.STEP_BITS[3 * dy + dx + 4]
+        rv = (bit >= 0) & ((L.NPC_STEPS[y, x] >> np.maximum(bit, 0)) & 1 == 1)
+        blocked = self.blocked
+        rv &= ~blocked[y + dy + 1, x + dx + 1]
+        rv &= ~((dx != 0) & (dy != 0) & (blocked[y + 1, x + dx + 1] | blocked[y + dy + 1, x + 1]))
+        return rv
+
+    def step(self, live: np.ndarray) -> None:
+        # Npc.path, then the single step to the tile it returns.
+        runners = self.runners
+        x, y = runners.x, runners.y
+        step_x = np.sign(runners.destination_x - x)
+        step_y = np.sign(runners.destination_y - y)
+        zero = np.zeros_like(step_x)
+
+        diagonal = self.can_step(x, y, step_x, step_y)
+        horizontal = ~diagonal & self.can_step(x, y, step_x, zero)
+        vertical = ~diagonal & ~horizontal & self.can_step(x, y, zero, step_y)
+
+        runners.x = x + np.where(live & (diagonal | horizontal), step_x, 0)
+        runners.y = y + np.where(live & (diagonal | vertical), step_y, 0)
+
+    def poisoned(self, alive: np.ndarray) -> np.ndarray:
+        # The healers that take poison damage if they are called this tick (see Healer.do_cycle).
+        healers = self.healers
+        return alive & ((self.tick - healers.poison_start_tick) % Healer.POISON_TICKS_PER_HITSPLAT == 0) & \
+            (healers.poison_i > 0)
+
+    def update_healers(self, called: np.ndarray) -> None:
+        # Npc.__call__ and Healer.do_cycle for every called healer. Healers in their initial state have nothing to
+        # follow, and do not random walk, so they only take poison damage.
+        healers = self.healers
+        healers.cycle = np.where(called, (healers.cycle + 1) % Npc.CYCLE_COUNT, healers.cycle)
+
+        alive = called & healers.alive
+        poisoned = self.poisoned(alive)
+        healers.poison_i -= poisoned
+        healers.hitpoints -= np.where(poisoned, -(-healers.poison_i // Healer.POISON_TICKS_PER_HITSPLAT), 0)
+
+        dying = alive & (healers.hitpoints <= 0)
+        healers.hitpoints[dying] = 0
+        healers.alive &= ~dying
+        healers.death_tick[dying] = self.tick
+
+        healers.despawn_i -= called & ~healers.alive
+
+    def spawn(self, species: Species) -> None:
+        # Penance.can_spawn and Penance.spawn for a species of every running game.
+        spawning = self.running & (species.reserves > 0) & \
+            (species.due_to_spawn | (species.active.sum(axis=1) < species.at_once))
+        ks = np.flatnonzero(spawning)
+        if len(ks) == 0:
+            return
+
+        ss = species.spawn(ks)
+        if species is self.runners:
+            for k, s in zip(ks.tolist(), ss.tolist()):
+                if len(self.runner_movements[k]) > 0:
+                    self.forced_movements[(k, s)] = self.runner_movements[k].pop(0)
+
+    def play(self, k: int) -> None:
+        # Script.apply for game k.
+        for kind, a, b, c in self.scripts[k].at(self.tick):
+            if kind == Script.FOOD:
+                self.drop(k, a, b, bool(c))
+            if kind == Script.PICK and a in self.food[k]:
+                self.remove(k, a)
+            if kind == Script.REPAIR:
+                self.charges[k, a] = Trap.MAX_CHARGES
+            if kind == Script.POISON:
+                self.poison(k, a)
+
+    def drop(self, k: int, x: int, y: int, is_correct: bool) -> None:
+        # DroppedFood.add for game k.
+        n = self.dropped[k]
+        self.dropped[k] += 1
+        self.food_counts[k] += 1
+        self.food[k][n] = (x, y, is_correct)
+        zone = C(x, y).get_runner_zone()
+        self.zones[k].setdefault((zone.x, zone.y), {})[n] = None
+
+    def remove(self, k: int, n: int) -> None:
+        # DroppedFood.remove for game k.
+        x, y, _ = self.food[k].pop(n)
+        self.food_counts[k] -= 1
+        zone = C(x, y).get_runner_zone()
+        del self.zones[k][(zone.x, zone.y)][n]
+
+    def poison(self, k: int, i: int) -> None:
+        # Healer.apply_poison on the healer at index i of game k's Penance.healers, if there is one and it is alive.
+        healers = self.healers
+        order = healers.ordered(k)
+        if i >= len(order) or not healers.alive[k, order[i]]:
+            return
+        s = order[i]
+        if healers.poison_i[k, s] <= 0:
+            healers.poison_start_tick[k, s] = self.tick
+        healers.poison_i[k, s] = Healer.MAX_POISON_I
+        healers.hitpoints[k, s] -= Healer.MAX_POISON_DAMAGE
+
+    def runner_states(self, k: int) -> List[Tuple[int, ...]]:
+        # Game k's runners, in the form of runner_states.
+        r = self.runners
+        return [
+            (int(r.x[k, s]), int(r.y[k, s]), int(r.destination_x[k, s]), int(r.destination_y[k, s]),
+             int(r.cycle[k, s]), int(r.target_state[k, s]), int(r.blugh_i[k, s]), bool(r.has_chomped[k, s]),
+             int(r.urgh_raa_i[k, s]), int(r.followee[k, s]), int(r.despawn_i[k, s]), bool(r.alive[k, s]),
+             bool(r.has_escaped[k, s]))
+            for s in r.ordered(k)
+        ]
+
+    def healer_states(self, k: int) -> List[Tuple[int, ...]]:
+        # Game k's healers, in the form of healer_states.
+        h = self.healers
+        return [
+            (int(h.x[k, s]), int(h.y[k, s]), int(h.cycle[k, s]), int(h.hitpoints[k, s]), int(h.poison_i[k, s]),
+             int(h.poison_start_tick[k, s]), int(h.despawn_i[k, s]), bool(h.alive[k, s]))
+            for s in h.ordered(k)
+        ]
+
+    def food_states(self, k: int) -> Tuple[List[int], List[int]]:
+        # Game k's food ids in drop order, and its trap charges, in the form of food_states.
+        return list(self.food[k]), self.charges[k].tolist()
+
+    def benchmark(self) -> float:
+        # Plays the wave and returns the number of game ticks simulated per second, over all games.
+        start = perf_counter()
+        self.run()
+        return self.games * self.tick / (perf_counter() - start)
+
+
+def runner_states(game: Game, foods: List[Food]) -> List[Tuple[int, ...]]:
+    # The state of the runners of an object engine game that the batch keeps, in Penance.runners order. Followees are
+    # given as their index in foods.
+    return [
+        (runner.location.x, runner.location.y, runner.destination.x, runner.destination.y, runner.cycle,
+         runner.target_state, runner.blugh_i, runner.has_chomped, runner.urgh_raa_i,
+         -1 if runner.followee is None else foods.index(runner.followee), runner.despawn_i, runner.is_alive(),
+         runner.has_escaped)
+        for runner in game.wave.penance.runners
+    ]
+
+
+def healer_states(game: Game) -> List[Tuple[int, ...]]:
+    # The state of the healers of an object engine game that the batch keeps, in Penance.healers order.
+    return [
+        (healer.location.x, healer.location.y, healer.cycle, healer.hitpoints, healer.poison_i,
+         healer.poison_start_tick, healer.despawn_i, healer.is_alive())
+        for healer in game.wave.penance.healers
+    ]
+
+
+def food_states(game: Game, foods: List[Food]) -> Tuple[List[int], List[int]]:
+    # The food on the map of an object engine game as indices in foods, and its trap charges.
+    return [foods.index(food) for food in game.wave.dropped_food], \
+        [trap.charges for trap in game.wave.game_objects.traps]
+
+
+def validate(wave_number: int, runner_movements: str = "", seeds: Optional[List[int]] = None,
+             scripted: bool = True) -> Optional[int]:
+    # Plays the seeded games both in a batch and in the object engine, comparing their runners, healers, food and traps
+    # on every tick, and their deaths and escapes at the end. Each game gets a random Script seeded by its seed, unless
+    # scripted is False. Returns the first seed that the engines disagree on, or None if they agree on all of them.
+    seeds = list(range(100)) if seeds is None else seeds
+    scripts = [Script.random(Random(seed)) if scripted else Script() for seed in seeds]
+    batch = Batch(wave_number, runner_movements, seeds, scripts=scripts)
+    games = []
+    for seed in seeds:
+        game = Game(seed)
+        game.set_new_players({})
+        game.start_new_wave(wave_number, Terrain.parse_runner_movements(runner_movements))
+        games.append(game)
+    foods: List[List[Food]] = [[] for _ in seeds]
+
+    mismatches = set()
+    running = [True] * len(games)
+    while batch():
+        for k, game in enumerate(games):
+            if not running[k]:
+                continue
+            running[k] = game()
+            if running[k] != batch.running[k]:
+                mismatches.add(k)
+            if not running[k]:
+                continue
+            scripts[k].apply(game, foods[k])
+            if runner_states(game, foods[k]) != batch.runner_states(k) or \
+                    healer_states(game) != batch.healer_states(k) or \
+                    food_states(game, foods[k]) != batch.food_states(k):
+                mismatches.add(k)
+
+    for k, game in enumerate(games):
+        if running[k] and game():
+            mismatches.add(k)
+        if game.wave.penance.escapes != batch.escapes[k] or game.wave.penance.deaths != batch.deaths[k]:
+            mismatches.add(k)
+
+    return seeds[min(mismatches)] if len(mismatches) > 0 else None
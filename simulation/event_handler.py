@@ -162,7 +162,7 @@ class EventHandler:
     @staticmethod
     def handle(action: str, args: List, room: Room, client: str) -> bool:
         # Receives an action.
-        debug("EventHandler.handle", "Received", action, args)
+        debug("EventHandler.handle", "Received.", action=action, args=tuple(args))
 
         if EventHandler.handle_room_event(action, args, room, client):
             return True
@@ -1,13 +1,20 @@
-from random import random
+from __future__ import annotations
+
 from typing import List, Dict, Type, Union, Optional
 
+import numpy as np
+
+import log
 from log import debug, game_print
 from simulation.ai import Ai
+from simulation.base.clone import clone
 from simulation.base.dispenser import AttackerDispenser, DefenderDispenser, HealerDispenser, CollectorDispenser
 from simulation.base.game_object import GameObjects
-from simulation.base.dropped_item import Food, Egg, Logs, Hammer
-from simulation.base.terrain import Inspectable, Terrain, F, C
+from simulation.base.events import Event
+from simulation.base.dropped_item import Food, Egg, Logs, Hammer, DroppedFood
+from simulation.base.terrain import Inspectable, Terrain, F, C, Grid, L
 from simulation.base.player import Player
+from simulation.base.rng import Rng
 from simulation.player.attacker import Attacker
 from .penance import Penance
 from .players import Players
@@ -35,7 +42,7 @@ class Wave:
         }
 
         # Currently, these are three different lists instead of a list of type List[DroppedItem] to ease processing.
-        self.dropped_food: List[Food] = []
+        self.dropped_food: DroppedFood = DroppedFood()
         self.dropped_eggs: List[Egg] = []
         self.dropped_hnls: List[Union[Hammer, Logs]] = [  # The term hnl will be used to indicate hammer and logs.
             Hammer(self.game), Logs(Logs.NEAR, self.game), Logs(Logs.FAR, self.game)
@@ -58,7 +65,8 @@ class Wave:
         #
         # Player code also relies on self.game.wave.relative_tick when making decisions.
         if self.relative_tick == Inspectable.WAVE and not self.end_flag:
-            debug("Wave.__call__", "The wave ended unexpectedly due to a timeout.")
+            if log.DEBUG:
+                debug("Wave.__call__", "The wave ended unexpectedly due to a timeout.")
             return False
 
         # Handle wave end.
@@ -90,17 +98,18 @@ class Wave:
     def relative_tick(self) -> int:
         return self.game.tick - self.start_tick
 
-    def print(self, *args, **kwargs) -> None:
-        game_print("Wave.print", f"Wave {self.number}:", *args, **kwargs)
-        self.game.text_payload.append(
-            " ".join([str(arg) for arg in (f"WAVE {self.number}::", *args)])
-        )
+    def event(self, code: int, payload: int = 0, uuid: int = Event.NO_UUID) -> None:
+        # Logs an Event about the wave (see EventLog).
+        self.game.events.append(code, self.relative_tick, uuid, payload)
+        if log.GAME_PRINT:
+            game_print("Wave.print", Event.format(code, self.relative_tick, uuid, payload, self.number))
 
     def change_call(self) -> None:
         self.calls = {
             "a": None, "c": None, "d": None, "h": None,
         }
 
+        random = self.game.rng.calls.random
         for key in self.correct_calls:
             if self.correct_calls[key] is None:
                 if key == "a":
@@ -115,15 +124,33 @@ class Wave:
                 if call >= self.correct_calls[key]:
                     call += 1
             self.correct_calls[key] = call
-        self.print(f"Call {self.relative_tick // Inspectable.CALL} ({Terrain.tick_to_string(self.relative_tick)}).")
+        self.event(Event.CALL, self.relative_tick // Inspectable.CALL)
+
+    def next_event_tick(self) -> int:
+        # Calls change on the first tick of every call. Penance spawn, and hammer and logs respawn, on cycle ticks.
+        tick = self.relative_tick
+        if self.end_flag:
+            return tick + 1
+        next_call = ((tick - 1) // Inspectable.CALL + 1) * Inspectable.CALL + 1
+        next_cycle = (tick // Inspectable.CYCLE + 1) * Inspectable.CYCLE
+        return min(Inspectable.WAVE, next_call, next_cycle, self.penance.next_event_tick())
 
     def end(self) -> None:
         self.end_flag = True
-        self.print(f"Wave ended ({Terrain.tick_to_string(self.relative_tick)}).")
+        self.event(Event.WAVE_END)
+
+
+class Snapshot:
+    # The full state of a Game at some tick. Check Game.snapshot.
+    def __init__(self, game: Game):
+        self.game: Game = game  # A detached copy that is never run, only cloned from.
+        self.tick: int = game.tick
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
+        # All randomness in the game comes from self.rng. Games with the same seed and inputs play out the same.
+        self.rng: Rng = Rng(seed)
         self.inspectable: Inspectable = Inspectable(self)
         self.players: Optional[Players] = None
         self.original_ai: Dict[str, Type[Ai]] = {}
@@ -133,7 +160,10 @@ class Game:
 
         self.runner_movements: List[List[C]] = []
 
-        self.block_map: List[str] = Terrain.new()
+        self.block_map: Grid = Terrain.new()
+
+        # Skip over the ticks on which nothing happens. Check Game.next_event_tick.
+        self.fast_forward: bool = False
 
     def start_new_wave(self, wave_number: int, runner_movements: List[List[C]]) -> None:
         self.set_new_players(self.original_ai)  # Keeps AI dictionary unmodified, resets players.
@@ -153,10 +183,9 @@ class Game:
 
     def set_new_players(self, ai: Dict[str, Type[Ai]]) -> None:
         # Garbage collect the old locatables.
-        self.inspectable.uuids = []
-        self.inspectable.locatables = []
+        self.inspectable.locatables = {}
         self.original_ai = ai
-        self.block_map: List[str] = Terrain.new()
+        self.block_map: Grid = Terrain.new()
 
         # Create new players.
         self.players: Players = Players(self.inspectable)
@@ -170,6 +199,13 @@ class Game:
         assert self.wave is not None, "Please call start_new_wave before processing the game loop."
         assert self.players is not None, "Please call set_new_players before processing the game loop."
 
+        # In fast forward mode, a call processes the next tick on which something happens, after advancing the counters
+        # of everything over the ticks before it in bulk.
+        if self.fast_forward:
+            ticks = self.next_event_tick() - self.wave.relative_tick - 1
+            if ticks > 0:
+                self.skip_ticks(ticks)
+
         # Process actions related to the the AI actions.
         for role in self.ai:
             if self.ai[role] is not None:
@@ -200,7 +236,39 @@ class Game:
 
         return True
 
-    def render_map(self, _print: bool = False, players_only: bool = False) -> List[str]:
+    def next_event_tick(self) -> int:
+        # The earliest relative tick on which anything in the game can happen, other than counters advancing. Every
+        # part of the game reports its own (see Wave, Penance, Players, Npc, Player and Ai).
+        rv = min(self.wave.next_event_tick(), self.players.next_event_tick())
+        for role in self.ai:
+            if self.ai[role] is not None:
+                rv = min(rv, self.ai[role].next_event_tick())
+        return rv
+
+    def skip_ticks(self, ticks: int) -> None:
+        # Advances the game by ticks on which nothing happens, in bulk.
+        self.tick += ticks
+        self.wave.penance.skip_ticks(ticks)
+        self.players.skip_ticks(ticks)
+
+    def snapshot(self) -> Snapshot:
+        # Captures all the mutable state of the game: units and their pathing, cycles, hitpoints and inventories,
+        # dropped items, game objects, calls, the stall queue and the random streams. Nothing the game does after this
+        # call affects the snapshot, and the snapshot can be restored any number of times.
+        return Snapshot(clone(self))
+
+    def restore(self, snapshot: Snapshot) -> None:
+        # Puts this game back in the state captured by snapshot. Everything in the game is replaced, while the Game
+        # object itself stays the same, so references to it (like the one in Room) keep working.
+        state = clone(snapshot.game.__dict__, {id(snapshot.game): self})
+        self.__dict__.clear()
+        self.__dict__.update(state)
+
+    def fork(self) -> Game:
+        # A new game in the same state as this one. Both games can be run independently from then on.
+        return clone(self)
+
+    def render_map(self, _print: bool = False, players_only: bool = False) -> Grid:
         tmp = Terrain.new()
 
         if self.players is not None:
@@ -220,5 +288,24 @@ class Game:
 
         return tmp
 
+    def render_occupancy(self, players_only: bool = False) -> np.ndarray:
+        # The unit occupancy layer that the unit observation channels are windows of. Check Terrain.OCCUPANCY_BITS.
+        # Build it once per tick and reuse it for every observation taken during that tick.
+        rv = np.zeros(L.PADDED_SHAPE, dtype=np.uint8)
+        occupancy = L.unpadded(rv)
+
+        if self.players is not None:
+            bit = 1 << Terrain.OCCUPANCY_BITS[Terrain.OCCUPIED_BY_PLAYER]
+            for key, player in self.players:
+                occupancy[player.location.y, player.location.x] |= bit
+
+        if self.wave is not None and not players_only:
+            for key, species in self.wave.penance:
+                bit = 1 << Terrain.OCCUPANCY_BITS[key]
+                for npc in species:
+                    occupancy[npc.location.y, npc.location.x] |= bit
+
+        return rv
+
     def print_runners(self) -> None:
         game_print("Game.print_runners", *(f"    {runner}\n" for runner in self.wave.penance.runners))
@@ -1,7 +1,9 @@
-from typing import List, Tuple, Union, Type, Dict
+from typing import List, Tuple, Union, Type, Dict, Optional, Set
 
+from simulation.base.events import Event
 from simulation.base.terrain import Terrain, Inspectable, C
 from simulation.base.npc import Npc
+from simulation.base.scheduler import Scheduler
 from simulation import penance
 
 
@@ -28,8 +30,19 @@ class Penance:
 
         self.total_counts: Dict[str, int] = {}
 
+        # The relative ticks at which each penance died (see Npc.die), and at which escaped runners despawned.
+        self.deaths: Dict[str, List[int]] = {"a": [], "s": [], "d": [], "h": []}
+        self.escapes: List[int] = []
+
         self.runner_movements: List[List[C]] = []
 
+        # Npcs are only called on the ticks they have something to do on (see Npc.next_event_tick), instead of every
+        # tick. Fast forward mode or not, so that the mode can change mid wave.
+        self.scheduler: Scheduler = Scheduler()
+        self.spawned: int = 0
+        self.had_food: bool = False
+        self.player_tiles: Optional[List[int]] = None
+
         # Before they initially spawn, the early spawners are also "reserves".
         # After this point, self.spawns[key][1] is to be treated as a decremental variable.
         # Meanwhile self.spawns[key][0] should be used for saturation comparison.
@@ -47,31 +60,11 @@ class Penance:
         yield "h", self.healers
 
     def __call__(self) -> bool:
-        # Handle penance tick actions by calling them.
-        for key, species in self:
-            for i, npc in enumerate(species):
-                npc_still_spawned = npc()
-                if not npc.is_alive() and npc.despawn_i < npc.DUE_TO_SPAWN_TICKS:
-                    self.game.wave.penance.set_due_to_spawn(npc.__class__, True)
-                    # Handle penance extinction.
-                    none_alive = [n.is_alive() for n in species].count(True) == 0
-                    if none_alive and self.spawns[key][1] == 0:
-                        # In the real game, this message, along with the check for it, is stalled.
-                        # Here, we want accurate statistics regardless of stall, so this message is always instant.
-                        self.game.wave.print(f"All penance {npc.default_name.lower()}s have been killed "
-                                             f"({Terrain.tick_to_string(self.game.wave.relative_tick)}).")
-                        species.pop()  # Destroy the species completely.
-
-                if not npc_still_spawned:
-                    # Handle penance death.
-                    if len(species) > 0:
-                        species.pop(i)
-                    if not isinstance(npc, penance.Runner) or not npc.has_escaped:
-                        self.game.wave.print(f"{npc.name} death animation finished "
-                                             f"({Terrain.tick_to_string(self.game.wave.relative_tick)}).")
-                    # Spawn eggs
-                    # TODO: BUILD Spawn eggs
-                    del npc
+        # Handle penance tick actions by calling them. Outside of fast forward mode, the game is watched tick by tick, so
+        # the npcs that were not due catch their counters up right away too.
+        self.tick_due()
+        if not self.game.fast_forward:
+            self.settle(self.game.wave.relative_tick)
 
         # Handle penance spawns every penance cycle (6s)
         # Spawning has to be handled after penance death, since a penance can die and another spawn in the same tick.
@@ -85,6 +78,118 @@ class Penance:
 
         return self.count_alive() != 0 or self.count_reserves() != 0
 
+    def tick_species(self, key: str, species: List[Npc], i: int, due: Set[int], visited: Set[int]) -> None:
+        # Calls the npcs of a species from list index i on. This walks the list the way a for loop over
+        # enumerate(species) would, even as npcs get removed from it: the npc after a removed one is skipped for the tick.
+        #
+        # Only the npcs with their id in due are called, and the ids of all npcs walked over are added to visited. Check
+        # Penance.tick_due.
+        while i < len(species):
+            npc = species[i]
+            visited.add(id(npc))
+            if id(npc) in due:
+                self.tick_death(key, species, i, npc, self.call_scheduled(npc))
+            i += 1
+
+    def tick_death(self, key: str, species: List[Npc], i: int, npc: Npc, npc_still_spawned: bool) -> None:
+        # Handles the death of the npc at list index i after it was called.
+        if not npc.is_alive() and npc.despawn_i < npc.DUE_TO_SPAWN_TICKS:
+            self.game.wave.penance.set_due_to_spawn(npc.__class__, True)
+            # Handle penance extinction.
+            none_alive = [n.is_alive() for n in species].count(True) == 0
+            if none_alive and self.spawns[key][1] == 0:
+                # In the real game, this message, along with the check for it, is stalled.
+                # Here, we want accurate statistics regardless of stall, so this message is always instant.
+                self.game.wave.event(Event.PENANCE_EXTINCT, Event.penance(self._get_species(key)))
+                self.remove(species, len(species) - 1)  # Destroy the species completely.
+
+        if not npc_still_spawned:
+            # Handle penance death.
+            if len(species) > 0:
+                self.remove(species, i)
+            if isinstance(npc, penance.Runner) and npc.has_escaped:
+                self.escapes.append(self.game.wave.relative_tick)
+            else:
+                self.deaths[key].append(npc.death_tick)
+                self.game.wave.event(Event.PENANCE_DEATH, Event.penance(self._get_species(key), npc.spawn_tick),
+                                     npc.uuid)
+            # Spawn eggs
+            # TODO: BUILD Spawn eggs
+
+    @staticmethod
+    def remove(species: List[Npc], i: int) -> None:
+        npc = species.pop(i)
+        Scheduler.cancel(npc)
+        npc.deregister()
+
+    def tick_due(self) -> None:
+        # Only the npcs that are due on this tick get called, in list order. The rest have nothing to do, and catch their counters up once they are called again (see Npc.settle).
+        tick = self.game.wave.relative_tick
+        self.refresh(tick)
+        due = self.scheduler.pop_due(tick)
+        due.sort(key=lambda n: n.spawn_i)
+
+        for key, species in self:
+            species_due = [npc for npc in due if npc.penance_key == key]
+            for j, npc in enumerate(species_due):
+                npc_still_spawned = self.call_scheduled(npc)
+                if npc.is_alive():
+                    continue
+
+                # Death handling can remove npcs from the list, which changes which npcs the rest of the loop gets to.
+                # From here on, the list is walked like the unscheduled loop does.
+                i = species.index(npc)
+                visited = {id(n) for n in species[:i + 1]}
+                remaining = {id(n) for n in species_due[j + 1:]}
+                self.tick_death(key, species, i, npc, npc_still_spawned)
+                self.tick_species(key, species, i + 1, remaining, visited)
+
+                for n in species:
+                    if id(n) not in visited:
+                        # The loop skipped over it, so it was not called on this tick at all.
+                        n.settle(tick - 1)
+                        n.settled_tick = tick
+                        if id(n) in remaining:
+                            self.scheduler.schedule(n, tick + 1)
+                break
+
+    def settle(self, tick: int) -> None:
+        for key, species in self:
+            for npc in species:
+                npc.settle(tick)
+
+    def call_scheduled(self, npc: Npc) -> bool:
+        tick = self.game.wave.relative_tick
+        npc.settle(tick - 1)
+        rv = npc()
+        npc.settled_tick = tick
+        self.scheduler.schedule(npc, npc.next_event_tick())
+        return rv
+
+    def refresh(self, tick: int) -> None:
+        # Quiet runners depend on whether there is food on the map, and quiet healers on where players stand (see
+        # Runner.next_event_tick and Healer.next_event_tick). Whenever those change, they get woken up on tick to check.
+        has_food = len(self.game.wave.dropped_food) > 0
+        if has_food and not self.had_food:
+            for runner in self.runners:
+                self.scheduler.wake(runner, tick)
+        self.had_food = has_food
+
+        player_tiles = [_player.location.id for _player in self.game.players.get_iterable()]
+        if player_tiles != self.player_tiles:
+            for healer in self.healers:
+                self.scheduler.wake(healer, tick)
+        self.player_tiles = player_tiles
+
+    def next_event_tick(self) -> int:
+        # Spawning happens on wave cycles, which Wave.next_event_tick accounts for.
+        self.refresh(self.game.wave.relative_tick + 1)
+        rv = self.scheduler.peek()
+        return Inspectable.WAVE if rv is None else rv
+
+    def skip_ticks(self, ticks: int) -> None:
+        pass  # Scheduled npcs catch up on their own (see Npc.settle).
+
     # Key is the one letter yield string that represents the penance species.
     def can_spawn(self, key: Union[Type[Npc], list, int, str]) -> bool:
         key = self._get_letter(key)
@@ -101,9 +206,13 @@ class Penance:
         new_species = self._get_type(key)(self.game)
         self.set_due_to_spawn(key, False)
         self[key].append(new_species)
-        self.game.wave.print(f"A new {new_species.default_name.lower()} has spawned "
-                             f"({Terrain.tick_to_string(self.game.wave.relative_tick)}).")
+        new_species.penance_key = key
+        new_species.spawn_i = self.spawned  # List order, for Penance.tick_due.
+        self.spawned += 1
+        self.scheduler.schedule(new_species, self.game.wave.relative_tick + 1)
+        self.game.wave.event(Event.PENANCE_SPAWN, Event.penance(self._get_species(key)), new_species.uuid)
         if tick is not None:
+            new_species.spawn_tick = tick
             new_species.name = f"{Terrain.tick_to_string(tick):0>3}" + " " + new_species.default_name
 
         if isinstance(new_species, penance.Runner):
@@ -137,6 +246,9 @@ class Penance:
     def _get_type(self, key: Union[Type[Npc], list, int, str]) -> Type:
         return self._get(key, [penance.Fighter, penance.Ranger, penance.Runner, penance.Healer])
 
+    def _get_species(self, key: Union[Type[Npc], list, int, str]) -> int:
+        return self._get(key, [0, 1, 2, 3])  # Indexes Event.SPECIES.
+
     def _get_letter(self, key: Union[Type[Npc], list, int, str]) -> str:
         return self._get(key, ["a", "s", "d", "h"])
 
@@ -47,7 +47,16 @@ class Players:
         raise KeyError(f"Players[{key}] does not exist.")
 
     def __call__(self) -> bool:
+        # Players are polled rather than scheduled like penance (see Penance.scheduler). What they do next changes with
+        # every click, which Ais and clients send between any two ticks, and there are only five of them to ask.
+        fast_forward = self.game.fast_forward
+        tick = self.game.wave.relative_tick
         for key, _player in self:
+            # Players are called after the wave, so next_event_tick counts from a tick they have not been called on yet.
+            if fast_forward and _player.next_event_tick() - 1 > tick:
+                _player.skip_ticks(1)  # Nothing to do on this tick but count down.
+                continue
+
             if not _player():
                 # Returns False if any player dies, a condition for wave end.
                 # However, right now, players cannot die and will always return True,
@@ -56,5 +65,12 @@ class Players:
 
         return True
 
+    def next_event_tick(self) -> int:
+        return min(_player.next_event_tick() for key, _player in self)
+
+    def skip_ticks(self, ticks: int) -> None:
+        for key, _player in self:
+            _player.skip_ticks(ticks)
+
     def get_iterable(self) -> List[Player]:
         return [self.main_attacker, self.second_attacker, self.healer, self.collector, self.defender]
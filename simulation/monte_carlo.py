@@ -0,0 +1,141 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Type, Iterator
+
+from .ai import Ai
+from .base.terrain import Inspectable
+from .simulator import Simulator, SimulationResult
+
+
+# Monte Carlo evaluation of a wave. Runner random walks, Npc random walks and calls are all random, so a wave is only
+# described well by the distribution of many seeded runs of it. Runs are split into shards of consecutive seeds that
+# are simulated in worker processes, and every shard's results are aggregated as soon as it finishes.
+
+
+class Histogram:
+    # An online histogram of tick values, which can be anything between 0 and Inspectable.WAVE. Memory does not grow
+    # with the number of samples, and quantiles are exact.
+    def __init__(self, size: int = Inspectable.WAVE + 1):
+        self.counts: List[int] = [0] * size
+        self.count: int = 0
+        self.total: int = 0
+
+    def add(self, value: int) -> None:
+        self.counts[value] += 1
+        self.count += 1
+        self.total += value
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count > 0 else None
+
+    def quantile(self, q: float) -> Optional[int]:
+        # The smallest value that at least a q fraction of the samples are less than or equal to.
+        if self.count == 0:
+            return None
+        target = max(1, q * self.count)
+        seen = 0
+        for value, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return value
+        return len(self.counts) - 1
+
+    def __str__(self) -> str:
+        if self.count == 0:
+            return "no samples"
+        quantiles = ", ".join(f"p{int(q * 100)}={self.quantile(q)}" for q in MonteCarlo.QUANTILES)
+        return f"n={self.count}, mean={self.mean():.1f}, {quantiles}"
+
+
+class MonteCarloSummary:
+    def __init__(self):
+        self.runs: int = 0
+        self.timeouts: int = 0
+        self.escapes: int = 0
+        self.runs_with_escapes: int = 0
+        self.end_ticks: Histogram = Histogram()
+        self.healer_deaths: Histogram = Histogram()  # Every healer death tick.
+        self.last_healer_deaths: Histogram = Histogram()  # Per run, when the last healer died (if any did).
+
+    def add(self, result: SimulationResult) -> None:
+        self.runs += 1
+        self.timeouts += result.timed_out
+        self.escapes += len(result.escapes)
+        self.runs_with_escapes += len(result.escapes) > 0
+        self.end_ticks.add(result.end_tick)
+        for tick in result.deaths["h"]:
+            self.healer_deaths.add(tick)
+        if len(result.deaths["h"]) > 0:
+            self.last_healer_deaths.add(max(result.deaths["h"]))
+
+    def escape_rate(self) -> float:
+        # The average number of runner escapes per run.
+        return self.escapes / self.runs if self.runs > 0 else 0.0
+
+    def __str__(self) -> str:
+        return "\n".join([
+            f"Runs: {self.runs} ({self.timeouts} timed out)",
+            f"End ticks: {self.end_ticks}",
+            f"Runner escapes: {self.escape_rate():.3f} per run, in {self.runs_with_escapes} runs",
+            f"Healer death ticks: {self.healer_deaths}",
+            f"Last healer death ticks: {self.last_healer_deaths}",
+        ])
+
+
+def simulate_shard(wave_number: int, runner_movements: str, ai: Dict[str, Type[Ai]],
+                   seeds: List[int]) -> List[SimulationResult]:
+    # Runs in worker processes, which is why this is a module level function.
+    rv = []
+    for seed in seeds:
+        rv.append(Simulator(wave_number, runner_movements, ai, seed)())
+    return rv
+
+
+class MonteCarlo:
+    QUANTILES: List[float] = [0.05, 0.25, 0.5, 0.75, 0.95]
+    # Every worker gets about SHARDS_PER_WORKER shards, so that workers that finish early have more to pick up, and
+    # results stream back in pieces. Shards are capped at MAX_SHARD_SIZE runs for big run counts.
+    SHARDS_PER_WORKER: int = 4
+    MAX_SHARD_SIZE: int = 50
+
+    def __init__(self, wave_number: int, runner_movements: str = "", ai: Optional[Dict[str, Type[Ai]]] = None,
+                 runs: int = 1000, seed: int = 0, workers: Optional[int] = None):
+        # Run i is seeded with seed + i, so the same arguments always give the same summary, whatever workers is.
+        # workers defaults to the number of cores. Use workers=1 to simulate in this process.
+        self.wave_number: int = wave_number
+        self.runner_movements: str = runner_movements
+        self.ai: Dict[str, Type[Ai]] = {} if ai is None else ai
+        self.runs: int = runs
+        self.seed: int = seed
+        self.workers: int = workers or os.cpu_count() or 1
+
+    def shard_size(self) -> int:
+        size = math.ceil(self.runs / (self.workers * MonteCarlo.SHARDS_PER_WORKER))
+        return max(1, min(MonteCarlo.MAX_SHARD_SIZE, size))
+
+    def shards(self) -> Iterator[List[int]]:
+        size = self.shard_size()
+        for start in range(self.seed, self.seed + self.runs, size):
+            yield list(range(start, min(start + size, self.seed + self.runs)))
+
+    def results(self) -> Iterator[SimulationResult]:
+        # Yields results shard by shard, in the order shards finish in.
+        if self.workers == 1:
+            for seeds in self.shards():
+                yield from simulate_shard(self.wave_number, self.runner_movements, self.ai, seeds)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(simulate_shard, self.wave_number, self.runner_movements, self.ai, seeds)
+                for seeds in self.shards()
+            ]
+            for future in as_completed(futures):
+                yield from future.result()
+
+    def __call__(self) -> MonteCarloSummary:
+        summary = MonteCarloSummary()
+        for result in self.results():
+            summary.add(result)
+        return summary
@@ -1,6 +1,7 @@
 import math
 from typing import List, Tuple, Union, Optional
 
+import log
 from log import debug, J, LG
 from simulation.base.player import Player
 from simulation.base.terrain import E, Inspectable, Targeting
@@ -65,16 +66,17 @@ class Healer(Npc):
     def do_cycle(self) -> None:
         if (self.game.wave.relative_tick - self.poison_start_tick) % 5 == 0 and self.is_poisoned():
             self.poison_i -= 1
-            debug("Healer.do_cycle.poison", f"{self} ticking {self.poison_damage} poison damage to reach "
-                                            f"{self.hitpoints - self.poison_damage} HP.")
+            if log.DEBUG:
+                debug("Healer.do_cycle.poison", "Ticking poison damage.", unit=self,
+                      poison_damage=self.poison_damage, hitpoints=self.hitpoints - self.poison_damage)
             self.hitpoints -= self.poison_damage
 
         # This entire condition is debug.
-        if self.followee is None:
-            debug("Healer.do_cycle.followee",
-                  f"{self} checking condition with "
-                  f"self.is_still_static = {self.is_still_static} and self.destination = {self.destination} and "
-                  f"self.no_follow_i = {self.no_follow_i} and self.no_random_walk_i = {self.no_random_walk_i}.")
+        if log.DEBUG and self.followee is None:
+            debug("Healer.do_cycle.followee", "Checking the random walk condition.", unit=self,
+                  is_still_static=self.is_still_static,
+                  destination=None if self.destination is None else (self.destination.x, self.destination.y),
+                  no_follow_i=self.no_follow_i, no_random_walk_i=self.no_random_walk_i)
 
         # START: THIS PART IS ALMOST TICK PERFECT.
         # Keep following -> reaching forever.
@@ -94,7 +96,8 @@ class Healer(Npc):
         if self.followee is None and \
                 (self.no_follow_i != 0 or not self.switch_followee()) and \
                 not self.in_initial_state:
-            debug("Healer.do_cycle.random", f"{self} will attempt to random walk because condition is true.")
+            if log.DEBUG:
+                debug("Healer.do_cycle.random", "Will attempt to random walk because the condition is true.", unit=self)
             self.set_random_walk_destination()
             if self.no_follow_i > 0:
                 self.no_follow_i -= 1
@@ -102,18 +105,17 @@ class Healer(Npc):
 
         self.step()
         self.act()
-        debug("Healer.do_cycle", f"{self}")
+        if log.DEBUG:
+            debug("Healer.do_cycle", "Cycled.", unit=self, cycle=self.cycle, target_state=self.target_state,
+                  hitpoints=self.hitpoints, followee=None if self.followee is None else self.followee.uuid)
 
     def switch_followee(self) -> bool:
         # On action is completely ignored here, as it is decided within the function to be
         # self.switch_target_state_and_heal_if_runner
-        self.followee = Targeting.choice(
-            self.choice_arg,
-            self.location,
-            self.target_state == Healer.TARGETING_RUNNER and Healer.RUNNER_ACTION_DISTANCE or Unit.ACTION_DISTANCE
-        )
+        self.followee = Targeting.choice(self.choice_arg, self.location, self.choice_radius, self.game.rng.targeting)
         if self.followee is not None:
-            debug("Healer.switch_followee", f"{self} decided to follow {self.followee}.")
+            if log.DEBUG:
+                debug("Healer.switch_followee", "Decided who to follow.", unit=self, followee=self.followee.uuid)
             self.follow(self.followee)
             self.in_initial_state = False
             return True
@@ -125,8 +127,9 @@ class Healer(Npc):
         # The argument "followee" gets special handling in Healer.switch_followee, and does not need to be provided in
         # the Action's middle Tuple.
         self.target_state = (self.target_state + 1) % Healer.TARGET_STATE_COUNT
-        debug("Healer.on_reach", f"{self} reached {self.followee} "
-                                 f"and switched target state to {self.target_state}.")
+        if log.DEBUG:
+            debug("Healer.on_reach", "Reached its followee and switched target state.", unit=self,
+                  followee=self.followee.uuid, target_state=self.target_state)
         if isinstance(self.followee, Runner):
             self.followee.hitpoints = Runner.HITPOINTS[self.game.wave.number]
 
@@ -138,6 +141,26 @@ class Healer(Npc):
         return self.target_state == Healer.TARGETING_PLAYER and \
                self.game.players.get_iterable() or self.game.wave.penance.runners
 
+    @property
+    def choice_radius(self) -> int:
+        return self.target_state == Healer.TARGETING_RUNNER and Healer.RUNNER_ACTION_DISTANCE or Unit.ACTION_DISTANCE
+
+    def next_event_tick(self) -> int:
+        # A healer that has not found anything to follow yet stands still until something comes into sight. Until
+        # then, it only acts to take poison damage. Sight is the expensive check, so it is only made if the healer could
+        # otherwise be skipped over.
+        tick = self.game.wave.relative_tick
+        if not self.is_alive() or not self.in_initial_state or self.followee is not None or \
+                self.location != self.destination:
+            return tick + 1
+        rv = Inspectable.WAVE
+        if self.is_poisoned():
+            rv = tick + Healer.POISON_TICKS_PER_HITSPLAT - \
+                (tick - self.poison_start_tick) % Healer.POISON_TICKS_PER_HITSPLAT
+        if rv == tick + 1 or len(Targeting.filter_by_sight(self.choice_arg, self.location, self.choice_radius)) > 0:
+            return tick + 1
+        return rv
+
     def apply_poison(self) -> None:
         # Player Healer calls this function.
         if not self.is_poisoned():
@@ -146,11 +169,14 @@ class Healer(Npc):
         # We reset the poison damage if it's already poisoned.
         self.poison_i = Healer.MAX_POISON_I
 
-        debug("Healer.apply_poison", f"{self} got manually poisoned to reach "
-                                     f"{self.hitpoints - Healer.MAX_POISON_DAMAGE} HP.")
+        if log.DEBUG:
+            debug("Healer.apply_poison", "Got manually poisoned.", unit=self,
+                  hitpoints=self.hitpoints - Healer.MAX_POISON_DAMAGE)
         # The forced poison damage.
         self.hitpoints -= Healer.MAX_POISON_DAMAGE
 
+        self.game.wave.penance.scheduler.wake(self, self.game.wave.relative_tick + 1)
+
     def is_poisoned(self) -> bool:
         return self.poison_i > 0
 
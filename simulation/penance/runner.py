@@ -1,11 +1,12 @@
-from random import random
 from typing import List, Tuple, Optional
 
+import log
 from log import debug, J, LB
+from simulation.base.events import Event
 from simulation.base.game_object import Trap
-from simulation.base.terrain import Terrain, C, D, E, Inspectable, Locatable
+from simulation.base.terrain import C, D, E, Inspectable, Locatable
 from simulation.base.npc import Npc
-from simulation.base.dropped_item import Food
+from simulation.base.dropped_item import Food, DroppedFood
 
 
 # TODO: BUILD blughing.
@@ -18,11 +19,6 @@ class Runner(Npc):
     TARGET_STATE_COUNT: int = 3
     INITIAL_TARGET_STATE: int = -1
 
-    DEATH_MESSAGE: str = "Urghhh!"
-    ESCAPE_MESSAGE: str = "Raaa!"
-    CORRECT_EAT_MESSAGE: str = "Chomp, chomp."
-    INCORRECT_EAT_MESSAGE: str = "Blughhhh."
-
     DUE_TO_SPAWN_TICKS: int = 1
     URGH_RAA_DELAY: int = 2  # For the two-tick delay between chomping and urghing, or reaching cave and raaing.
 
@@ -49,8 +45,8 @@ class Runner(Npc):
         if self.has_chomped:
             self.urgh_raa_i -= 1
             if self.urgh_raa_i == 0:
-                self.state = Npc.DEAD
-                self.print(self.DEATH_MESSAGE)
+                self.die()
+                self.event(Event.RUNNER_DEATH)
             return
 
         if self.has_escaped:
@@ -59,7 +55,7 @@ class Runner(Npc):
             # Since Penance decrements the amount of reserve runners when spawning them,
             # we need to re-add this escaped runner back to reserves by incrementing that count.
             self.game.wave.penance.spawns["d"][1] += 1
-            self.state = Npc.DEAD
+            self.die()
             return
 
         if self.cycle in [1, 6]:
@@ -81,7 +77,8 @@ class Runner(Npc):
             self.destination = self.walk()
 
         if self.cycle == 1 and self.blugh_i == 0 and self.followee is None:
-            debug("Runner.do_cycle", f"{self} will stop movement because the target food disappeared.")
+            if log.DEBUG:
+                debug("Runner.do_cycle", "Will stop movement because the target food disappeared.", unit=self)
             self.stop_movement()
 
         if not followee_eaten_or_picked:
@@ -89,6 +86,17 @@ class Runner(Npc):
 
         return
 
+    def next_event_tick(self) -> int:
+        # A runner that stands still with nothing to follow only acts on the cycles it can escape, walk, or retarget on.
+        # It can only retarget if there is food on the map.
+        tick = self.game.wave.relative_tick
+        if not self.is_alive() or self.has_chomped or self.has_escaped or self.followee is not None or \
+                self.location != self.destination:
+            return tick + 1
+        if len(self.game.wave.dropped_food) > 0:
+            return tick + self.ticks_until_cycle([1, 2, 3, 4, 5, 6])
+        return tick + self.ticks_until_cycle([1, 6])
+
     def tick_despawn(self) -> bool:
         # Runner tick_despawn breaks traps if Npc tick_despawn returns True.
         rv = super().tick_despawn()
@@ -98,7 +106,7 @@ class Runner(Npc):
                     trap.charges -= 1  # We don't need to check for chomp because cannoning a runner beside
         return rv                      # a trap reduces charges.
 
-    def tick_target(self, food: List[Food]) -> None:
+    def tick_target(self, food: DroppedFood) -> None:
         if self.target_state != Runner.CYCLE_MAP[self.cycle]:
             return
 
@@ -109,53 +117,55 @@ class Runner(Npc):
         first_food = None
         for zone_delta in scan_order:
             scan_zone = zone + zone_delta
-            if scan_zone != scan_zone.clamp(D.X, E.RUNNER_ZONE_CLAMP_SQ):
+            if not (0 <= scan_zone.x < E.RUNNER_ZONE_COUNT and 0 <= scan_zone.y < E.RUNNER_ZONE_COUNT):
                 continue
 
             # Within the first zone (in order of preference) in which food it has a line-of-sight over is found,
             # the runner eats the newest-placed food  it has a line-of-sight over.
-            for o in reversed(Terrain.filter_food_by_zone(food, scan_zone)):  # Reversed so newest first.
+            for o in food.newest_in_zone(scan_zone):
                 if not self.can_see(o):
                     continue
                 if first_food is None:
                     first_food = o
                 if self.location.chebyshev_to(o.location) <= self.SNIFF_DISTANCE:
-                    debug("Runner.tick_target",
-                          f"{self} switched followee from {self.followee} to {first_food}.")
+                    if log.DEBUG:
+                        debug("Runner.tick_target", "Switched followee.", unit=self,
+                              old=None if self.followee is None else self.followee.uuid, new=first_food.uuid)
 
                     self.target_state = 0
                     # Follow just sets self.destination, Npc.step is where the pathing and movement is at.
                     self.follow(first_food)
                     return
 
-    def tick_eat(self, food: List[Food], traps: List[Trap]) -> bool:
+    def tick_eat(self, food: DroppedFood, traps: List[Trap]) -> bool:
         # Returns False if no action concerning the food has been made: We are still following or random-walking.
         # Returns True if an action concerning the food has been made: We just ate it or it has been picked up.
         # Currently, the return value has no use.
         if self.followee is None:
             # Not following any food. Probably will random-walk.
-            debug("Runner.tick_eat",
-                  f"{self} has no followee. It is random walking.")
+            if log.DEBUG:
+                debug("Runner.tick_eat", "Has no followee. It is random walking.", unit=self)
             return False
 
-        if self.followee not in Terrain.filter_food_by_zone(food, self.followee.location.get_runner_zone()):
+        if self.followee not in food:
             # The food got picked up. We only reset the followee but don't stop movement.
 
             # This part is debugging code
-            debug("Runner.tick_eat",
-                  f"{self} tried to eat {self.followee} but it got picked/eaten.")
+            if log.DEBUG:
+                debug("Runner.tick_eat", "Tried to eat its followee but it got picked/eaten.", unit=self,
+                      followee=self.followee.uuid)
 
-            hendi_success = self.cycle in Runner.TARGET_STATE_MAP[self.target_state]
-            soft_crash = self.cycle in [7, 8, 9, 0]
+                hendi_success = self.cycle in Runner.TARGET_STATE_MAP[self.target_state]
+                soft_crash = self.cycle in [7, 8, 9, 0]
 
-            if hendi_success:
-                debug("Runner.tick_eat.verbose", f"{self} successfully got hendied.")
+                if hendi_success:
+                    debug("Runner.tick_eat.verbose", "Successfully got hendied.", unit=self, cycle=self.cycle)
 
-            if soft_crash:
-                debug("Runner.tick_eat.verbose", f"{self} slow multied / soft crashed.")
+                if soft_crash:
+                    debug("Runner.tick_eat.verbose", "Slow multied / soft crashed.", unit=self, cycle=self.cycle)
 
-            if not soft_crash and not hendi_success:
-                debug("Runner.tick_eat.verbose", f"{self} hard crashed.")
+                if not soft_crash and not hendi_success:
+                    debug("Runner.tick_eat.verbose", "Hard crashed.", unit=self, cycle=self.cycle)
             # This is the end of the debugging code part.
 
             self.stop_movement(clear_destination=False)
@@ -166,15 +176,16 @@ class Runner(Npc):
             # Hasn't reached the food yet, or stuck.. Will continue following.
             # It checks for this BEFORE stepping, which means it eats one tick after the final step,
             # and not on the final step tick?
-            debug("Runner.tick_eat",
-                  f"{self} tried to eat {self.followee} but it hasn't reached it yet.")
+            if log.DEBUG:
+                debug("Runner.tick_eat", "Tried to eat its followee but it hasn't reached it yet.", unit=self,
+                      followee=self.followee.uuid)
             return False
 
         # At this point, we're on top of our target food that still exists, so we're definitely
         # going to eat and stop movement.
 
         if self.followee.is_correct:
-            self.print(Runner.CORRECT_EAT_MESSAGE)
+            self.event(Event.RUNNER_CORRECT_EAT)
 
             # If it ate beside a trap, set it to dead so that Runner.__call__ can take care of the rest of the
             # death sequence (passing False to Penance.__call__ at the very end).
@@ -183,7 +194,7 @@ class Runner(Npc):
                     self.has_chomped = True
         else:
             # We ate a wrong food.
-            self.print(Runner.INCORRECT_EAT_MESSAGE)
+            self.event(Event.RUNNER_INCORRECT_EAT)
 
             self.blugh_i = 3
             self.target_state = 0
@@ -192,11 +203,13 @@ class Runner(Npc):
             # Blugh moves have special logic for wave 10, be careful when implementing.
             self.destination = C(self.location.x, (E.TRAP + 4 * D.N).y)
 
-        debug("Runner.tick_eat",
-              f"{self} ate {self.followee}, which was {self.followee.is_correct and 'correct' or 'wrong'}.")
+        if log.DEBUG:
+            debug("Runner.tick_eat", "Ate its followee.", unit=self,
+                  followee=self.followee.uuid, is_correct=self.followee.is_correct)
 
         # Remove the food.
-        food.pop(food.index(self.followee))
+        food.remove(self.followee)
+        self.followee.deregister()
         self.stop_movement()
 
         return True
@@ -204,7 +217,7 @@ class Runner(Npc):
     def tick_escape(self) -> None:
         if self.location.y == E.RAA_TILE.y:
             self.has_escaped = True
-            self.print(self.ESCAPE_MESSAGE)
+            self.event(Event.RUNNER_ESCAPE)
 
     def get_random_walk(self) -> C:
         # Forced movement can be set to simulate a wave when runners move the specified movement.
@@ -215,7 +228,7 @@ class Runner(Npc):
 
         # Runners have a 1/6 chance for east movement, 1/6 for west movement, and 4/6 for south movement.
         # Runners do not automatically random-walk north ever.
-        roll = int(random() * 6)
+        roll = int(self.game.rng.runners.random() * 6)
         if roll == 0:
             return D.E
         if roll == 1:
@@ -244,7 +257,7 @@ class Runner(Npc):
         # This has a different rule for wave 10 so be careful when implementing.
         destination.x = max(min(destination.x, E.TRAP.x), (E.WEST_TRAP + D.W).x)
 
-        debug("Runner.walk",
-              f"{self} decided to walk to {destination}.")
+        if log.DEBUG:
+            debug("Runner.walk", "Decided where to walk.", unit=self, destination=(destination.x, destination.y))
 
         return destination
@@ -63,6 +63,12 @@ class Attacker(Player):
         # Do the rest of player processing.
         return super().__call__()
 
+    def next_event_tick(self) -> int:
+        # The special attack bar restores every tick.
+        if self.spec < Attacker.MAX_SPEC:
+            return self.game.wave.relative_tick + 1
+        return super().next_event_tick()
+
     @staticmethod
     def access_letter() -> str:
         return "a"
@@ -97,6 +103,11 @@ class MainAttacker(Attacker):
 
         return super().__call__()
 
+    def next_event_tick(self) -> int:
+        if len(self.stall_queue) > 0:
+            return self.game.wave.relative_tick + 1
+        return super().next_event_tick()
+
     def str_info(self) -> str:
         return f"{M}{'MAttacker':<11}({self.game.tick:0>3}, _, _)@{self.location}{J}"
 
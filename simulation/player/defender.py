@@ -1,10 +1,11 @@
 from typing import List, Optional
 
+import log
 from log import debug
 
 from simulation.base.dropped_item import Food, DroppedItem, Logs, Hammer
 from simulation.base.game_object import Trap, WEGameObject
-from simulation.base.terrain import E, Inspectable, Y, Terrain, Locatable
+from simulation.base.terrain import E, Inspectable, Y, Locatable
 from simulation.base.player import Player
 from simulation.base.unit import Unit
 
@@ -25,10 +26,17 @@ class Defender(Player):
             self.trap.charges = 2
             self.inventory[self.inventory.index(Y.LOGS)] = Y.EMPTY
             self.trap = None
-        debug("Defender.repair_trap", f"Defender successfully repaired the trap.")
+        if log.DEBUG:
+            debug("Defender.repair_trap", "Successfully repaired the trap.", unit=self)
 
         return super().__call__()
 
+    def next_event_tick(self) -> int:
+        # The trap gets repaired as soon as busy_i runs out.
+        if self.trap is not None:
+            return self.game.wave.relative_tick + 1
+        return super().next_event_tick()
+
     @staticmethod
     def access_letter() -> str:
         return "d"
@@ -58,7 +66,7 @@ class Defender(Player):
         assert str(food_type) in self.inventory, "We cannot drop food we do not have."
         assert food_type < self.CALL_COUNT, "We cannot drop things that aren't food."
         for i in range(count):
-            self.game.wave.dropped_food.append(Food(
+            self.game.wave.dropped_food.add(Food(
                 self.location,
                 food_type,
                 food_type == self.correct_call,
@@ -70,7 +78,7 @@ class Defender(Player):
         for slot in inventory_slots:
             if self.inventory[slot] not in [Y.CRACKERS, Y.TOFU, Y.WORMS]:
                 continue
-            self.game.wave.dropped_food.append(Food(
+            self.game.wave.dropped_food.add(Food(
                 self.location,
                 int(self.inventory[slot]),
                 int(self.inventory[slot]) == self.correct_call,
@@ -81,14 +89,17 @@ class Defender(Player):
     def repair_trap(self) -> bool:
         assert self.followee.charges < 2, "Cannot repair a trap that's already repaired."
 
-        debug("Defender.repair_trap", f"Defender successfully reached the trap and will attempt to repair it.")
+        if log.DEBUG:
+            debug("Defender.repair_trap", "Successfully reached the trap and will attempt to repair it.", unit=self)
 
         if Y.LOGS in self.inventory and Y.HAMMER in self.inventory:
             self.busy_i = Defender.TRAP_BUSY_WAIT  # Repairing trap is a 5 tick action.
             self.trap = self.followee
-            debug("Defender.repair_trap", f"Defender successfully queued the trap repair action.")
+            if log.DEBUG:
+                debug("Defender.repair_trap", "Successfully queued the trap repair action.", unit=self)
             return True
-        debug(f"Defender.repair_trap", f"Defender failed to repair trap with inventory: {self.inventory}.")
+        if log.DEBUG:
+            debug("Defender.repair_trap", "Failed to repair the trap.", unit=self, inventory=tuple(self.inventory))
         return False
 
     def pick_item(self) -> bool:
@@ -98,7 +109,8 @@ class Defender(Player):
             assert self.followee in self.game.wave.dropped_hnls or self.followee in self.game.wave.dropped_food, \
                 "The defender can only pick up items that are dropped."
         except AssertionError as e:
-            debug("Defender.pick_item", f"{self} returned False due to the assertion: {str(e)}")
+            if log.DEBUG:
+                debug("Defender.pick_item", "Returned False due to an assertion.", unit=self, assertion=str(e))
             return False
 
         if Y.EMPTY not in self.inventory:
@@ -116,8 +128,9 @@ class Defender(Player):
                 self.game.wave.hnl_flags |= self.game.wave.SPAWN_FAR_LOGS
         if isinstance(self.followee, Food):
             self.inventory[self.inventory.index(Y.EMPTY)] = str(self.followee.which)
-            self.game.wave.dropped_food.pop(self.game.wave.dropped_food.index(self.followee))
+            self.game.wave.dropped_food.remove(self.followee)
 
+        self.followee.deregister()
         self.followee = None
 
     def click_drop_food(self, which: int, count: int = 1) -> bool:
@@ -135,17 +148,22 @@ class Defender(Player):
 
     def click_repair_trap(self, which: int = WEGameObject.EAST) -> bool:
         trap = self.game.wave.game_objects.traps[which]
-        debug("Defender.click_repair_trap", f"Click repair trap on trap {which} -> {trap}.")
+        if log.DEBUG:
+            debug("Defender.click_repair_trap", "Click repair trap.", unit=self, which=which, trap=trap.uuid)
         if not self.location.renders_game_object(trap):
-            debug("Defender.click_repair_trap", f"{self} cannot render the trap {trap}.")
+            if log.DEBUG:
+                debug("Defender.click_repair_trap", "Cannot render the trap.", unit=self, trap=trap.uuid)
             return False
         self.follow(trap)
         self.move(self.destination)
-        debug("Defender.click_repair_trap",
-              f"{self} followed the trap {trap}and has pathing queue: {Terrain.queue_info(self.pathing_queue)}.")
+        if log.DEBUG:
+            debug("Defender.click_repair_trap", "Followed the trap.", unit=self, trap=trap.uuid,
+                  pathing_queue=tuple((tile.x, tile.y) for tile in self.pathing_queue))
         return True
 
-    def click_pick_item(self, item: DroppedItem) -> bool:
+    def click_pick_item(self, item: Optional[DroppedItem]) -> bool:
+        if item is None:  # Already picked up or eaten (see Inspectable.find_by_uuid).
+            return False
         if not self.location.renders_dropped_item(item):
             return False
         self.follow(item)
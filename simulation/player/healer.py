@@ -1,7 +1,9 @@
 from typing import List, Optional
 
+import log
 from log import debug
 from simulation.base.dispenser import Dispenser
+from simulation.base.events import Event
 from simulation.base.terrain import E, Inspectable, Y, Locatable
 from simulation.base.player import Player
 from simulation.base.unit import Unit
@@ -68,14 +70,17 @@ class Healer(Player):
         assert str(which) in self.inventory, "We cannot use poison food we do not have."
         assert which < self.CALL_COUNT, "We cannot use things that aren't poison food."
         if which == self.correct_call:
-            debug("Healer.use_poison_food", f"{self} successfully poisoned {self.followee}.")
+            if log.DEBUG:
+                debug("Healer.use_poison_food", "Successfully poisoned its followee.", unit=self, followee=self.followee.uuid)
             self.followee.apply_poison()
         else:
-            self.print("Incorrect poison food.")
+            self.event(Event.INCORRECT_POISON)
         self.inventory[self.inventory.index(str(which))] = Y.EMPTY
         self.busy_i = Healer.POISON_BUSY_WAIT
 
-    def click_use_poison_food(self, which: int, healer: penance.Healer) -> bool:
+    def click_use_poison_food(self, which: int, healer: Optional[penance.Healer]) -> bool:
+        if healer is None:  # Already despawned (see Inspectable.find_by_uuid).
+            return False
         if not self.location.renders_unit(healer):
             return False
         self.action_args = (which,)
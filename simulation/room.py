@@ -1,24 +1,21 @@
-import traceback
 from typing import Callable, List, Dict, Optional, Type, Any
 from flask_socketio import SocketIO
-from threading import Thread
 
-from log import debug
 from .base.player import Player
 from .base.terrain import Action
 from .game import Game
 from .ai import Healer, Ai
+from .ticker import ticker
 
 
 class Room:
-    DELAY_DURATION = 0.6
+    DELAY_DURATION = 0.6  # See Ticker.PERIOD.
     DELAY = 0  # Delays for DELAY_DURATION between ticks. Deactivate this if instant-running.
     PAUSE = 1  # Pauses for confirmation between ticks. Deactivate this if using a GUI.
     F_FWD = 2  # Fast forwards. Useful for training a bot.
 
     def __init__(self, _id: str, server: SocketIO):
         self.is_alive: bool = True
-        self.thread: Optional[Thread] = None
         # This room is related to a socketio room. The id (base64 encoded) is considered the room number.
         # The first player to connect to the room creates it, and defines a room id.
         self.id: str = _id
@@ -40,31 +37,16 @@ class Room:
         self.mode: int = Room.DELAY
 
     def __call__(self) -> None:
+        # DELAY and F_FWD rooms are played by the ticker until they are paused or die. A PAUSE room plays a single tick.
         if self.mode == Room.DELAY or self.mode == Room.F_FWD:
-            assert self.thread is None, "You tried calling the room when the thread already exists!"
-
-            def run(room: Room) -> None:
-                while True:  # TODO: Multiple connections, multiple games.
-                    assert room.is_alive, "Room died. This exception is meant to kill the thread."
-
-                    try:
-                        room.iterate()
-                    except (TypeError, AssertionError, AttributeError, NotImplementedError, KeyError) as _:
-                        debug("Room.__call__", "Encountered an error. Resetting game.")
-                        traceback.print_exc()
-                        room.game = Game()
-                        self.game.set_new_players(self.ai)
-
-                    if room.mode == Room.DELAY:
-                        room.server.sleep(Room.DELAY_DURATION)
-                    if room.mode == Room.PAUSE:
-                        break
-
-            self.thread = Thread(target=run, args=(self,))
-            self.thread.start()
+            ticker.add(self)
             return None
         if self.mode == Room.PAUSE:
-            return self.iterate()
+            return ticker.step(self)
+
+    def reset(self) -> None:
+        self.game = Game()
+        self.game.set_new_players(self.ai)
 
     def emit_state(self) -> Any:
         raise NotImplementedError("Whatever imports Room should settattr(Room, \"emit_state\", some_method) to it.")
@@ -97,11 +79,8 @@ class Room:
     def set_mode(self, mode: int) -> None:
         assert mode in [Room.DELAY, Room.PAUSE, Room.F_FWD], f"Invalid room mode {mode}."
         self.mode = mode
-        if mode == Room.PAUSE:
-            if self.thread is not None:
-                self.thread.join()
-            self.thread = None
-        else:
+        # The ticker picks the new mode up before the room's next tick.
+        if mode != Room.PAUSE:
             self()
 
     def accept_player_connection(self, client_id: str, role: str) -> None:
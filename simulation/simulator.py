@@ -0,0 +1,68 @@
+from time import perf_counter
+from typing import Dict, NamedTuple, Optional, Tuple, Type
+
+from .ai import Ai
+from .base.terrain import Terrain
+from .game import Game
+
+
+# Headless simulation. Nothing on this import path may import flask, flask_socketio or threading related code, since
+# this is what offline runs (training, evaluation, benchmarks) build on. For playing with a GUI, see Room instead.
+
+
+class SimulationResult(NamedTuple):
+    wave: int  # 0-indexed, like Game.start_new_wave.
+    seed: int  # The seed the game was played with, drawn by Rng if the Simulator is unseeded, to replay it with.
+    end_tick: int  # The relative tick the wave ended on.
+    timed_out: bool  # True if the wave was forced to end by Inspectable.WAVE instead of all penance dying.
+    deaths: Dict[str, Tuple[int, ...]]  # Relative death ticks of every penance, keyed by penance key (see Penance).
+    escapes: Tuple[int, ...]  # Relative ticks at which runners escaped.
+
+
+class Simulator:
+    def __init__(self, wave_number: int, runner_movements: str = "", ai: Optional[Dict[str, Type[Ai]]] = None,
+                 seed: Optional[int] = None, fast_forward: bool = True):
+        # runner_movements uses the standard runner movement syntax (see Terrain.parse_runner_movements).
+        # ai maps player roles to the Ai that controls them. Roles without an Ai stand idle.
+        # fast_forward skips over ticks on which nothing happens (see Game.next_event_tick). It does not change results.
+        self.wave_number: int = wave_number
+        self.runner_movements: str = runner_movements
+        self.ai: Dict[str, Type[Ai]] = {} if ai is None else ai
+        self.seed: Optional[int] = seed
+        self.fast_forward: bool = fast_forward
+        self.game: Optional[Game] = None
+
+    def new_game(self) -> Game:
+        # An unseeded Simulator plays a differently seeded game on every call.
+        game = Game(self.seed)
+        game.fast_forward = self.fast_forward
+        game.set_new_players(self.ai)
+        game.start_new_wave(self.wave_number, Terrain.parse_runner_movements(self.runner_movements))
+        return game
+
+    def __call__(self) -> SimulationResult:
+        # Runs a fresh game of the wave to completion.
+        self.game = self.new_game()
+        while self.game():
+            pass
+        return self.result()
+
+    def result(self) -> SimulationResult:
+        wave = self.game.wave
+        return SimulationResult(
+            wave=self.wave_number,
+            seed=self.game.rng.seed,
+            end_tick=wave.relative_tick,
+            timed_out=not wave.end_flag,
+            deaths={key: tuple(ticks) for key, ticks in wave.penance.deaths.items()},
+            escapes=tuple(wave.penance.escapes),
+        )
+
+    def benchmark(self, runs: int = 100) -> float:
+        # Runs the wave runs times and returns the number of game ticks simulated per second.
+        ticks = 0
+        start = perf_counter()
+        for _ in range(runs):
+            self()
+            ticks += self.game.wave.relative_tick + 1
+        return ticks / (perf_counter() - start)
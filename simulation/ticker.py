@@ -0,0 +1,136 @@
+import asyncio
+import traceback
+from threading import Thread, Lock
+from time import monotonic
+from typing import List, Optional
+
+from log import debug
+
+
+class Ticker:
+    # Drives every Room from a single asyncio event loop, running on a single thread, instead of a thread per room.
+    #
+    # DELAY rooms all tick together, every PERIOD seconds. Tick deadlines are anchored to the monotonic clock of the
+    # first tick (deadline n is start + n * PERIOD), so the time a tick and its emits take is absorbed by the sleep
+    # before the next deadline instead of adding up. If the loop falls more than a whole PERIOD behind, it skips the
+    # missed deadlines instead of bursting through them, and counts them in overruns.
+    #
+    # F_FWD rooms use the time between DELAY ticks. They play BURST ticks at a time, taking turns, and yield to the
+    # loop between bursts so that they cannot hold up DELAY rooms by more than a burst. The deadline is checked after
+    # every burst, and the next period picks up with the room whose turn it is.
+    #
+    # An error while playing a room only resets that room (or kills it, if resetting fails too). The loop itself
+    # restarts on any other error, and clears is_running if it stops for good, so that Ticker.start can start it again.
+    #
+    # PAUSE rooms are not ticked. Ticker.step plays a single tick of one on the loop when a client asks for it.
+    PERIOD: float = 0.6
+    BURST: int = 10
+
+    def __init__(self):
+        self.rooms: List = []  # List[Room]. Room imports Ticker, so Room cannot be imported here.
+        self.lock: Lock = Lock()  # Guards rooms and starting, which clients do from their own threads.
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[Thread] = None
+        self.is_running: bool = False
+
+        self.ticks: int = 0  # DELAY ticks so far.
+        self.overruns: int = 0  # DELAY ticks skipped because the loop fell behind.
+        self.max_lateness: float = 0.0  # How late a DELAY tick started, at worst, in seconds.
+        self.turn: int = 0  # Bursts played by F_FWD rooms so far.
+
+    def add(self, room) -> None:
+        with self.lock:
+            if room not in self.rooms:
+                self.rooms.append(room)
+        self.start()
+
+    def step(self, room) -> None:
+        # Plays a tick of a PAUSE room on the loop, in between the ticks of other rooms.
+        self.start()
+        self.loop.call_soon_threadsafe(Ticker.tick, room)
+
+    def start(self) -> None:
+        with self.lock:
+            if self.is_running:
+                return
+            self.is_running = True
+            self.loop = asyncio.new_event_loop()
+            self.thread = Thread(target=self.loop.run_until_complete, args=(self.run(),), daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.thread.join()
+        self.loop.close()
+        self.thread = None
+        self.loop = None
+
+    @staticmethod
+    def tick(room) -> None:
+        if not room.is_alive:
+            return
+        try:
+            room.iterate()
+        except Exception as _:
+            debug("Ticker.tick", "Encountered an error. Resetting game.", room=room.id)
+            traceback.print_exc()
+            try:
+                room.reset()
+            except Exception as _:
+                debug("Ticker.tick", "Encountered an error resetting the room. Killing it.", room=room.id)
+                traceback.print_exc()
+                room.is_alive = False
+
+    def live_rooms(self, mode: int) -> List:
+        with self.lock:
+            self.rooms = [room for room in self.rooms if room.is_alive]
+            return [room for room in self.rooms if room.mode == mode]
+
+    async def run(self) -> None:
+        try:
+            while self.is_running:
+                try:
+                    await self.play()
+                except Exception as _:
+                    debug("Ticker.run", "Encountered an error. Restarting the loop.")
+                    traceback.print_exc()
+                    await asyncio.sleep(Ticker.PERIOD)
+        finally:
+            self.is_running = False
+
+    async def play(self) -> None:
+        from .room import Room
+
+        start = monotonic()
+        n = 0
+        while self.is_running:
+            lateness = monotonic() - (start + n * Ticker.PERIOD)
+            if lateness > Ticker.PERIOD:
+                skipped = int(lateness // Ticker.PERIOD)
+                self.overruns += skipped
+                n += skipped
+                lateness -= skipped * Ticker.PERIOD
+            self.max_lateness = max(self.max_lateness, lateness)
+
+            for room in self.live_rooms(Room.DELAY):
+                Ticker.tick(room)
+            self.ticks += 1
+            n += 1
+            deadline = start + n * Ticker.PERIOD
+
+            # Fast forward until the next deadline, a burst at a time. Rooms between waves have nothing to play.
+            rooms = [room for room in self.live_rooms(Room.F_FWD) if room.game.wave is not None]
+            while len(rooms) > 0 and monotonic() < deadline and self.is_running:
+                room = rooms[self.turn % len(rooms)]
+                self.turn += 1
+                for _ in range(Ticker.BURST):
+                    Ticker.tick(room)
+                await asyncio.sleep(0)  # Lets steps of PAUSE rooms in.
+                rooms = [room for room in self.live_rooms(Room.F_FWD) if room.game.wave is not None]
+
+            await asyncio.sleep(max(0.0, deadline - monotonic()))
+
+
+ticker: Ticker = Ticker()
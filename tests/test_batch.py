@@ -0,0 +1,9 @@
+from simulation.batch import validate
+
+
+def test_batch_plays_like_the_object_engine():
+    # Scripted games, with forced and random runner movements, and unscripted games that leave the penance alone.
+    for wave_number in range(9):
+        assert validate(wave_number, "ws-e", [0, 1, 2]) is None, f"Wave {wave_number + 1} played differently."
+        assert validate(wave_number, "", [3, 4], scripted=False) is None, \
+            f"Wave {wave_number + 1} played differently unscripted."
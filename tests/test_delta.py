@@ -0,0 +1,50 @@
+import json
+
+from play.delta import DeltaEncoder, patch
+from play.emit import build_emittable_object_from
+from simulation.ai import Healer
+from simulation.base.terrain import D, E, Terrain
+from simulation.game import Game
+
+
+def play(wave_number: int, seed: int):
+    # Plays a wave with the healer Ai and a scripted defender, yielding the state a room emits every tick. The defender
+    # stocks, drops food and picks some back up, so that inventories, calls and dropped food all change mid wave.
+    game = Game(seed)
+    game.set_new_players({"h": Healer})
+    game.start_new_wave(wave_number, Terrain.parse_runner_movements("ws-e"))
+    defender = game.players.defender
+    while game():
+        tick = game.wave.relative_tick
+        if tick == 1:
+            defender.click_use_dispenser()
+        if tick == 6:
+            defender.click_move(E.TRAP + D.N)
+        if tick in (16, 23, 40, 61):
+            defender.click_drop_food(defender.correct_call, 1)
+        if tick == 70 and len(game.wave.dropped_food) > 0:
+            defender.click_pick_item(game.wave.dropped_food[0])
+        yield build_emittable_object_from(game.inspectable)
+        game.inspectable.events.clear()
+
+
+def test_replaying_deltas_gives_every_state():
+    # A client that applies every message in order must end up with the very state that was emitted on every tick,
+    # keyframes and deltas alike. Emitted states must not share lists or dicts with the live game, or the deltas
+    # would be taken against a base that already changed.
+    for wave_number in (0, 4, 8):
+        encoder = DeltaEncoder(keyframe_interval=50)
+        current = None
+        for state in play(wave_number, 1):
+            expected = json.loads(json.dumps(state))
+            message = json.loads(json.dumps(encoder(state)))
+            current = message["game"] if "game" in message else patch(current, message["delta"])
+            assert current == expected, f"Wave {wave_number + 1} frame {message['frame']} replayed wrong."
+
+
+def test_keyframe_is_the_latest_state():
+    encoder = DeltaEncoder()
+    assert encoder.keyframe() is None
+    for state in play(0, 2):
+        encoder(state)
+    assert json.loads(json.dumps(encoder.keyframe()["game"])) == json.loads(json.dumps(state))
@@ -0,0 +1,69 @@
+import json
+import random
+from typing import List
+
+from play.emit import build_emittable_object_from
+from simulation.ai import Healer
+from simulation.base.terrain import Terrain
+from simulation.game import Game
+from simulation.simulator import Simulator
+from test_delta import play
+
+
+def replay(wave_number: int, seed: int):
+    return [json.dumps(state) for state in play(wave_number, seed)]
+
+
+def test_seeded_games_replay_the_same_states():
+    # All randomness in a game comes from its own Rng, so the global random module must not change what is played.
+    for wave_number in (0, 4, 8):
+        random.seed(1)
+        states = replay(wave_number, 1)
+        random.seed(2)
+        assert replay(wave_number, 1) == states, f"Wave {wave_number + 1} did not replay with the same seed."
+
+
+def test_differently_seeded_games_diverge():
+    for wave_number in (0, 4, 8):
+        assert replay(wave_number, 1) != replay(wave_number, 2), f"Wave {wave_number + 1} ignored its seed."
+
+
+def test_fast_forward_does_not_change_results():
+    # Including a game that only starts fast forwarding mid wave, after its penance have spawned.
+    for wave_number in (0, 4, 8):
+        results = [Simulator(wave_number, "ws-e", {"h": Healer}, 1, fast_forward)() for fast_forward in (False, True)]
+        assert results[0] == results[1], f"Wave {wave_number + 1} played differently fast forwarding."
+
+        simulator = Simulator(wave_number, "ws-e", {"h": Healer}, 1, fast_forward=False)
+        simulator.game = simulator.new_game()
+        while simulator.game.wave.relative_tick < 50 and simulator.game():
+            pass
+        simulator.game.fast_forward = True
+        while simulator.game():
+            pass
+        assert simulator.result() == results[0], f"Wave {wave_number + 1} played differently switching to fast forward."
+
+
+def replay_from(game: Game) -> List[str]:
+    rv = []
+    while game():
+        rv.append(json.dumps(build_emittable_object_from(game.inspectable)))
+        game.inspectable.events.clear()
+    return rv
+
+
+def test_forked_and_restored_games_replay_the_same_states():
+    # Random streams are part of the captured state, so a fork and a restore go on exactly like the game would have.
+    for wave_number in (0, 4, 8):
+        game = Game(1)
+        game.set_new_players({"h": Healer})
+        game.start_new_wave(wave_number, Terrain.parse_runner_movements("ws-e"))
+        while game.wave.relative_tick < 60 and game():
+            pass
+        fork, snapshot = game.fork(), game.snapshot()
+        states = replay_from(game)
+
+        assert replay_from(fork) == states, f"Wave {wave_number + 1} played differently forked."
+        for _ in range(2):
+            game.restore(snapshot)
+            assert replay_from(game) == states, f"Wave {wave_number + 1} played differently restored."
@@ -0,0 +1,62 @@
+from random import Random
+from typing import List, Tuple
+
+from simulation.base import tables
+from simulation.base.terrain import C, Grid, L, P, Terrain, V
+from simulation.game import Game
+
+# The tables in simulation/base/tables.py stand in for the algorithms they were built from, which are kept around to
+# check them against. Pairs of tiles are sampled, since checking every pair is far too slow for a test run.
+SAMPLES: int = 300
+
+
+def random_tile(rng: Random, margin: int = 0) -> C:
+    return C(rng.randrange(-margin, L.WIDTH + margin), rng.randrange(-margin, L.HEIGHT + margin))
+
+
+def chain(tile: C) -> List[Tuple[int, int]]:
+    # A path as every tile on it, from its end back to its start.
+    rv = []
+    while tile is not None:
+        rv.append((tile.x, tile.y))
+        tile = tile.parent
+    return rv
+
+
+def test_path_tables_follow_search_path():
+    # Destinations include tiles that can not be reached, and tiles outside the map.
+    game = Game(0)
+    game.set_new_players({})
+    game.start_new_wave(0, Terrain.parse_runner_movements(""))
+    player = game.players.defender
+    rng = Random(0)
+    starts = [C.from_id(tile) for tile in range(L.WIDTH * L.HEIGHT) if P.covers(C.from_id(tile))]
+    for _ in range(SAMPLES):
+        start, destination = rng.choice(starts), random_tile(rng, 3)
+        expected = chain(player.search_path(destination, start.copy()))
+        assert chain(P.path(start.copy(), destination)) == expected, f"{start} to {destination} pathed differently."
+
+
+def test_sight_table_follows_trace_sight():
+    rng = Random(0)
+    for _ in range(50 * SAMPLES):
+        start, destination = random_tile(rng), random_tile(rng)
+        assert V.sees(start.id, destination.id) == start.trace_sight(destination), \
+            f"{start} to {destination} saw differently."
+        assert start.can_see(destination) == start.trace_sight(destination)
+
+
+def test_step_masks_follow_trace_single_step():
+    # Every tile and direction, since there are only eight per tile. Steps that leave the map are never legal. The Npc
+    # masks leave out player blocking, so they are checked against a grid without any.
+    grid = Grid()
+    for tile in map(C.from_id, range(L.WIDTH * L.HEIGHT)):
+        for i, (dx, dy) in enumerate(tables.ADJACENCY):
+            destination = C(tile.x + dx, tile.y + dy)
+            player, npc = L.PLAYER_STEPS[tile.y, tile.x] >> i & 1 == 1, L.NPC_STEPS[tile.y, tile.x] >> i & 1 == 1
+            if not (0 <= destination.x < L.WIDTH and 0 <= destination.y < L.HEIGHT):
+                assert not player and not npc, f"{tile} steps out of the map."
+                continue
+            assert player == tile.trace_single_step(destination), f"{tile} to {destination} stepped differently."
+            assert npc == tile.trace_npc_single_step(destination, grid), \
+                f"{tile} to {destination} stepped differently for Npcs."